@@ -0,0 +1,145 @@
+"""
+Benchmark - Incremental dbt marts
+==================================
+Parity check and timing for the incremental marts (fct_matches,
+fct_team_season_stats, fct_team_form and the forecast marts):
+
+  1. `dbt run --full-refresh` builds the tables from scratch (snapshot A)
+  2. the newest --rewind-days of fct_matches are deleted, together with the
+     fct_team_season_stats rows of the (team, season) pairs they touch,
+     leaving the marts built on them stale, as if those matchdays had not
+     been loaded yet
+  3. a plain incremental `dbt run` catches up (snapshot B)
+
+A and B must be identical (ignoring _created_at). Everything runs on a
+scratch copy of --db with its own profiles.yml, target/ and logs/, so the
+warehouse and the project directory are left alone. Run from the project
+root against a database that already holds `matches`.
+
+Usage:
+    python benchmarks/bench_dbt_incremental.py [--rewind-days 60] [--dbt-cmd dbt] [--scratch-dir db]
+"""
+
+import argparse
+import os
+import shlex
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+
+from db_loader import copy_database
+
+DB_PATH = os.path.join(ROOT, "db", "footbase_big5.db")
+
+PROFILE = """\
+footbase:
+  target: sqlite
+  outputs:
+    sqlite:
+      type: sqlite
+      threads: 1
+      database: database
+      schema: main
+      schemas_and_paths:
+        main: "{sqlite_path}"
+      schema_directory: "{scratch}"
+"""
+
+MODELS = {
+    "fct_matches": ["match_id"],
+    "fct_team_season_stats": ["team_id", "season", "competition_id"],
+    "fct_team_form": ["team_id", "match_id"],
+    "fct_match_probabilities": ["match_id"],
+    "fct_forecast_calibration": ["competition_id", "season", "source", "outcome", "bucket"],
+    "fct_forecast_scores": ["competition_id", "season", "source"],
+}
+
+
+def dbt_run(dbt_cmd, profiles_dir, *extra):
+    """
+    Run the incremental marts through dbt and return the wall time in
+    seconds. Artifacts and logs go next to the scratch profiles.yml.
+    """
+    cmd = shlex.split(dbt_cmd) + ["run", "--select", *MODELS, "--profiles-dir", profiles_dir,
+                                  "--target-path", os.path.join(profiles_dir, "target"),
+                                  "--log-path", os.path.join(profiles_dir, "logs"), *extra]
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def snapshot(conn):
+    frames = {}
+    for table, key in MODELS.items():
+        df = pd.read_sql_query(f"SELECT * FROM {table}", conn).drop(columns="_created_at")
+        frames[table] = df.sort_values(key).reset_index(drop=True)
+    return frames
+
+
+def rewind(conn, days):
+    """
+    Delete the newest `days` of fct_matches and the fct_team_season_stats
+    rows of every (team, season) they played in, so the incremental run has
+    to rebuild those partitions. Returns (matches removed, team-seasons removed).
+    """
+    recent = "match_date > datetime((SELECT max(match_date) FROM fct_matches), ?)"
+    cutoff = (f"-{days} days",)
+    with conn:
+        seasons = conn.execute(f"""
+            DELETE FROM fct_team_season_stats WHERE (team_id, season) IN (
+                SELECT home_team_id, season FROM fct_matches WHERE {recent}
+                UNION
+                SELECT away_team_id, season FROM fct_matches WHERE {recent}
+            )
+        """, cutoff * 2).rowcount
+        matches = conn.execute(f"DELETE FROM fct_matches WHERE {recent}", cutoff).rowcount
+    return matches, seasons
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--rewind-days", type=int, default=60)
+    parser.add_argument("--dbt-cmd", default="dbt", help="dbt executable (default: dbt)")
+    parser.add_argument("--scratch-dir", default=os.path.join(ROOT, "db"),
+                        help="where the scratch database and profiles.yml are written")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.scratch_dir) as tmp:
+        db_path = os.path.join(tmp, "footbase_big5.db")
+        copy_database(args.db, db_path)
+        with open(os.path.join(tmp, "profiles.yml"), "w") as f:
+            f.write(PROFILE.format(sqlite_path=db_path.replace(os.sep, "/"), scratch=tmp.replace(os.sep, "/")))
+
+        full_s = dbt_run(args.dbt_cmd, tmp, "--full-refresh")
+        conn = sqlite3.connect(db_path)
+        full = snapshot(conn)
+        print(f"Full refresh: {len(full['fct_matches']):,} matches, "
+              f"{len(full['fct_team_season_stats']):,} team-seasons")
+
+        matches, seasons = rewind(conn, args.rewind_days)
+        print(f"  ℹ Rewound {matches:,} matches ({args.rewind_days} days) and {seasons:,} team-seasons")
+
+        incr_s = dbt_run(args.dbt_cmd, tmp)
+        incremental = snapshot(conn)
+        noop_s = dbt_run(args.dbt_cmd, tmp)
+        conn.close()
+
+    for table in MODELS:
+        pd.testing.assert_frame_equal(full[table], incremental[table])
+    print("  ✓ Incremental build identical to --full-refresh")
+
+    print(f"  full refresh      : {full_s:6.2f} s")
+    print(f"  incremental       : {incr_s:6.2f} s")
+    print(f"  incremental no-op : {noop_s:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
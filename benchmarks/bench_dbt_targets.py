@@ -0,0 +1,145 @@
+"""
+Benchmark - dbt targets (SQLite vs DuckDB)
+===========================================
+Builds the dbt project on both targets from the same raw data and diffs
+every mart:
+
+  1. the SQLite database is copied to a scratch directory, and its raw
+     tables are synced into a scratch DuckDB file (etl/duckdb_sync.py)
+  2. a scratch profiles.yml points the `sqlite` and `duckdb` outputs at
+     those copies
+  3. `dbt build --full-refresh` runs on each target (models and tests) and
+     is timed
+  4. every model under models/marts/ is read back from both databases and
+     compared, ignoring _created_at, with floats equal to 1e-9 relative
+
+Run from the project root against a database that already holds the raw
+`matches` table (ingestion + xG merge).
+
+Usage:
+    python benchmarks/bench_dbt_targets.py [--dbt-cmd dbt] [--scratch-dir db]
+"""
+
+import argparse
+import glob
+import os
+import shlex
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import duckdb
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+
+from duckdb_sync import sync
+
+DB_PATH = os.path.join(ROOT, "db", "footbase_big5.db")
+MARTS = sorted(os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(ROOT, "models", "marts", "*.sql")))
+
+PROFILE = """\
+footbase:
+  target: sqlite
+  outputs:
+    sqlite:
+      type: sqlite
+      threads: 1
+      database: database
+      schema: main
+      schemas_and_paths:
+        main: "{sqlite_path}"
+      schema_directory: "{scratch}"
+    duckdb:
+      type: duckdb
+      path: "{duckdb_path}"
+      schema: main
+      threads: 4
+"""
+
+
+def dbt_build(dbt_cmd, target, profiles_dir):
+    """
+    `dbt build --full-refresh` on one target. Returns the wall time in
+    seconds. Artifacts and logs go next to the scratch profiles.yml, so the
+    project's target/ and logs/ are left alone.
+    """
+    cmd = shlex.split(dbt_cmd) + ["build", "--full-refresh", "--target", target, "--profiles-dir", profiles_dir,
+                                  "--target-path", os.path.join(profiles_dir, f"target-{target}"),
+                                  "--log-path", os.path.join(profiles_dir, "logs")]
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def comparable(df):
+    """Numbers as float64, everything else as objects with None, rows in key order."""
+    df = df.drop(columns="_created_at", errors="ignore")
+    out = pd.DataFrame(index=df.index)
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values):
+            out[column] = values.astype("float64")
+        else:
+            out[column] = values.astype(object).where(values.notna(), None)
+    # Sort on the non-float columns (ids, seasons, counts), which are exact on both sides
+    key = [c for c in out.columns if out[c].dtype == object or (out[c].dropna() % 1 == 0).all()]
+    return out.sort_values(key, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--dbt-cmd", default="dbt", help="dbt executable (default: dbt)")
+    parser.add_argument("--scratch-dir", default=os.path.join(ROOT, "db"),
+                        help="where the scratch databases and profiles.yml are written")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.scratch_dir) as tmp:
+        sqlite_path = os.path.join(tmp, "footbase_big5.db")
+        duckdb_path = os.path.join(tmp, "footbase_big5.duckdb")
+        shutil.copy(args.db, sqlite_path)
+        counts = sync(sqlite_path, duckdb_path)
+        print(f"Raw data: {', '.join(f'{t} {n:,}' for t, n in counts.items())}")
+
+        with open(os.path.join(tmp, "profiles.yml"), "w") as f:
+            f.write(PROFILE.format(
+                sqlite_path=sqlite_path.replace(os.sep, "/"),
+                scratch=tmp.replace(os.sep, "/"),
+                duckdb_path=duckdb_path.replace(os.sep, "/"),
+            ))
+
+        timings = {target: dbt_build(args.dbt_cmd, target, tmp) for target in ("sqlite", "duckdb")}
+
+        lite = sqlite3.connect(sqlite_path)
+        duck = duckdb.connect(duckdb_path, read_only=True)
+        failures = 0
+        print(f"\n  {'mart':24s}  {'rows':>6}")
+        for mart in MARTS:
+            expected = comparable(pd.read_sql_query(f"SELECT * FROM {mart}", lite))
+            actual = comparable(duck.execute(f"SELECT * FROM main.{mart}").fetchdf())
+            try:
+                pd.testing.assert_frame_equal(actual, expected, check_dtype=False, rtol=1e-9)
+                print(f"  {mart:24s}  {len(expected):>6,}  ✓ identical")
+            except AssertionError as e:
+                failures += 1
+                detail = " ".join(str(e).split())[:160]
+                print(f"  {mart:24s}  {len(expected):>6,}  ✗ {detail}")
+        lite.close()
+        duck.close()
+
+    print("\nBuild time (dbt build --full-refresh):")
+    for target, seconds in timings.items():
+        print(f"  {target:8s}: {seconds:6.2f} s")
+
+    if failures:
+        sys.exit(f"✗ {failures} mart(s) differ between targets")
+    print("✓ All marts identical on SQLite and DuckDB")
+
+
+if __name__ == "__main__":
+    main()
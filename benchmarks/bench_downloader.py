@@ -0,0 +1,224 @@
+"""
+Benchmark - Football-data downloader
+=====================================
+Runs etl/multiscrapper.py against a local stand-in for football-data.co.uk
+(http.server, serving <season>/<code>.csv) instead of the real site. The
+stand-in serves the bundled data/raw seasons, converted back to the
+site's column headers, with an ETag and Last-Modified per file. It answers
+If-None-Match / If-Modified-Since with 304, and records every request.
+
+  download     first run into an empty directory: every file saved
+  revalidate   second run: every request is conditional and answered 304
+  resume       a run killed after --kill-after files, then run again: the
+               second run requests only the files the first did not finish
+  ingest       ingestion_script.py on the download directory; every served
+               (league, season) must reach `matches` with all its rows
+
+Usage:
+    python benchmarks/bench_downloader.py [--delay 0.02] [--kill-after 10]
+"""
+
+import argparse
+import email.utils
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ETL_DIR = os.path.join(ROOT, "etl")
+sys.path.insert(0, ETL_DIR)
+
+import pandas as pd
+
+import multiscrapper
+from raw_catalog import RENAME_MAP
+
+RAW_DIR = os.path.join(ROOT, "data", "raw")
+
+
+def site_files(raw_dir, site_dir):
+    """
+    Write the bundled seasons as the site serves them: <season>/<code>.csv
+    with football-data.co.uk headers. Returns {(league, season): rows}.
+    """
+    site_headers = {raw: site for site, raw in RENAME_MAP.items()}
+    served = {}
+    for code, league in multiscrapper.LEAGUES.items():
+        folder = league.replace(' ', '_')
+        for season in multiscrapper.SEASONS:
+            path = os.path.join(raw_dir, folder, f"{folder}_{season}.csv")
+            if not os.path.exists(path):
+                continue
+            df = pd.read_csv(path).drop(columns=['league', 'season'], errors='ignore')
+            os.makedirs(os.path.join(site_dir, season), exist_ok=True)
+            df.rename(columns=site_headers).to_csv(os.path.join(site_dir, season, f"{code}.csv"), index=False)
+            served[(league, f"20{season[:2]}/{season[2:]}")] = len(df)
+    return served
+
+
+class StandIn:
+    """football-data.co.uk stand-in on a free localhost port, serving `site_dir`."""
+
+    def __init__(self, site_dir, delay=0.0):
+        self.site_dir = site_dir
+        self.delay = delay
+        self.requests = []      # (path, status)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(standin.delay)
+                path = os.path.join(standin.site_dir, *self.path.strip('/').split('/'))
+                if not os.path.isfile(path):
+                    return self._reply(404)
+                with open(path, 'rb') as f:
+                    body = f.read()
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                mtime = int(os.stat(path).st_mtime)
+                modified = email.utils.formatdate(mtime, usegmt=True)
+                # If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2)
+                if 'If-None-Match' in self.headers:
+                    not_modified = self.headers['If-None-Match'] == etag
+                else:
+                    since = self.headers.get('If-Modified-Since')
+                    not_modified = since is not None and email.utils.parsedate_to_datetime(since).timestamp() >= mtime
+                if not_modified:
+                    return self._reply(304, etag=etag, modified=modified)
+                self._reply(200, body, etag, modified)
+
+            def _reply(self, status, body=b"", etag=None, modified=None):
+                with standin._lock:
+                    standin.requests.append((self.path, status))
+                self.send_response(status)
+                if etag:
+                    self.send_header('ETag', etag)
+                    self.send_header('Last-Modified', modified)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass    # the client was killed mid-download (the resume check)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def command(url, out_dir, workers):
+    return [sys.executable, 'multiscrapper.py', '--base-url', url, '--out-dir', out_dir, '--workers', str(workers)]
+
+
+def download(url, out_dir, workers=4):
+    """multiscrapper.py as the pipeline runs it. Returns seconds."""
+    start = time.perf_counter()
+    subprocess.run(command(url, out_dir, workers), cwd=ETL_DIR, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def finished_files(out_dir):
+    """Keys the manifest records as done in the current run."""
+    path = os.path.join(out_dir, multiscrapper.MANIFEST_NAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return set(json.load(f)["run"]["done"])
+    except (FileNotFoundError, json.JSONDecodeError, TypeError):
+        return set()
+
+
+def killed_run(url, out_dir, kill_after):
+    """Start a one-worker download and kill it once `kill_after` files are done. Returns the done keys."""
+    proc = subprocess.Popen(command(url, out_dir, 1), cwd=ETL_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    while len(finished_files(out_dir)) < kill_after and proc.poll() is None:
+        time.sleep(0.005)
+    proc.kill()
+    proc.wait()
+    return finished_files(out_dir)
+
+
+def request_key(path):
+    """'/1718/E0.csv' -> 'E0/1718', the manifest's key for that file."""
+    season, name = path.strip('/').split('/')
+    return f"{name[:-len('.csv')]}/{season}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--raw-dir", default=RAW_DIR, help="bundled raw seasons the stand-in serves")
+    parser.add_argument("--delay", type=float, default=0.02, help="seconds the stand-in waits per request")
+    parser.add_argument("--kill-after", type=int, default=10, help="files the interrupted run completes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        site_dir = os.path.join(tmp, "site")
+        out_dir = os.path.join(tmp, "raw")
+        db_path = os.path.join(tmp, "footbase.db")
+        served = site_files(args.raw_dir, site_dir)
+        print(f"Stand-in serving {len(served)} league seasons")
+
+        with StandIn(site_dir, args.delay) as standin:
+            seconds = download(standin.url, out_dir)
+            saved = sum(status == 200 for _, status in standin.requests)
+            print(f"  download   {seconds:6.2f}s  {saved} files saved")
+            assert saved == len(served), f"{saved} of {len(served)} files downloaded"
+
+            standin.requests.clear()
+            seconds = download(standin.url, out_dir)
+            statuses = [status for _, status in standin.requests]
+            print(f"  revalidate {seconds:6.2f}s  {statuses.count(304)} of {len(statuses)} answered 304")
+            # Leagues the bundled data has no files for (Primeira Liga) stay 404
+            assert statuses.count(304) == len(served) and set(statuses) <= {304, 404}, \
+                "a second run downloaded files again"
+            print("  ✓ A second run is all 304 / unchanged")
+
+            resume_dir = os.path.join(tmp, "resume")
+            standin.requests.clear()
+            done = killed_run(standin.url, resume_dir, args.kill_after)
+            time.sleep(args.delay + 0.2)     # let the request the killed run left in flight finish
+            standin.requests.clear()
+            seconds = download(standin.url, resume_dir)
+            requested = {request_key(path) for path, _ in standin.requests}
+            everything = {f"{code}/{season}" for code in multiscrapper.LEAGUES for season in multiscrapper.SEASONS}
+            print(f"  resume     {seconds:6.2f}s  {len(done)} done before the kill, {len(requested)} requested after")
+            assert done and requested == everything - done, "the resumed run did not fetch exactly the unfinished files"
+            assert finished_files(resume_dir) == everything
+            print("  ✓ A killed run resumes with only the files it had not finished")
+
+        start = time.perf_counter()
+        subprocess.run([sys.executable, 'ingestion_script.py', '--db-path', db_path, '--csv-dir', out_dir],
+                       cwd=ETL_DIR, check=True, capture_output=True)
+        conn = sqlite3.connect(db_path)
+        loaded = dict(((league, season), rows) for league, season, rows in conn.execute(
+            "SELECT league, season, COUNT(*) FROM matches GROUP BY league, season"
+        ))
+        conn.close()
+        print(f"  ingest     {time.perf_counter() - start:6.2f}s  {sum(loaded.values()):,} matches")
+        assert loaded == served, f"downloaded seasons missing from matches: {set(served) ^ set(loaded)}"
+        print("  ✓ Every downloaded season reaches `matches` with all its rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark - Ingestion memory
+=============================
+Peak RSS of a full ingestion_script.py run, reading whole files versus
+--stream (chunked reads with explicit dtypes), on synthetic raw drops built
+from the bundled CSVs at several scales.
+
+At scale N every league gets one file holding the bundled seasons N times
+over, with team names suffixed per copy so every fixture stays unique. This
+mimics the large multi-season files a full football-data.co.uk backfill
+produces. Each ingestion runs in its own process, and its peak RSS comes
+from os.wait4.
+
+Usage:
+    python benchmarks/bench_ingest_memory.py [--scales 1,10,100] [--chunksize 50000] [--scratch-dir db]
+"""
+
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ETL_DIR = os.path.join(ROOT, "etl")
+sys.path.insert(0, ETL_DIR)
+
+from raw_catalog import CSV_DTYPES, build_catalog
+
+CSV_DIR = os.path.join(ROOT, "data", "raw")
+LEAGUES = ["Premier_League", "La_Liga", "Bundesliga", "Serie_A", "Ligue_1"]
+
+
+def base_frames():
+    """{league_dir: DataFrame} of the files ingestion would select today."""
+    catalog = build_catalog(sqlite3.connect(":memory:"), CSV_DIR, LEAGUES)
+    frames = {}
+    for league in LEAGUES:
+        files = catalog.loc[catalog["selected"] & catalog["file_path"].str.startswith(f"{league}/"), "file_path"]
+        frames[league] = pd.concat(
+            [pd.read_csv(os.path.join(CSV_DIR, f), dtype=CSV_DTYPES) for f in files], ignore_index=True
+        )
+    return frames
+
+
+def write_synthetic(frames, scale, out_dir):
+    """Write one `<league>_synthetic.csv` per league with `scale` copies. Returns (rows, bytes)."""
+    rows = size = 0
+    for league, base in frames.items():
+        os.makedirs(os.path.join(out_dir, league), exist_ok=True)
+        path = os.path.join(out_dir, league, f"{league}_synthetic.csv")
+        for copy in range(scale):
+            df = base.copy()
+            if copy:
+                df["home_team"] = df["home_team"] + f" #{copy}"
+                df["away_team"] = df["away_team"] + f" #{copy}"
+            df.to_csv(path, mode="a" if copy else "w", header=not copy, index=False)
+            rows += len(df)
+        size += os.path.getsize(path)
+    return rows, size
+
+
+def run_ingestion(csv_dir, db_path, extra):
+    """Run ingestion_script.py in a child process. Returns (seconds, peak RSS in MB)."""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    cmd = [sys.executable, "ingestion_script.py", "--csv-dir", csv_dir, "--db-path", db_path, *extra]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=ETL_DIR, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"ingestion failed: {' '.join(cmd)}")
+    return elapsed, usage.ru_maxrss / 1024    # ru_maxrss is KiB on Linux
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="1,10,100")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--scratch-dir", default=os.path.join(ROOT, "db"),
+                        help="where synthetic CSVs and databases are written")
+    args = parser.parse_args()
+
+    frames = base_frames()
+    print(f"Base: {sum(len(f) for f in frames.values()):,} rows from {len(frames)} leagues")
+    print(f"\n  {'scale':>5}  {'rows':>10}  {'csv MB':>7}  {'whole-file':>20}  {'--stream':>20}")
+
+    for scale in (int(s) for s in args.scales.split(",")):
+        with tempfile.TemporaryDirectory(dir=args.scratch_dir) as tmp:
+            raw_dir = os.path.join(tmp, "raw")
+            db_path = os.path.join(tmp, "bench.db")
+            rows, size = write_synthetic(frames, scale, raw_dir)
+
+            whole_s, whole_mb = run_ingestion(raw_dir, db_path, [])
+            stream_s, stream_mb = run_ingestion(raw_dir, db_path, ["--stream", "--chunksize", str(args.chunksize)])
+
+            loaded = sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+            assert loaded == rows, f"expected {rows:,} rows, loaded {loaded:,}"
+
+        print(f"  {scale:>5}  {rows:>10,}  {size / 2**20:>7.1f}  "
+              f"{whole_mb:>8.0f} MB {whole_s:>7.1f} s  {stream_mb:>8.0f} MB {stream_s:>7.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Benchmark - League standings
+=============================
+Checks and times etl/league_standings.py against the way the table at a
+matchday was computed before: aggregating fct_matches again for each
+cutoff (AGGREGATE_SQL).
+
+  1. build_standings with the default tiebreakers (points, goal
+     difference, goals for, team_id) against AGGREGATE_SQL at every
+     matchday of every competition season. Totals and positions must match
+  2. "table at matchday k" for --reads random cutoffs: the query service's
+     range read on fct_league_standings against AGGREGATE_SQL (rows fetched
+     with sqlite3, no DataFrame)
+  3. the latest season is deleted from fct_league_standings and an
+     incremental `update_standings` rebuilds it. The result must match the
+     full refresh
+  4. on a scratch copy, a score in the oldest season is corrected and
+     flagged in changed_partitions. An incremental run must rebuild that
+     season and match a full refresh
+
+Run from the project root against a database that already holds fct_matches
+(`dbt build`). It writes fct_league_standings.
+
+Usage:
+    python benchmarks/bench_league_standings.py [--repeat 3] [--reads 500]
+"""
+
+import argparse
+import os
+import shutil
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+
+from change_capture import PARTITIONS_TABLE, ensure_change_schema, utc_now
+from db_loader import connect
+from league_standings import TABLE, build_standings, load_matches, update_standings
+from query_service import QUERIES
+
+DB_PATH = os.path.join(ROOT, "db", "footbase_big5.db")
+
+AGGREGATE_SQL = """
+WITH played AS (
+    SELECT home_team_id AS team_id, home_goals AS goals_for, away_goals AS goals_against,
+           home_xg AS xg_for, away_xg AS xg_against,
+           CASE result WHEN 'H' THEN 3 WHEN 'D' THEN 1 ELSE 0 END AS points,
+           CASE result WHEN 'H' THEN 1 ELSE 0 END AS won,
+           CASE result WHEN 'D' THEN 1 ELSE 0 END AS drawn,
+           CASE result WHEN 'A' THEN 1 ELSE 0 END AS lost
+    FROM fct_matches
+    WHERE season = :season AND competition_id = :competition_id AND matchday <= :matchday
+    UNION ALL
+    SELECT away_team_id, away_goals, home_goals, away_xg, home_xg,
+           CASE result WHEN 'A' THEN 3 WHEN 'D' THEN 1 ELSE 0 END,
+           CASE result WHEN 'A' THEN 1 ELSE 0 END,
+           CASE result WHEN 'D' THEN 1 ELSE 0 END,
+           CASE result WHEN 'H' THEN 1 ELSE 0 END
+    FROM fct_matches
+    WHERE season = :season AND competition_id = :competition_id AND matchday <= :matchday
+),
+totals AS (
+    SELECT team_id,
+           COUNT(*) AS played, SUM(won) AS won, SUM(drawn) AS drawn, SUM(lost) AS lost,
+           SUM(goals_for) AS goals_for, SUM(goals_against) AS goals_against,
+           SUM(goals_for) - SUM(goals_against) AS goal_difference,
+           SUM(points) AS points,
+           TOTAL(xg_for) AS xg_for, TOTAL(xg_against) AS xg_against
+    FROM played
+    GROUP BY team_id
+)
+SELECT ROW_NUMBER() OVER (
+           ORDER BY points DESC, goal_difference DESC, goals_for DESC, team_id
+       ) AS position,
+       *
+FROM totals
+ORDER BY position
+"""
+
+COLUMNS = ['position', 'team_id', 'played', 'won', 'drawn', 'lost',
+           'goals_for', 'goals_against', 'goal_difference', 'points', 'xg_for', 'xg_against']
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def aggregate(conn, competition_id, season, matchday):
+    return pd.read_sql_query(AGGREGATE_SQL, conn, params={
+        'competition_id': competition_id, 'season': season, 'matchday': matchday})
+
+
+def fetch(conn, sql, cutoff):
+    competition_id, season, matchday = cutoff
+    return conn.execute(sql, {'competition_id': competition_id, 'season': season, 'matchday': matchday}).fetchall()
+
+
+def snapshot(conn):
+    df = pd.read_sql_query(f"SELECT * FROM {TABLE}", conn).drop(columns='_created_at')
+    return df.sort_values(['competition_id', 'season', 'matchday', 'position'], ignore_index=True)
+
+
+def correct_oldest_match(conn):
+    """
+    Add two home goals to the first match of the oldest season in
+    fct_matches, and flag its partitions as change_capture.py would.
+    Returns the corrected season.
+    """
+    match_id, competition_id, season, home, away = conn.execute(
+        "SELECT match_id, competition_id, season, home_team_id, away_team_id FROM fct_matches "
+        "ORDER BY season, match_date, match_id LIMIT 1"
+    ).fetchone()
+    ensure_change_schema(conn)
+    with conn:
+        conn.execute("UPDATE fct_matches SET home_goals = home_goals + 2 WHERE match_id = ?", (match_id,))
+        conn.executemany(
+            f"INSERT INTO {PARTITIONS_TABLE} (run_id, source, competition_id, season, team_id, changed_rows, changed_at) "
+            f"VALUES ('bench', 'football_data', ?, ?, ?, 1, ?)",
+            [(competition_id, season, team, utc_now()) for team in (home, away)],
+        )
+    return season
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--reads", type=int, default=500, help="random cutoffs for the read comparison")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    matches = load_matches(conn)
+    cutoffs = [tuple(row) for row in matches.groupby(['competition_id', 'season'])['matchday']
+               .max().reset_index().itertuples(index=False)]
+    cutoffs = [(c, s, k) for c, s, last in cutoffs for k in range(1, last + 1)]
+    print(f"Input: fct_matches ({len(matches):,} matches, {len(cutoffs):,} matchday cutoffs)")
+
+    # 1. One pass per season against one aggregate per cutoff
+    engine_s, engine = best_of(lambda: build_standings(matches, tiebreakers={}), args.repeat)
+    aggregate_s, tables = best_of(lambda: [aggregate(conn, *cutoff) for cutoff in cutoffs], 1)
+    engine = engine.set_index(['competition_id', 'season', 'matchday'])
+    for cutoff, expected in zip(cutoffs, tables):
+        got = engine.loc[cutoff]
+        got = got[got['played'] > 0][COLUMNS].reset_index(drop=True)
+        got['position'] = range(1, len(got) + 1)    # teams yet to play are left out of the aggregate
+        pd.testing.assert_frame_equal(got, expected[COLUMNS], check_dtype=False, rtol=1e-9)
+    print("  ✓ Standings identical to the per-cutoff aggregate at every matchday")
+
+    # 2. Table at matchday k
+    update_standings(conn, full_refresh=True)
+    reads = random.Random(0).sample(cutoffs, min(args.reads, len(cutoffs)))
+    range_s, _ = best_of(lambda: [fetch(conn, QUERIES['league_table'], c) for c in reads], args.repeat)
+    point_s, _ = best_of(lambda: [fetch(conn, AGGREGATE_SQL, c) for c in reads], args.repeat)
+
+    # 3. Incremental rebuild of the latest season
+    full = snapshot(conn)
+    latest = full['season'].max()
+    with conn:
+        conn.execute(f"DELETE FROM {TABLE} WHERE season = ?", (latest,))
+    incremental_s, _ = best_of(lambda: update_standings(conn), 1)
+    pd.testing.assert_frame_equal(full, snapshot(conn))
+    print(f"  ✓ Incremental rebuild of {latest} identical to the full refresh")
+    conn.close()
+
+    # 4. A corrected old season, flagged in changed_partitions
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(args.db))) as tmp:
+        shutil.copy(args.db, os.path.join(tmp, "footbase.db"))
+        scratch = connect(os.path.join(tmp, "footbase.db"))
+        season = correct_oldest_match(scratch)
+        corrected_s, _ = best_of(lambda: update_standings(scratch), 1)
+        corrected = snapshot(scratch)
+        update_standings(scratch, full_refresh=True)
+        pd.testing.assert_frame_equal(snapshot(scratch), corrected)
+        assert not corrected.equals(full), "the corrected season was not rebuilt"
+        scratch.close()
+    print(f"  ✓ Incremental run after a correction in {season} identical to the full refresh")
+
+    print(f"\n  {'':34s} {'seconds':>9s}")
+    print(f"  {'all cutoffs, aggregate per cutoff':34s} {aggregate_s:9.3f}")
+    print(f"  {'all cutoffs, standings engine':34s} {engine_s:9.3f}   {aggregate_s / engine_s:5.1f}x")
+    print(f"  {f'{len(reads)} reads, aggregate':34s} {point_s:9.3f}")
+    print(f"  {f'{len(reads)} reads, snapshot range read':34s} {range_s:9.3f}   {point_s / range_s:5.1f}x")
+    print(f"  {'incremental (latest season)':34s} {incremental_s:9.3f}")
+    print(f"  {'incremental (+ corrected season)':34s} {corrected_s:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Benchmark - Notebook access layer
+==================================
+Compares etl/footbase with the notebook pattern it replaces: open a
+connection, read the whole table into pandas, then filter. The script runs
+on a scratch copy of the database and reports:
+
+  import             `import footbase` in a fresh interpreter, and whether it loaded pandas/NumPy
+  whole table        read_sql_query("SELECT * FROM fct_matches") + pandas filter, per request
+  pushdown           Warehouse.table(...).where(...).select(...).df(), first call and repeated
+  derived frames     team_history / season_summary: built, read from the disk memo
+                     (new Warehouse), and from memory
+
+It also checks that the pushdown results equal the pandas-filtered ones,
+that season_summary agrees with fct_team_season_stats, and that bumping
+data_version makes the next call rebuild, also when a recreated database
+starts again at the same version.
+
+Usage:
+    python benchmarks/bench_notebook_access.py [--requests 200]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ETL_DIR = os.path.join(ROOT, "etl")
+sys.path.insert(0, ETL_DIR)
+
+import pandas as pd
+
+from db_loader import bump_data_version
+from footbase import Warehouse
+
+DB_PATH = os.path.join(ROOT, "db", "footbase_big5.db")
+COLUMNS = ['match_id', 'match_date', 'home_team_id', 'away_team_id', 'home_goals', 'away_goals', 'home_xg', 'away_xg']
+SUMMARY_CHECKS = {
+    'played': 'matches_played', 'wins': 'wins', 'draws': 'draws', 'losses': 'losses',
+    'points': 'total_points', 'goals_for': 'goals_for', 'goals_against': 'goals_against',
+}
+
+IMPORT_PROBE = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+import footbase
+print(time.perf_counter() - start, 'pandas' in sys.modules, 'numpy' in sys.modules)
+"""
+
+
+def request_pool(db_path, size, seed=0):
+    """`size` random (league, season, team) filters over team seasons in fct_matches."""
+    conn = sqlite3.connect(db_path)
+    team_seasons = conn.execute(
+        "SELECT DISTINCT competition_id, season, home_team_id FROM fct_matches"
+    ).fetchall()
+    conn.close()
+    rng = random.Random(seed)
+    return [rng.choice(team_seasons) for _ in range(size)]
+
+
+def whole_table(db_path, league, season, team):
+    """The notebook pattern: full read, then filter in pandas."""
+    conn = sqlite3.connect(db_path)
+    df = pd.read_sql_query("SELECT * FROM fct_matches", conn)
+    conn.close()
+    df = df[(df['competition_id'] == league) & (df['season'] == season)
+            & ((df['home_team_id'] == team) | (df['away_team_id'] == team))]
+    return df[COLUMNS]
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def ms(samples):
+    return f"p50 {statistics.median(samples):8.3f} ms   max {max(samples):8.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--scratch-dir", default=os.path.join(ROOT, "db"),
+                        help="where the scratch copy of the database is written")
+    args = parser.parse_args()
+
+    probe = subprocess.run([sys.executable, "-c", IMPORT_PROBE, ETL_DIR],
+                           capture_output=True, text=True, check=True).stdout.split()
+    print(f"  import footbase: {float(probe[0]) * 1000:.1f} ms (pandas loaded: {probe[1]}, numpy loaded: {probe[2]})")
+    assert probe[1:] == ['False', 'False'], "importing footbase loaded pandas or NumPy"
+
+    with tempfile.TemporaryDirectory(dir=args.scratch_dir) as tmp:
+        db_path = os.path.join(tmp, "footbase.db")
+        cache_dir = os.path.join(tmp, "cache")
+        shutil.copy(args.db, db_path)
+        requests = request_pool(db_path, args.requests)
+        wh = Warehouse(db_path, cache_dir=cache_dir)
+
+        # Whole-table reads are slow, so time a sample of them
+        full = []
+        for league, season, team in requests[:20]:
+            expected, elapsed = timed(whole_table, db_path, league, season, team)
+            full.append(elapsed)
+            query = wh.table('fct_matches').where(league=league, season=season, team=team).select(*COLUMNS)
+            # A team season without xG reads as object (None) rather than float64
+            got = query.df().astype({'home_xg': float, 'away_xg': float})
+            pd.testing.assert_frame_equal(got, expected.reset_index(drop=True))
+        print("  ✓ Pushdown results match the whole-table filter")
+
+        wh.clear_cache()
+        first, repeat = [], []
+        for league, season, team in requests:
+            query = wh.table('fct_matches').where(league=league, season=season, team=team).select(*COLUMNS)
+            first.append(timed(query.df)[1])
+            repeat.append(timed(query.df)[1])
+        print(f"\n  {'whole table + filter':22s} {ms(full)}")
+        print(f"  {'pushdown, first call':22s} {ms(first)}")
+        print(f"  {'pushdown, repeated':22s} {ms(repeat)}")
+
+        print()
+        for name, call in [('team_history', lambda w: w.team_history()),
+                           ('season_summary', lambda w: w.season_summary())]:
+            built = timed(call, wh)[1]
+            fresh = Warehouse(db_path, cache_dir=cache_dir)
+            disk = timed(call, fresh)[1]
+            memory = timed(call, fresh)[1]
+            fresh.close()
+            print(f"  {name:15s} built {built:8.1f} ms   disk memo {disk:7.1f} ms   memory {memory:6.2f} ms")
+
+        conn = sqlite3.connect(db_path)
+        stats = pd.read_sql_query("SELECT * FROM fct_team_season_stats", conn)
+        conn.close()
+        joined = wh.season_summary().merge(stats, on=['team_id', 'competition_id', 'season'],
+                                           suffixes=('', '_mart'), validate='1:1')
+        assert len(joined) == len(stats), "season_summary and fct_team_season_stats cover different team seasons"
+        for ours, theirs in SUMMARY_CHECKS.items():
+            mart = theirs if theirs != ours else f"{theirs}_mart"
+            assert (joined[ours] == joined[mart]).all(), f"season_summary.{ours} != fct_team_season_stats.{theirs}"
+        print("  ✓ season_summary agrees with fct_team_season_stats")
+
+        before = wh.data_version()
+        writer = sqlite3.connect(db_path)
+        bump_data_version(writer, 'bench')
+        writer.close()
+        wh.season_summary()
+        files = sorted(os.listdir(cache_dir))
+        assert all(f".v{before}." not in name for name in files), "stale memo files survived a version bump"
+        assert any(f".v{wh.data_version()}." in name for name in files)
+        print("  ✓ A data_version bump rebuilds the memoized frames")
+
+        # A recreated database restarts at version 1; stamp it up to the same
+        # version and check the memo from the old database is not served
+        version, generation = wh.data_version(), wh.generation()
+        wh.close()
+        writer = sqlite3.connect(db_path)
+        writer.execute("DROP TABLE data_version")
+        while bump_data_version(writer, 'bench') < version:
+            pass
+        writer.close()
+        fresh = Warehouse(db_path, cache_dir=cache_dir)
+        fresh.season_summary()
+        files = sorted(os.listdir(cache_dir))
+        assert fresh.data_version() == version and fresh.generation() != generation
+        assert all(f".{generation}." not in name for name in files), "memo from a replaced database was reused"
+        print("  ✓ A recreated database does not reuse the old memo at the same version")
+        fresh.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark - Parquet reads
+==========================
+Loads fct_matches into pandas three ways — SQLite (`pd.read_sql_query`),
+a CSV export and the partitioned Parquet dataset (etl/parquet_store.py) —
+for three access patterns:
+
+  full      every column, every row
+  project   four columns, every row
+  prune     four columns, one competition and season
+
+Every source must return the same rows. The script reports best-of-N load
+time and the bytes read from disk. Bytes read is the `rchar` delta from
+/proc/self/io (Linux), so it counts what each reader asks the OS for
+whether or not the pages are cached. Elsewhere it shows n/a.
+
+At today's size each partition file is smaller than the Parquet footer
+read, so a projection still pulls most of every file it opens. Pruning
+is where the partitioned layout saves I/O.
+
+Build the warehouse and run `python etl/parquet_store.py` first.
+
+Usage:
+    python benchmarks/bench_parquet_reads.py [--repeat 5] [--scratch-dir db]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+
+from parquet_store import read_dataset
+
+DB_PATH = os.path.join(ROOT, "db", "footbase_big5.db")
+PARQUET_DIR = os.path.join(ROOT, "data", "parquet")
+
+COLUMNS = ["match_id", "match_date", "home_xg", "away_xg"]
+PRUNE = {"competition_id": "serie_a", "season": "2023/24"}
+
+SCENARIOS = {
+    "full": (None, None),
+    "project": (COLUMNS, None),
+    "prune": (COLUMNS, PRUNE),
+}
+
+
+def read_sqlite(db_path, columns, filters):
+    select = ", ".join(columns) if columns else "*"
+    where = " AND ".join(f"{c} = ?" for c in filters or {})
+    sql = f"SELECT {select} FROM fct_matches" + (f" WHERE {where}" if where else "")
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    df = pd.read_sql_query(sql, conn, params=list((filters or {}).values()))
+    conn.close()
+    return df
+
+
+def read_csv(csv_path, columns, filters):
+    usecols = columns + list(filters) if columns and filters else columns
+    df = pd.read_csv(csv_path, usecols=usecols)
+    for column, value in (filters or {}).items():
+        df = df[df[column] == value]
+    return df[columns] if columns else df
+
+
+def read_parquet(root, columns, filters):
+    return read_dataset("fct_matches", columns=columns, filters=filters, root=root)
+
+
+def bytes_read():
+    """Cumulative bytes this process has read through read()/pread() (Linux only)."""
+    try:
+        with open("/proc/self/io") as f:
+            return int(next(line for line in f if line.startswith("rchar")).split()[1])
+    except OSError:
+        return None
+
+
+def measure(reader, repeat):
+    """Best-of-`repeat` seconds and bytes read by one call. Returns (df, seconds, bytes)."""
+    timings = []
+    for _ in range(repeat):
+        before = bytes_read()
+        start = time.perf_counter()
+        df = reader()
+        timings.append(time.perf_counter() - start)
+        after = bytes_read()
+    return df, min(timings), (after - before) if before is not None else None
+
+
+def normalize(df):
+    """Same rows in the same order with comparable values, whatever the reader's dtypes."""
+    df = df.sort_values("match_id", ignore_index=True)
+    df = df[sorted(df.columns)]
+    out = pd.DataFrame(index=df.index)
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values):
+            out[column] = values.astype("float64")
+        else:
+            out[column] = values.astype(object).where(values.notna(), None)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--parquet-dir", default=PARQUET_DIR)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scratch-dir", default=os.path.join(ROOT, "db"),
+                        help="where the CSV export is written")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.scratch_dir) as tmp:
+        csv_path = os.path.join(tmp, "fct_matches.csv")
+        read_sqlite(args.db, None, None).to_csv(csv_path, index=False)
+
+        readers = {
+            "sqlite": lambda columns, filters: read_sqlite(args.db, columns, filters),
+            "csv": lambda columns, filters: read_csv(csv_path, columns, filters),
+            "parquet": lambda columns, filters: read_parquet(args.parquet_dir, columns, filters),
+        }
+
+        print(f"fct_matches, best of {args.repeat}")
+        print(f"\n  {'scenario':8s}  {'rows':>6}  " + "  ".join(f"{name:>20s}" for name in readers))
+        for scenario, (columns, filters) in SCENARIOS.items():
+            results = {
+                name: measure(lambda: reader(columns, filters), args.repeat)
+                for name, reader in readers.items()
+            }
+
+            expected = normalize(results["sqlite"][0])
+            for name, (df, _, _) in results.items():
+                pd.testing.assert_frame_equal(normalize(df), expected, check_dtype=False)
+
+            cells = []
+            for _, seconds, size in results.values():
+                size = f"{size / 1024:>7.0f} KB" if size is not None else f"{'n/a':>10s}"
+                cells.append(f"{seconds * 1000:>7.1f} ms {size}")
+            print(f"  {scenario:8s}  {len(expected):>6,}  " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
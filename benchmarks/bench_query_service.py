@@ -0,0 +1,158 @@
+"""
+Benchmark - Query service load test
+====================================
+Runs concurrent clients against etl/query_service.py. Each request is one
+of the service queries, picked at random from a fixed pool of
+--distinct requests (teams, seasons, matchdays and pairings drawn from the
+warehouse). Three setups are compared:
+
+  connect per request   a new sqlite3 connection for every request (the old pattern)
+  pool, no cache        pooled read-only connections, every request hits SQLite
+  pool + cache          pooled connections with the version-checked LRU/TTL cache
+
+Each setup reports QPS and p50/p99 latency. The script also checks that
+cached and uncached results agree, and that bumping data_version
+invalidates the cache. It runs on a scratch copy of the database.
+
+Usage:
+    python benchmarks/bench_query_service.py [--clients 8] [--seconds 5] [--distinct 500]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+
+from db_loader import bump_data_version
+from query_service import QUERIES, QueryService
+
+DB_PATH = os.path.join(ROOT, "db", "footbase_big5.db")
+
+
+def request_pool(db_path, size, seed=0):
+    """`size` random (query name, params) requests over keys that exist in the warehouse."""
+    conn = sqlite3.connect(db_path)
+    team_seasons = conn.execute("SELECT DISTINCT team_id, season FROM fct_team_season_stats").fetchall()
+    competitions = conn.execute(
+        "SELECT competition_id, season, MAX(matchday) FROM fct_matches GROUP BY competition_id, season"
+    ).fetchall()
+    pairings = conn.execute("SELECT DISTINCT home_team_id, away_team_id FROM fct_matches").fetchall()
+    conn.close()
+
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(size):
+        kind = rng.choice(list(QUERIES))
+        if kind == 'team_season_stats':
+            team, season = rng.choice(team_seasons)
+            params = {'team_id': team, 'season': rng.choice([season, None])}
+        elif kind == 'team_fixtures':
+            team, season = rng.choice(team_seasons)
+            params = {'team_id': team, 'season': season}
+        elif kind == 'head_to_head':
+            team_a, team_b = rng.choice(pairings)
+            params = {'team_a': team_a, 'team_b': team_b}
+        else:
+            competition, season, last = rng.choice(competitions)
+            params = {'competition_id': competition, 'season': season, 'matchday': rng.randint(1, last)}
+        requests.append((kind, params))
+    return requests
+
+
+def connect_per_request(db_path):
+    def run(name, params):
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            return tuple(dict(row) for row in conn.execute(QUERIES[name], params))
+        finally:
+            conn.close()
+    return run
+
+
+def load_test(run, requests, clients, seconds, seed=1):
+    """Hammer `run(name, params)` from `clients` threads. Returns (qps, p50_ms, p99_ms)."""
+    latencies = [[] for _ in range(clients)]
+    deadline = time.perf_counter() + seconds
+
+    def client(i):
+        rng = random.Random(seed + i)
+        while time.perf_counter() < deadline:
+            name, params = rng.choice(requests)
+            start = time.perf_counter()
+            run(name, params)
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    flat = sorted(t for per_client in latencies for t in per_client)
+    p99 = flat[min(len(flat) - 1, int(len(flat) * 0.99))]
+    return len(flat) / elapsed, statistics.median(flat) * 1000, p99 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--distinct", type=int, default=500, help="distinct requests in the pool")
+    parser.add_argument("--scratch-dir", default=os.path.join(ROOT, "db"),
+                        help="where the scratch copy of the database is written")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.scratch_dir) as tmp:
+        db_path = os.path.join(tmp, "footbase.db")
+        shutil.copy(args.db, db_path)
+        requests = request_pool(db_path, args.distinct)
+        print(f"Load: {args.clients} clients × {args.seconds:g}s, {len(requests):,} distinct requests")
+
+        uncached = QueryService(db_path, pool_size=args.clients, cache_size=0)
+        cached = QueryService(db_path, pool_size=args.clients)
+
+        # Same answers with and without the cache (the first call fills it, the
+        # second is served from it), and a version bump invalidates it
+        for name, params in requests[:50]:
+            assert cached.query(name, **params) == uncached.query(name, **params)
+            assert cached.query(name, **params) == uncached.query(name, **params)
+        writer = sqlite3.connect(db_path)
+        bump_data_version(writer, 'bench')
+        writer.close()
+        misses = cached.cache.misses
+        name, params = requests[0]
+        cached.query(name, **params)
+        assert cached.cache.misses == misses + 1, "data_version bump did not invalidate the cache"
+        print("  ✓ Cached results match SQLite; a data_version bump invalidates them")
+
+        setups = [
+            ("connect per request", connect_per_request(db_path)),
+            ("pool, no cache", lambda name, params: uncached.query(name, **params)),
+            ("pool + cache", lambda name, params: cached.query(name, **params)),
+        ]
+        print(f"\n  {'setup':22s} {'QPS':>9s} {'p50 ms':>8s} {'p99 ms':>8s}")
+        for label, run in setups:
+            qps, p50, p99 = load_test(run, requests, args.clients, args.seconds)
+            print(f"  {label:22s} {qps:9,.0f} {p50:8.3f} {p99:8.3f}")
+
+        total = cached.cache.hits + cached.cache.misses
+        print(f"\n  cache hit rate: {cached.cache.hits / total:.1%} ({len(cached.cache):,} entries)")
+        uncached.close()
+        cached.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark - SQLite load path
+=============================
+Loads every CSV under data/raw/<league>/ into a scratch database twice:
+once with the original `df.to_sql(...)` on a default connection, and once
+through etl/db_loader.py (tuned PRAGMAs, chunked executemany, indexes
+after load). Reports rows/sec for each.
+
+Usage:
+    python benchmarks/bench_sqlite_load.py [--repeat 3] [--scratch-dir db]
+"""
+
+import argparse
+import glob
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+
+from db_loader import bulk_insert, connect, create_indexes
+from manifest import MATCHES_DDL, NATURAL_KEY
+
+CSV_DIR = os.path.join(ROOT, "data", "raw")
+LEAGUES = ["Premier_League", "La_Liga", "Bundesliga", "Serie_A", "Ligue_1"]
+
+
+def read_frames():
+    frames = []
+    for league in LEAGUES:
+        for file in sorted(glob.glob(os.path.join(CSV_DIR, league, "*.csv"))):
+            df = pd.read_csv(file)
+            df['date'] = pd.to_datetime(df['date'], format='%d/%m/%Y', errors='coerce').dt.strftime('%Y-%m-%d')
+            df["league"] = league.replace("_", " ")
+            frames.append(df)
+    return frames
+
+
+def load_to_sql(db_path, frames):
+    conn = sqlite3.connect(db_path)
+    conn.execute(MATCHES_DDL)
+    for df in frames:
+        df.to_sql("matches", conn, if_exists="append", index=False)
+    conn.close()
+
+
+def load_bulk(db_path, frames):
+    conn = connect(db_path)
+    conn.execute(MATCHES_DDL)
+    for df in frames:
+        bulk_insert(conn, "matches", df)
+    create_indexes(conn, "matches", [("ux_matches_natural_key", NATURAL_KEY, True)])
+    conn.close()
+
+
+def time_load(fn, frames, repeat, scratch_dir):
+    timings = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(dir=scratch_dir) as tmp:
+            start = time.perf_counter()
+            fn(os.path.join(tmp, "bench.db"), frames)
+            timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scratch-dir", default=os.path.join(ROOT, "db"),
+                        help="where scratch databases are created; keep it on the same disk as the real DB")
+    args = parser.parse_args()
+    os.makedirs(args.scratch_dir, exist_ok=True)
+
+    frames = read_frames()
+    rows = sum(len(df) for df in frames)
+    print(f"Input: {len(frames)} files, {rows:,} rows")
+
+    for label, fn in [("to_sql (default)", load_to_sql), ("db_loader (bulk)", load_bulk)]:
+        seconds = time_load(fn, frames, args.repeat, args.scratch_dir)
+        print(f"  {label:18s}: {seconds * 1000:8.1f} ms  {rows / seconds:>10,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Benchmark - ETL and dbt suite
+==============================
+Times the load path end to end on synthetic data (synthetic_data.py) at
+several scales, and writes the results as JSON so runs can be compared:
+
+  ingest           ingestion_script.py, full load of the football-data CSVs
+  understat_clean  understat_cleaner.py on the raw Understat export
+  xg_merge         merge_script.py --in-place
+  dbt              dbt build --full-refresh (models and tests)
+
+Each stage is a subprocess with its own seconds, peak RSS
+(pipeline.run_command) and output row count. Scale N gives every league N
+divisions, so 1, 10 and 100 are about 15k, 150k and 1.5M fixtures over
+--seasons seasons. Everything
+is written to a scratch directory, including the database, a
+profiles.yml for dbt and dbt's target/ and logs/.
+
+With --baseline, every (scale, stage) is compared with an earlier result
+file. A stage is flagged as a regression when it is more than --threshold
+slower and at least --min-seconds slower, and the script then exits with
+status 1.
+
+Usage:
+    python benchmarks/bench_suite.py [--scales 1,10] [--seasons 8] [--dbt-cmd dbt] [--skip-dbt]
+                                     [--output results.json] [--baseline previous.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shlex
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ETL_DIR = os.path.join(ROOT, "etl")
+sys.path.insert(0, ETL_DIR)
+
+from pipeline import Stage, run_command
+from synthetic_data import generate
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+PROFILE = """\
+footbase:
+  target: sqlite
+  outputs:
+    sqlite:
+      type: sqlite
+      threads: 1
+      database: database
+      schema: main
+      schemas_and_paths:
+        main: "{sqlite_path}"
+      schema_directory: "{scratch}"
+"""
+
+
+def stages(tmp, dbt_cmd=None):
+    """The timed stages, with every path inside the scratch directory `tmp`."""
+    raw_dir = os.path.join(tmp, "raw")
+    db_path = os.path.join(tmp, "footbase.db")
+    understat_raw = os.path.join(raw_dir, "understat_xg_data.csv")
+    understat_clean = os.path.join(raw_dir, "understat_xg_data_clean.csv")
+    python = sys.executable
+    timed = [
+        Stage('ingest', [python, 'ingestion_script.py', '--db-path', db_path, '--csv-dir', raw_dir],
+              output_tables=['matches']),
+        Stage('understat_clean', [python, 'understat_cleaner.py',
+                                  '--raw-csv', understat_raw, '--clean-csv', understat_clean],
+              output_files=[understat_clean]),
+        Stage('xg_merge', [python, 'merge_script.py', '--in-place',
+                           '--db-path', db_path, '--understat-csv', understat_clean],
+              output_tables=['matches']),
+    ]
+    if dbt_cmd:
+        # Artifacts and logs go to the scratch directory too, so the run
+        # leaves target/ and logs/ of the project untouched
+        timed.append(Stage('dbt', shlex.split(dbt_cmd) + ['build', '--full-refresh', '--profiles-dir', tmp,
+                                                          '--target-path', os.path.join(tmp, 'target'),
+                                                          '--log-path', os.path.join(tmp, 'logs')],
+                           output_tables=['fct_matches'], cwd=ROOT))
+    return timed
+
+
+def output_rows(stage, db_path):
+    """Rows the stage produced: table rows (xG-matched rows for the merge) or CSV data lines."""
+    if stage.name == 'xg_merge':
+        sql = "SELECT count(*) FROM matches WHERE home_xg IS NOT NULL"
+    elif stage.output_tables:
+        sql = f"SELECT count(*) FROM {stage.output_tables[0]}"
+    else:
+        with open(stage.output_files[0], 'rb') as f:
+            return sum(1 for _ in f) - 1
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def run_scale(scale, seasons, seed, dbt_cmd, scratch_dir):
+    """Generate one scale and time every stage on it. Returns one result dict per stage."""
+    results = []
+    with tempfile.TemporaryDirectory(dir=scratch_dir) as tmp:
+        start = time.perf_counter()
+        fixtures = generate(os.path.join(tmp, "raw"), scale, seasons, seed)
+        print(f"\n  scale {scale}: {fixtures:,} fixtures generated ({time.perf_counter() - start:.1f}s)")
+        with open(os.path.join(tmp, "profiles.yml"), "w") as f:
+            f.write(PROFILE.format(sqlite_path=os.path.join(tmp, "footbase.db").replace(os.sep, "/"),
+                                   scratch=tmp.replace(os.sep, "/")))
+
+        for stage in stages(tmp, dbt_cmd):
+            log_dir = os.path.join(tmp, "logs")
+            start = time.perf_counter()
+            exit_code, peak_rss_mb = run_command(stage, log_dir)
+            seconds = time.perf_counter() - start
+            if exit_code:
+                with open(os.path.join(log_dir, f"{stage.name}.log")) as log:
+                    tail = log.read()[-2000:]
+                raise RuntimeError(f"{stage.name} failed at scale {scale} (exit {exit_code}):\n{tail}")
+            rows = output_rows(stage, os.path.join(tmp, "footbase.db"))
+            results.append({
+                'scale': scale, 'fixtures': fixtures, 'stage': stage.name,
+                'seconds': round(seconds, 4), 'rows': rows,
+                'peak_rss_mb': None if peak_rss_mb is None else round(peak_rss_mb, 1),
+                'rows_per_second': round(rows / seconds),
+            })
+            memory = "     n/a" if peak_rss_mb is None else f"{peak_rss_mb:8.0f}"
+            print(f"    {stage.name:16s} {seconds:8.2f}s {memory} MB {rows:>11,} rows "
+                  f"{rows / seconds:>11,.0f} rows/s")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold, min_seconds):
+    """(scale, stage, old seconds, new seconds) for every stage that got slower beyond the thresholds."""
+    before = {(r['scale'], r['stage']): r['seconds'] for r in baseline['results']}
+    regressions = []
+    print(f"\n  {'scale':>5}  {'stage':16s} {'baseline':>9s} {'now':>9s} {'change':>8s}")
+    for r in results:
+        old = before.get((r['scale'], r['stage']))
+        if old is None:
+            continue
+        new = r['seconds']
+        slower = new > old * (1 + threshold) and new - old >= min_seconds
+        if slower:
+            regressions.append((r['scale'], r['stage'], old, new))
+        print(f"  {r['scale']:>5}  {r['stage']:16s} {old:9.2f} {new:9.2f} {(new / old - 1):+8.1%}"
+              f"{'  ✗ regression' if slower else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="1,10", help="comma-separated scales (divisions per league)")
+    parser.add_argument("--seasons", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dbt-cmd", default="dbt", help="dbt executable (default: dbt)")
+    parser.add_argument("--skip-dbt", action="store_true")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/suite_<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative slowdown flagged as a regression")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    parser.add_argument("--scratch-dir", default=os.path.join(ROOT, "db"),
+                        help="where synthetic data and databases are written")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",")]
+    dbt_cmd = None if args.skip_dbt else args.dbt_cmd
+    print(f"Suite: scales {scales}, {args.seasons} seasons, seed {args.seed}")
+
+    results = []
+    for scale in scales:
+        results += run_scale(scale, args.seasons, args.seed, dbt_cmd, args.scratch_dir)
+
+    created_at = datetime.now()
+    report = {
+        'created_at': created_at.isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {'scales': scales, 'seasons': args.seasons, 'seed': args.seed, 'dbt': dbt_cmd is not None},
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"suite_{created_at:%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_seconds)
+        if regressions:
+            sys.exit(f"✗ {len(regressions)} stage(s) regressed against {args.baseline}")
+        print("✓ No regressions")
+
+
+if __name__ == "__main__":
+    main()
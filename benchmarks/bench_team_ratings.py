@@ -0,0 +1,148 @@
+"""
+Benchmark - Team ratings
+=========================
+Checks and times etl/team_ratings.py over the full fct_matches history:
+
+  1. the batched engine (rate) against the match-by-match reference
+     (rate_reference in tests/python/test_team_ratings.py). Both must give
+     the same ratings
+  2. `update_ratings(full_refresh=True)` rebuilds fct_team_ratings (snapshot A)
+  3. the newest --rewind-batches batches are deleted from fct_team_ratings,
+     as if those matchdays had not been rated yet
+  4. an incremental `update_ratings` restores the checkpoint and catches up
+     (snapshot B). A and B must be identical
+  5. on a second copy, a score in the oldest season is corrected and
+     flagged in changed_partitions. An incremental run must re-rate from
+     that season and match a full refresh
+
+Run from the project root against a database that already holds fct_matches
+(`dbt build`). Every step runs on a scratch copy; --db is only read.
+
+Usage:
+    python benchmarks/bench_team_ratings.py [--repeat 3] [--rewind-batches 5] [--scratch-dir db]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+sys.path.insert(0, os.path.join(ROOT, "tests", "python"))
+
+from change_capture import PARTITIONS_TABLE, ensure_change_schema, utc_now
+from db_loader import connect, copy_database
+from team_ratings import TABLE, load_matches, rate, update_ratings
+from test_team_ratings import rate_reference
+
+DB_PATH = os.path.join(ROOT, "db", "footbase_big5.db")
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def snapshot(conn):
+    df = pd.read_sql_query(f"SELECT * FROM {TABLE}", conn).drop(columns='_created_at')
+    return df.sort_values(["team_id", "match_id"], ignore_index=True)
+
+
+def rewind(conn, batches):
+    """Delete the newest `batches` rating batches. Returns rows removed."""
+    with conn:
+        cursor = conn.execute(f"""
+            DELETE FROM {TABLE} WHERE rating_batch IN (
+                SELECT DISTINCT rating_batch FROM {TABLE} ORDER BY rating_batch DESC LIMIT ?
+            )
+        """, (batches,))
+    return cursor.rowcount
+
+
+def correct_oldest_match(conn):
+    """
+    Add two home goals to the first match of the oldest season in
+    fct_matches, and flag its partitions as change_capture.py would.
+    Returns the corrected season.
+    """
+    match_id, competition_id, season, home, away = conn.execute(
+        "SELECT match_id, competition_id, season, home_team_id, away_team_id FROM fct_matches "
+        "ORDER BY season, match_date, match_id LIMIT 1"
+    ).fetchone()
+    ensure_change_schema(conn)
+    with conn:
+        conn.execute("UPDATE fct_matches SET home_goals = home_goals + 2 WHERE match_id = ?", (match_id,))
+        conn.executemany(
+            f"INSERT INTO {PARTITIONS_TABLE} (run_id, source, competition_id, season, team_id, changed_rows, changed_at) "
+            f"VALUES ('bench', 'football_data', ?, ?, ?, 1, ?)",
+            [(competition_id, season, team, utc_now()) for team in (home, away)],
+        )
+    return season
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--rewind-batches", type=int, default=5)
+    parser.add_argument("--scratch-dir", default=os.path.join(ROOT, "db"),
+                        help="where the scratch copies of the database are written")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.scratch_dir) as tmp:
+        db_path = os.path.join(tmp, "footbase.db")
+        copy_database(args.db, db_path)
+        conn = connect(db_path)
+        matches = load_matches(conn)
+        print(f"Input: fct_matches ({len(matches):,} matches, "
+              f"{matches['rating_batch'].nunique():,} batches)")
+
+        reference_s, reference = best_of(lambda: rate_reference(matches), args.repeat)
+        batched_s, (batched, _) = best_of(lambda: rate(matches), args.repeat)
+        pd.testing.assert_frame_equal(reference, batched, check_exact=False, rtol=1e-9)
+        print("  ✓ Batched ratings identical to the match-by-match reference")
+
+        full_s, _ = best_of(lambda: update_ratings(conn, full_refresh=True), 1)
+        full = snapshot(conn)
+
+        removed = rewind(conn, args.rewind_batches)
+        print(f"  ℹ Rewound {removed // 2:,} matches ({args.rewind_batches} batches)")
+        incr_s, rated = best_of(lambda: update_ratings(conn), 1)
+        incremental = snapshot(conn)
+        noop_s, _ = best_of(lambda: update_ratings(conn), 1)
+        conn.close()
+
+        pd.testing.assert_frame_equal(full, incremental, check_exact=False, rtol=1e-9)
+        print(f"  ✓ Incremental catch-up ({rated:,} matches) identical to --full-refresh")
+
+        corrected_path = os.path.join(tmp, "corrected.db")
+        copy_database(db_path, corrected_path)
+        scratch = connect(corrected_path)
+        season = correct_oldest_match(scratch)
+        corrected_s, rerated = best_of(lambda: update_ratings(scratch), 1)
+        corrected = snapshot(scratch)
+        update_ratings(scratch, full_refresh=True)
+        refreshed = snapshot(scratch)
+        scratch.close()
+    pd.testing.assert_frame_equal(refreshed, corrected, check_exact=False, rtol=1e-9)
+    assert rerated and not corrected.equals(full), "the corrected season was not re-rated"
+    print(f"  ✓ Incremental run after a correction in {season} ({rerated:,} matches) identical to --full-refresh")
+
+    print(f"  reference loop    : {reference_s * 1000:8.1f} ms")
+    print(f"  batched           : {batched_s * 1000:8.1f} ms  ({reference_s / batched_s:.1f}x faster)")
+    print(f"  full refresh (db) : {full_s * 1000:8.1f} ms")
+    print(f"  incremental (db)  : {incr_s * 1000:8.1f} ms")
+    print(f"  incremental no-op : {noop_s * 1000:8.1f} ms")
+    print(f"  after correction  : {corrected_s * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark - Understat cleaner
+==============================
+Times the original ast.literal_eval cleaner against the vectorized one on
+the bundled data/raw/understat_xg_data.csv and checks that both produce
+identical frames. The literal_eval reference and check_equivalence live in
+tests/python/test_understat_cleaner.py, which runs the same check on a
+fixed sample.
+
+Usage:
+    python benchmarks/bench_understat_cleaner.py [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+sys.path.insert(0, os.path.join(ROOT, "tests", "python"))
+
+from understat_cleaner import clean_understat
+from test_understat_cleaner import check_equivalence, clean_understat_literal_eval
+
+RAW_CSV = os.path.join(ROOT, "data", "raw", "understat_xg_data.csv")
+
+
+def best_of(fn, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    raw = pd.read_csv(RAW_CSV)
+    print(f"Input: {os.path.relpath(RAW_CSV, ROOT)} ({len(raw):,} rows)")
+
+    legacy_s, _ = best_of(clean_understat_literal_eval, raw, args.repeat)
+    vector_s, _ = best_of(clean_understat, raw, args.repeat)
+
+    # Equivalence on the bundled CSV, and with the flat layout the scraper now writes
+    check_equivalence(raw)
+    print("  ✓ Outputs identical (nested and flat input)")
+
+    print(f"  literal_eval : {legacy_s * 1000:8.1f} ms")
+    print(f"  vectorized   : {vector_s * 1000:8.1f} ms  ({legacy_s / vector_s:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
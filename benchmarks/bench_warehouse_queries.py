@@ -0,0 +1,112 @@
+"""
+Benchmark - Warehouse queries
+==============================
+Runs every statement in sql/Test_Queries.sql against two copies of the
+warehouse: one with all explicit indexes dropped ("before") and the built
+database as-is ("after", with the ETL match_key index and the dbt
+post-hook / on-run-start indexes). Prints EXPLAIN QUERY PLAN for both and
+the best-of-N timing of each query.
+
+Build the warehouse first (ETL scripts, then `dbt build`).
+
+Usage:
+    python benchmarks/bench_warehouse_queries.py [--repeat 5] [--scratch-dir db]
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(ROOT, "db", "footbase_big5.db")
+QUERIES = os.path.join(ROOT, "sql", "Test_Queries.sql")
+
+
+def read_queries(path):
+    """Split the file on ';' and drop comment-only chunks. Returns [(title, sql)]."""
+    with open(path, encoding="utf-8") as f:
+        chunks = f.read().split(";")
+    queries = []
+    for chunk in chunks:
+        lines = [line for line in chunk.strip().splitlines() if line.strip()]
+        comments = [line.strip("- ").strip() for line in lines if line.lstrip().startswith("--")]
+        body = [line for line in lines if not line.lstrip().startswith("--")]
+        if body:
+            title = comments[-1] if comments else " ".join(body[:4])[:70]
+            queries.append((title, "\n".join(body)))
+    return queries
+
+
+def drop_indexes(conn):
+    names = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+    )]
+    for name in names:
+        conn.execute(f"DROP INDEX {name}")
+    conn.commit()
+    return names
+
+
+def plan(conn, sql):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def best_of(conn, sql, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--queries", default=QUERIES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scratch-dir", default=os.path.join(ROOT, "db"),
+                        help="where the index-free copy is written")
+    args = parser.parse_args()
+
+    queries = read_queries(args.queries)
+    with tempfile.TemporaryDirectory(dir=args.scratch_dir) as tmp:
+        before_path = os.path.join(tmp, "before.db")
+        shutil.copy(args.db, before_path)
+        before = sqlite3.connect(before_path)
+        dropped = drop_indexes(before)
+        after = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+
+        print(f"Queries: {os.path.relpath(args.queries, ROOT)} ({len(queries)} statements)")
+        print(f"  ℹ 'before' copy without {len(dropped)} indexes: {', '.join(dropped)}")
+
+        total_before = total_after = 0.0
+        for i, (title, sql) in enumerate(queries, 1):
+            try:
+                before_s = best_of(before, sql, args.repeat)
+                after_s = best_of(after, sql, args.repeat)
+            except sqlite3.OperationalError as e:
+                print(f"\n[{i}] {title}\n  ⚠ Skipped: {e}")
+                continue
+            total_before += before_s
+            total_after += after_s
+
+            print(f"\n[{i}] {title}")
+            for label, conn in (("before", before), ("after ", after)):
+                for line in plan(conn, sql):
+                    print(f"  {label} │ {line}")
+            print(f"  {before_s * 1000:8.2f} ms → {after_s * 1000:8.2f} ms"
+                  f"  ({before_s / after_s:.1f}x)")
+
+        before.close()
+        after.close()
+
+    print(f"\nTotal: {total_before * 1000:.1f} ms → {total_after * 1000:.1f} ms"
+          f" ({total_before / total_after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
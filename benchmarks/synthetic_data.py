@@ -0,0 +1,232 @@
+"""
+Benchmark - Synthetic raw data
+===============================
+Writes a raw data drop shaped like the real one, at any scale, for the
+benchmarks:
+
+  <out>/<League>/<League>_<season>_synthetic.csv   football-data.co.uk rows, one
+                                                   file per league season
+  <out>/understat_xg_data.csv                      the Understat export for the
+                                                   same fixtures (nested dict
+                                                   columns, like the bundled file)
+
+Scale N gives each of the five leagues N divisions, all in the league's
+files, so every (league, season) still has one source file for the raw
+catalog. Teams are named "<league> D<division> Club <n>". Both sources use
+the same names, so the xG merge matches every fixture on its exact key.
+--seasons sets the number of seasons, counted back from 2024/25.
+
+Each division plays a double round robin (20 teams, 18 in the Bundesliga),
+one round a week from mid-August. Goals are Poisson, driven by per-team
+attack and defence strengths. The same strengths drive the xG, the
+Understat forecast and the B365 odds (with a 5% overround), so the generated
+data has the same shape as the real data. The output is deterministic for a
+given --seed.
+
+Usage:
+    python benchmarks/synthetic_data.py OUT_DIR [--scale 1] [--seasons 8] [--seed 0]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Raw folder, Football-Data label, Understat code, teams per division
+LEAGUES = [
+    ("Premier_League", "Premier League", "EPL", 20),
+    ("La_Liga", "La Liga", "La_Liga", 20),
+    ("Bundesliga", "Bundesliga", "Bundesliga", 18),
+    ("Serie_A", "Serie A", "Serie_A", 20),
+    ("Ligue_1", "Ligue 1", "Ligue_1", 20),
+]
+
+LAST_SEASON = 2024
+GOALS_BASE = np.log(1.35)
+HOME_ADVANTAGE = 0.2
+MARGIN = 0.05
+MAX_GOALS = 10    # Poisson outcome probabilities are summed up to this score, then normalised
+
+FD_COLUMNS = [
+    'date', 'home_team', 'away_team', 'home_goals', 'away_goals', 'result',
+    'home_shots', 'away_shots', 'home_shots_on_target', 'away_shots_on_target',
+    'odds_home', 'odds_draw', 'odds_away', 'league', 'season'
+]
+
+
+def round_robin(teams):
+    """(rounds, matches, 2) array of (home, away) indices for a double round robin (circle method)."""
+    order = list(range(teams))
+    first_half = []
+    for r in range(teams - 1):
+        pairs = [(order[i], order[teams - 1 - i]) for i in range(teams // 2)]
+        # Alternate venues so no team is at home every week
+        first_half.append([(a, b) if (r + i) % 2 == 0 else (b, a) for i, (a, b) in enumerate(pairs)])
+        order = [order[0], order[-1], *order[1:-1]]
+    schedule = np.array(first_half)
+    return np.concatenate([schedule, schedule[:, :, ::-1]])
+
+
+def outcome_probabilities(home_rate, away_rate):
+    """P(home win), P(draw), P(away win) for independent Poisson scores."""
+    goals = np.arange(MAX_GOALS + 1)
+    log_factorial = np.cumsum(np.log(np.maximum(goals, 1)))
+    home = np.exp(goals * np.log(home_rate[:, None]) - home_rate[:, None] - log_factorial)
+    away = np.exp(goals * np.log(away_rate[:, None]) - away_rate[:, None] - log_factorial)
+    joint = home[:, :, None] * away[:, None, :]     # [match, home goals, away goals]
+    home_win = np.tril(joint, -1).sum(axis=(1, 2))
+    draw = np.trace(joint, axis1=1, axis2=2)
+    away_win = np.triu(joint, 1).sum(axis=(1, 2))
+    total = home_win + draw + away_win      # < 1 when a side is likely to pass MAX_GOALS
+    return home_win / total, draw / total, away_win / total
+
+
+def decimal_odds(probability):
+    """
+    Odds with MARGIN spread over the three outcomes in proportion to
+    1 - probability, so a heavy favourite still prices above 1.00. Rounded
+    down to 2 decimals, as bookmakers do, which only adds margin.
+    """
+    implied = probability + MARGIN * (1 - probability) / 2
+    return np.maximum(np.floor(100 / implied) / 100, 1.01)
+
+
+def season_fixtures(rng, teams, divisions, season):
+    """One league season: every division's fixtures with scores, xG, odds and forecast."""
+    schedule = round_robin(teams)
+    rounds, per_round = schedule.shape[:2]
+    attack = rng.normal(0, 0.25, (divisions, teams))
+    defence = rng.normal(0, 0.2, (divisions, teams))
+
+    division = np.repeat(np.arange(divisions), rounds * per_round)
+    home = np.tile(schedule[:, :, 0].ravel(), divisions)
+    away = np.tile(schedule[:, :, 1].ravel(), divisions)
+    round_no = np.tile(np.repeat(np.arange(rounds), per_round), divisions)
+    # Rounds spread over three days of each week, with a winter break after round 17
+    day = round_no * 7 + np.where(round_no >= 17, 21, 0) + rng.integers(0, 3, len(home))
+    date = pd.Timestamp(season, 8, 12) + pd.to_timedelta(day, unit='D')
+
+    home_rate = np.exp(GOALS_BASE + HOME_ADVANTAGE + attack[division, home] - defence[division, away])
+    away_rate = np.exp(GOALS_BASE + attack[division, away] - defence[division, home])
+    home_goals = rng.poisson(home_rate)
+    away_goals = rng.poisson(away_rate)
+    # xG scatters around the chances the strengths predict, nudged by the actual goals
+    home_xg = np.round(rng.gamma(4, (home_rate + home_goals) / 8), 5)
+    away_xg = np.round(rng.gamma(4, (away_rate + away_goals) / 8), 5)
+    home_shots = rng.poisson(home_rate * 7 + 4)
+    away_shots = rng.poisson(away_rate * 7 + 4)
+
+    p_home, p_draw, p_away = outcome_probabilities(home_rate, away_rate)
+    f_home, f_draw, f_away = outcome_probabilities(np.maximum(home_xg, 0.05), np.maximum(away_xg, 0.05))
+
+    return pd.DataFrame({
+        'datetime': date,
+        'division': division,
+        'home': home,
+        'away': away,
+        'home_goals': home_goals,
+        'away_goals': away_goals,
+        'home_shots': home_shots,
+        'away_shots': away_shots,
+        'home_shots_on_target': rng.binomial(home_shots, 0.35),
+        'away_shots_on_target': rng.binomial(away_shots, 0.35),
+        'odds_home': decimal_odds(p_home),
+        'odds_draw': decimal_odds(p_draw),
+        'odds_away': decimal_odds(p_away),
+        'home_xg': home_xg,
+        'away_xg': away_xg,
+        'forecast_home': np.round(f_home, 4),
+        'forecast_draw': np.round(f_draw, 4),
+        'forecast_away': np.round(f_away, 4),
+    })
+
+
+def team_names(label, divisions, teams):
+    """(divisions, teams) array of team names for one league."""
+    return np.array([[f"{label} D{d:03d} Club {t:02d}" for t in range(teams)] for d in range(divisions)])
+
+
+def football_data_rows(df, names, label, season):
+    return pd.DataFrame({
+        'date': df['datetime'].dt.strftime('%d/%m/%Y'),
+        'home_team': names[df['division'], df['home']],
+        'away_team': names[df['division'], df['away']],
+        'home_goals': df['home_goals'],
+        'away_goals': df['away_goals'],
+        'result': np.select([df['home_goals'] > df['away_goals'], df['home_goals'] == df['away_goals']],
+                            ['H', 'D'], 'A'),
+        'home_shots': df['home_shots'],
+        'away_shots': df['away_shots'],
+        'home_shots_on_target': df['home_shots_on_target'],
+        'away_shots_on_target': df['away_shots_on_target'],
+        'odds_home': df['odds_home'],
+        'odds_draw': df['odds_draw'],
+        'odds_away': df['odds_away'],
+        'league': label,
+        'season': f"{season}/{str(season + 1)[-2:]}",
+    })[FD_COLUMNS]
+
+
+def understat_rows(df, names, code, season, first_id):
+    """Raw Understat export rows, with h/a/goals/xG/forecast as stringified dicts."""
+    def team(side):
+        ids = (df['division'] * 100 + df[side] + 1).astype(str)
+        titles = pd.Series(names[df['division'], df[side]], index=df.index)
+        return "{'id': '" + ids + "', 'title': '" + titles + "', 'short_title': 'S" + ids + "'}"
+
+    def pair(h, a):
+        return "{'h': '" + df[h].astype(str) + "', 'a': '" + df[a].astype(str) + "'}"
+
+    forecast = ("{'w': '" + df['forecast_home'].astype(str) + "', 'd': '" + df['forecast_draw'].astype(str)
+                + "', 'l': '" + df['forecast_away'].astype(str) + "'}")
+    kickoff = df['datetime'] + pd.to_timedelta(15, unit='h')
+    return pd.DataFrame({
+        'id': np.arange(first_id, first_id + len(df)),
+        'isResult': True,
+        'h': team('home'),
+        'a': team('away'),
+        'goals': pair('home_goals', 'away_goals'),
+        'xG': pair('home_xg', 'away_xg'),
+        'datetime': kickoff.dt.strftime('%Y-%m-%d %H:%M:%S'),
+        'forecast': forecast,
+        'league': code,
+        'season': season,
+    })
+
+
+def generate(out_dir, scale=1, seasons=8, seed=0):
+    """Write a synthetic raw drop under `out_dir`. Returns the number of fixtures."""
+    rng = np.random.default_rng(seed)
+    understat_path = os.path.join(out_dir, "understat_xg_data.csv")
+    fixtures = 0
+    for folder, label, code, teams in LEAGUES:
+        os.makedirs(os.path.join(out_dir, folder), exist_ok=True)
+        names = team_names(label, scale, teams)
+        for season in range(LAST_SEASON - seasons + 1, LAST_SEASON + 1):
+            df = season_fixtures(rng, teams, scale, season)
+            path = os.path.join(out_dir, folder, f"{folder}_{season}_synthetic.csv")
+            football_data_rows(df, names, label, season).to_csv(path, index=False)
+            understat_rows(df, names, code, season, first_id=fixtures + 1).to_csv(
+                understat_path, mode='a' if fixtures else 'w', header=not fixtures, index=False
+            )
+            fixtures += len(df)
+    return fixtures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("out_dir")
+    parser.add_argument("--scale", type=int, default=1, help="divisions per league")
+    parser.add_argument("--seasons", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    fixtures = generate(args.out_dir, args.scale, args.seasons, args.seed)
+    print(f"✓ {fixtures:,} fixtures written to {args.out_dir} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Football Data Warehouse - Change Data Capture
+==============================================
+Keeps a history of late corrections: scores, shots and odds fixed on
+football-data.co.uk, and xG and forecasts revised by Understat. A full
+re-ingest or the merge script's table replace no longer loses them.
+
+After each load, capture_changes() hashes the mutable columns of every
+fixture with pandas' hash_pandas_object, CHUNKSIZE rows at a time, into a
+temp table. SQLite then compares the hashes with the current versions in
+`match_history` and writes the changes, so memory stays bounded by the chunk
+size as it does for ingestion --stream. Each source owns
+its own columns, and ingestion and the merge capture separately:
+
+  football_data   goals, result, shots, odds      (ingestion_script.py)
+  understat       xG and the xG forecast          (merge_script.py)
+
+so a full reload, which brings back matches without xG until the merge
+runs, does not look like a change to every row. A source whose columns are
+not in `matches` at all is skipped.
+
+Changed rows only are written, as type-2 versions. A new version closes the
+previous one (valid_to). A fixture that disappeared, usually a date
+correction that changed its match_key, gets a 'delete' tombstone. Every
+changed fixture also adds its two (competition_id, season, team_id)
+partitions to `changed_partitions`. The incremental dbt marts rebuild those
+partitions on top of the latest season (macros/change_capture.sql). The first
+capture of a source records a baseline and flags no partitions.
+team_ratings.py and league_standings.py read the same partitions through
+changed_since().
+
+Usage:
+    python change_capture.py   # capture both sources now
+"""
+
+import argparse
+import time
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from db_loader import connect, frame_rows
+
+DB_PATH = "../db/footbase_big5.db"
+
+HISTORY_TABLE = "match_history"
+PARTITIONS_TABLE = "changed_partitions"
+
+# Mutable columns per source; everything else about a fixture is its key
+SOURCE_COLUMNS = {
+    'football_data': ['home_goals', 'away_goals', 'result', 'home_shots', 'away_shots',
+                      'home_shots_on_target', 'away_shots_on_target', 'odds_home', 'odds_draw', 'odds_away'],
+    'understat': ['home_xg', 'away_xg', 'forecast_home', 'forecast_draw', 'forecast_away'],
+}
+MUTABLE_COLUMNS = [col for columns in SOURCE_COLUMNS.values() for col in columns]
+TEXT_COLUMNS = {'result'}
+
+KEY_COLUMNS = ['match_key', 'league', 'season', 'date', 'home_team', 'away_team']
+
+# Rows hashed per chunk; raw_catalog.STREAM_CHUNKSIZE, as ingestion --stream reads
+CHUNKSIZE = 50_000
+
+HISTORY_DDL = f"""
+CREATE TABLE IF NOT EXISTS {HISTORY_TABLE} (
+    match_key INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    league TEXT,
+    season TEXT,
+    date TEXT,
+    home_team TEXT,
+    away_team TEXT,
+    row_hash INTEGER,
+    {', '.join(f"{col} {'TEXT' if col in TEXT_COLUMNS else 'REAL'}" for col in MUTABLE_COLUMNS)},
+    change TEXT NOT NULL,
+    valid_from TEXT NOT NULL,
+    valid_to TEXT,
+    run_id TEXT NOT NULL
+);
+"""
+
+PARTITIONS_DDL = f"""
+CREATE TABLE IF NOT EXISTS {PARTITIONS_TABLE} (
+    run_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    competition_id TEXT NOT NULL,
+    season TEXT NOT NULL,
+    team_id TEXT NOT NULL,
+    changed_rows INTEGER NOT NULL,
+    changed_at TEXT NOT NULL
+);
+"""
+
+INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS ix_{HISTORY_TABLE}_current ON {HISTORY_TABLE} (source, match_key) "
+    f"WHERE valid_to IS NULL",
+    f"CREATE INDEX IF NOT EXISTS ix_{HISTORY_TABLE}_key ON {HISTORY_TABLE} (match_key, valid_from)",
+    f"CREATE INDEX IF NOT EXISTS ix_{PARTITIONS_TABLE}_changed_at ON {PARTITIONS_TABLE} (changed_at)",
+]
+
+# Mart keys derived exactly as fct_matches does, so the marts can match them
+_IDS = """
+    lower(replace(league, ' ', '_')) AS competition_id,
+    lower(replace(home_team, ' ', '_')) AS home_team_id,
+    lower(replace(away_team, ' ', '_')) AS away_team_id
+"""
+
+
+def ensure_change_schema(conn):
+    with conn:
+        conn.execute(HISTORY_DDL)
+        conn.execute(PARTITIONS_DDL)
+        for index in INDEXES:
+            conn.execute(index)
+
+
+def row_hashes(df, columns):
+    """
+    64-bit hash of `columns` per row, as signed integers for SQLite. Numbers
+    are hashed as float64, so 2 and 2.0 (an INTEGER column read with and
+    without NULLs) hash alike.
+    """
+    values = pd.DataFrame({
+        col: df[col].astype(object) if col in TEXT_COLUMNS else df[col].astype('float64')
+        for col in columns
+    })
+    return pd.util.hash_pandas_object(values, index=False).to_numpy().view(np.int64)
+
+
+def utc_now():
+    """UTC 'YYYY-MM-DD HH:MM:SS', the format of the marts' _created_at."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _stage_hashes(conn, source, columns, chunksize):
+    """
+    Hash the `source` columns of `matches` chunk by chunk into the temp table
+    _capture (matches rowid, match_key, row_hash). A fixture without any of
+    the source's values (no xG yet) has no version and is left out.
+    """
+    conn.execute("DROP TABLE IF EXISTS temp._capture")
+    conn.execute("CREATE TEMP TABLE _capture (match_rowid INTEGER PRIMARY KEY, match_key INTEGER, row_hash INTEGER)")
+    present = ' OR '.join(f"{col} IS NOT NULL" for col in columns)
+    chunks = pd.read_sql_query(f"SELECT rowid AS match_rowid, match_key, {', '.join(columns)} FROM matches "
+                               f"WHERE {present}", conn, chunksize=chunksize)
+    for chunk in chunks:
+        chunk['row_hash'] = row_hashes(chunk, columns)
+        conn.executemany("INSERT INTO _capture VALUES (?, ?, ?)",
+                         frame_rows(chunk, ['match_rowid', 'match_key', 'row_hash']))
+    conn.execute("CREATE INDEX temp.ix_capture_key ON _capture (match_key)")
+
+
+def _stage_changes(conn, source):
+    """
+    Compare _capture with the current versions of `source`, in SQLite:
+    _changed holds the new and changed fixtures (with the version they
+    replace), _deleted the current versions of fixtures no longer present.
+    """
+    current = f"SELECT rowid AS version_id, * FROM {HISTORY_TABLE} WHERE source = ? AND valid_to IS NULL"
+    for table in ('_changed', '_deleted'):
+        conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+    conn.execute(f"""
+        CREATE TEMP TABLE _changed AS
+        SELECT c.match_rowid, c.row_hash, v.version_id,
+               CASE WHEN v.version_id IS NULL THEN 'insert' ELSE 'update' END AS change
+        FROM _capture c
+        LEFT JOIN ({current}) v ON v.match_key = c.match_key
+        WHERE v.version_id IS NULL OR v.row_hash IS NOT c.row_hash
+    """, (source,))
+    conn.execute(f"""
+        CREATE TEMP TABLE _deleted AS
+        SELECT v.* FROM ({current}) v
+        WHERE NOT EXISTS (SELECT 1 FROM _capture c WHERE c.match_key = v.match_key)
+    """, (source,))
+
+
+def _partitions_sql():
+    """(competition_id, season, team_id, changed_rows) for the two sides of every changed fixture."""
+    fixtures = f"""
+        SELECT {_IDS}, season FROM matches m JOIN _changed c ON c.match_rowid = m.rowid
+        UNION ALL
+        SELECT {_IDS}, season FROM _deleted
+    """
+    return f"""
+        WITH fixtures AS ({fixtures}),
+        sides AS (
+            SELECT competition_id, season, home_team_id AS team_id FROM fixtures
+            UNION ALL
+            SELECT competition_id, season, away_team_id FROM fixtures
+        )
+        SELECT competition_id, season, team_id, COUNT(*) AS changed_rows
+        FROM sides GROUP BY competition_id, season, team_id
+    """
+
+
+def capture_changes(conn, source, chunksize=CHUNKSIZE):
+    """
+    Record the fixtures whose `source` columns changed since the last
+    capture. Returns {'inserted', 'updated', 'deleted', 'partitions',
+    'baseline', 'run_id'}, or None when `matches` does not have the source's
+    columns (xG after a full reload, before the merge).
+    """
+    ensure_change_schema(conn)
+    columns = SOURCE_COLUMNS[source]
+    present = {row[1] for row in conn.execute("PRAGMA table_info(matches)")}
+    if not set(columns) <= present:
+        return None
+
+    run_id = uuid.uuid4().hex[:12]
+    now = utc_now()
+    history_columns = ['match_key', 'source', 'league', 'season', 'date', 'home_team', 'away_team',
+                       'row_hash', *columns, 'change', 'valid_from', 'valid_to', 'run_id']
+    tombstone_columns = [col for col in history_columns if col not in columns]
+    version_values = [f"m.{col}" for col in KEY_COLUMNS + columns]
+
+    # One transaction, so a version is never closed without its successor
+    with conn:
+        _stage_hashes(conn, source, columns, chunksize)
+        _stage_changes(conn, source)
+        baseline = conn.execute(f"SELECT 1 FROM {HISTORY_TABLE} WHERE source = ? AND valid_to IS NULL LIMIT 1",
+                                (source,)).fetchone() is None
+        changes = dict(conn.execute("SELECT change, count(*) FROM _changed GROUP BY change").fetchall())
+        deleted = conn.execute("SELECT count(*) FROM _deleted").fetchone()[0]
+
+        partitions = 0
+        if not baseline:
+            partitions = conn.execute(f"""
+                INSERT INTO {PARTITIONS_TABLE} (competition_id, season, team_id, changed_rows, run_id, source, changed_at)
+                SELECT *, ?, ?, ? FROM ({_partitions_sql()})
+            """, (run_id, source, now)).rowcount
+
+        conn.execute(f"""
+            UPDATE {HISTORY_TABLE} SET valid_to = ?
+            WHERE rowid IN (SELECT version_id FROM _changed WHERE version_id IS NOT NULL
+                            UNION ALL SELECT version_id FROM _deleted)
+        """, (now,))
+        conn.execute(f"""
+            INSERT INTO {HISTORY_TABLE} ({', '.join(history_columns)})
+            SELECT {version_values[0]}, ?, {', '.join(version_values[1:6])}, c.row_hash,
+                   {', '.join(version_values[6:])}, c.change, ?, NULL, ?
+            FROM _changed c JOIN matches m ON m.rowid = c.match_rowid
+        """, (source, now, run_id))
+        conn.execute(f"""
+            INSERT INTO {HISTORY_TABLE} ({', '.join(tombstone_columns)})
+            SELECT match_key, ?, league, season, date, home_team, away_team, NULL, 'delete', ?, ?, ?
+            FROM _deleted
+        """, (source, now, now, run_id))
+        for table in ('_capture', '_changed', '_deleted'):
+            conn.execute(f"DROP TABLE temp.{table}")
+
+    return {'inserted': changes.get('insert', 0), 'updated': changes.get('update', 0), 'deleted': deleted,
+            'partitions': partitions, 'baseline': baseline, 'run_id': run_id}
+
+
+def changed_since(conn, table, columns=('competition_id', 'season')):
+    """
+    Distinct `columns` of the partitions flagged since `table` was last built
+    (its max _created_at), as tuples: macros/change_capture.sql for the
+    marts built in Python (team_ratings.py, league_standings.py). Empty until
+    change capture has run.
+    """
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if PARTITIONS_TABLE not in tables or table not in tables:
+        return []
+    return conn.execute(f"""
+        SELECT DISTINCT {', '.join(columns)} FROM {PARTITIONS_TABLE}
+        WHERE changed_at >= (SELECT max(_created_at) FROM {table})
+        ORDER BY {', '.join(columns)}
+    """).fetchall()
+
+
+def print_capture(source, summary):
+    if summary is None:
+        print(f"  · Changes not captured ({source}): its columns are not loaded yet")
+        return
+    note = " (baseline, no partitions flagged)" if summary['baseline'] else ""
+    print(f"  ✓ Changes captured ({source}): {summary['inserted']:,} new, {summary['updated']:,} updated, "
+          f"{summary['deleted']:,} removed → {summary['partitions']:,} partitions{note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture changed fixtures into match_history")
+    parser.add_argument("--db-path", default=DB_PATH)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Change Data Capture")
+    print("=" * 60)
+    start = time.perf_counter()
+    conn = connect(args.db_path)
+    for source in SOURCE_COLUMNS:
+        print_capture(source, capture_changes(conn, source))
+    conn.close()
+    print("=" * 60)
+    print(f"✅ Done ({time.perf_counter() - start:.2f}s)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+"""
+Football Data Warehouse - Data Quality Checks
+==============================================
+One declarative list of checks on match rows (CHECKS). The same definitions
+are used in three places:
+
+  Validator            ingestion_script.py and merge_script.py pass every
+                       batch through it as the batch loads
+  data_quality         table with the results, one row per check and
+                       (league, season) per run
+  tests/data_quality/  dbt singular tests generated from the checks'
+                       SQL (--write-dbt-tests)
+
+Row checks flag single rows. For each batch, every row check gives a
+column of 1 (fails), 0 (passes) or NaN (does not apply), and one groupby on
+(league, season) counts all of them at once. Group checks (duplicate
+fixtures, xG coverage, fixtures per team) add up partial counts per batch
+and are evaluated once the load has finished, so a league season split over
+several chunks or files is judged as a whole. Checks whose columns are not
+in a batch are skipped: Football-Data batches have no xG yet, and the
+Understat goals only exist during the merge.
+
+A (league, season) fails a check when more than `tolerance` of what was
+checked fails. Its status is then the check's severity. Warn checks cover
+data the warehouse is known to have: unparsed 2017/18 dates, the curtailed
+2019/20 Ligue 1 season and the season in progress.
+
+Usage:
+    python data_quality.py                     # check the whole matches table
+    python data_quality.py --write-dbt-tests   # regenerate tests/data_quality/*.sql
+"""
+
+import argparse
+import os
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from db_loader import bulk_insert, connect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = "../db/footbase_big5.db"
+TESTS_DIR = os.path.join(ROOT, "tests", "data_quality")
+CHUNKSIZE = 50_000
+
+TABLE = "data_quality"
+
+DDL = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    check_name TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    league TEXT,
+    season TEXT,
+    checked INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    checked_at TEXT NOT NULL
+);
+"""
+
+INDEX = f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_check ON {TABLE} (check_name, checked_at)"
+
+SCOPE = ['league', 'season']
+FIXTURE = ['league', 'season', 'home_team', 'away_team']
+ODDS = ['odds_home', 'odds_draw', 'odds_away']
+ODDS_RANGE = (1.01, 1000.0)
+MAX_MISSING_XG = 0.05
+
+RESULT_COLUMNS = ['check_name', 'severity', 'league', 'season', 'checked', 'failed', 'status']
+
+
+class Check:
+    """
+    One data-quality rule.
+
+    Row checks give `failing(batch)`: a float Series of 1/0/NaN (fails,
+    passes, not applicable) and `sql`, the WHERE condition of failing rows.
+    Group checks give `partial(batch)`: additive counts indexed by their
+    group keys, `evaluate(totals)`: (checked, failed) per (league, season),
+    and `sql`, a query returning the failing groups with {matches} in
+    place of the table. Checks without SQL get no dbt test.
+    """
+
+    def __init__(self, name, description, columns, sql=None, severity='error', tolerance=0.0,
+                 failing=None, partial=None, evaluate=None):
+        self.name = name
+        self.description = description
+        self.columns = list(columns)
+        self.sql = sql
+        self.severity = severity
+        self.tolerance = tolerance
+        self.failing = failing
+        self.partial = partial
+        self.evaluate = evaluate
+
+    @property
+    def kind(self):
+        return 'row' if self.failing else 'group'
+
+    def applies(self, batch):
+        return all(col in batch.columns for col in [*SCOPE, *self.columns])
+
+
+# ----------------------------------------------------------------------------
+# Row checks
+# ----------------------------------------------------------------------------
+
+def _flag(failed, applicable=None):
+    """1.0 where `failed`, 0.0 where not, NaN where the check does not apply."""
+    flags = failed.astype(float)
+    return flags if applicable is None else flags.where(applicable)
+
+
+def _unparsed_dates(batch):
+    dates = batch['date']
+    failed = dates.isna()
+    if dates.dtype == object:
+        failed |= dates.eq('NaT')
+    return _flag(failed)
+
+
+def _result_mismatch(batch):
+    home, away = batch['home_goals'], batch['away_goals']
+    expected = np.select([home > away, home == away], ['H', 'D'], 'A')
+    return _flag(batch['result'].ne(expected), home.notna() & away.notna())
+
+
+def _odds_out_of_range(batch):
+    odds = batch[ODDS]
+    low, high = ODDS_RANGE
+    return _flag(((odds < low) | (odds > high)).any(axis=1), odds.notna().any(axis=1))
+
+
+def _goals_differ(batch):
+    failed = batch['home_goals'].ne(batch['home_goals_us']) | batch['away_goals'].ne(batch['away_goals_us'])
+    return _flag(failed, batch['home_goals_us'].notna())
+
+
+# ----------------------------------------------------------------------------
+# Group checks
+# ----------------------------------------------------------------------------
+
+def _fixture_counts(batch):
+    return batch.groupby(FIXTURE, sort=False, observed=True).size().to_frame('rows')
+
+
+def _duplicates(totals):
+    rows = totals['rows']
+    return pd.DataFrame({
+        'checked': rows.groupby(level=SCOPE, observed=True).sum(),
+        'failed': (rows - 1).groupby(level=SCOPE, observed=True).sum(),
+    })
+
+
+def _xg_counts(batch):
+    return pd.DataFrame({'rows': 1, 'missing': batch['home_xg'].isna()}).groupby(
+        [batch['league'], batch['season']], sort=False, observed=True
+    ).sum()
+
+
+def _xg_coverage(totals):
+    return totals.rename(columns={'rows': 'checked', 'missing': 'failed'})
+
+
+def _team_counts(batch):
+    appearances = pd.concat([
+        batch[[*SCOPE, 'home_team']].rename(columns={'home_team': 'team'}),
+        batch[[*SCOPE, 'away_team']].rename(columns={'away_team': 'team'}),
+    ], ignore_index=True)
+    return appearances.groupby([*SCOPE, 'team'], sort=False, observed=True).size().to_frame('fixtures')
+
+
+def _fixtures_per_team(totals):
+    """Teams per (league, season), and how many did not play a double round robin (2 x (teams - 1))."""
+    fixtures = totals['fixtures']
+    teams = fixtures.groupby(level=SCOPE, observed=True).transform('size')
+    return pd.DataFrame({
+        'checked': fixtures.groupby(level=SCOPE, observed=True).size(),
+        'failed': fixtures.ne(2 * (teams - 1)).groupby(level=SCOPE, observed=True).sum(),
+    })
+
+
+CHECKS = [
+    Check('dates_parsed', "Every match has a date that parsed to YYYY-MM-DD",
+          ['date'], severity='warn', failing=_unparsed_dates,
+          sql="date is null or date = 'NaT'"),
+    Check('result_matches_goals', "The full-time result agrees with the goals",
+          ['home_goals', 'away_goals', 'result'], failing=_result_mismatch,
+          sql="home_goals is not null and away_goals is not null and (result is null or result != "
+              "case when home_goals > away_goals then 'H' when home_goals = away_goals then 'D' else 'A' end)"),
+    Check('odds_in_range', f"Decimal odds lie between {ODDS_RANGE[0]} and {ODDS_RANGE[1]:g}",
+          ODDS, failing=_odds_out_of_range,
+          sql=" or ".join(f"{col} < {ODDS_RANGE[0]} or {col} > {ODDS_RANGE[1]:g}" for col in ODDS)),
+    Check('goals_match_understat', "Football-Data and Understat agree on the score of a matched fixture",
+          ['home_goals', 'away_goals', 'home_goals_us', 'away_goals_us'], severity='warn',
+          failing=_goals_differ),
+    Check('unique_fixture', "Each home/away pairing is played once per league season",
+          ['home_team', 'away_team'], partial=_fixture_counts, evaluate=_duplicates,
+          sql="""\
+select league, season, home_team, away_team, count(*) as rows
+from {matches}
+group by league, season, home_team, away_team
+having count(*) > 1"""),
+    Check('xg_coverage', f"At least {1 - MAX_MISSING_XG:.0%} of a league season's matches have xG",
+          ['home_xg'], severity='warn', tolerance=MAX_MISSING_XG,
+          partial=_xg_counts, evaluate=_xg_coverage,
+          sql=f"""\
+select
+    league,
+    season,
+    count(*) as matches,
+    sum(case when home_xg is null then 1 else 0 end) as missing_xg
+from {{matches}}
+group by league, season
+having sum(case when home_xg is null then 1 else 0 end) > {MAX_MISSING_XG} * count(*)"""),
+    Check('fixtures_per_team', "Every team plays each other team home and away",
+          ['home_team', 'away_team'], severity='warn',
+          partial=_team_counts, evaluate=_fixtures_per_team,
+          sql="""\
+with appearances as (
+    select league, season, home_team as team from {matches}
+    union all
+    select league, season, away_team as team from {matches}
+),
+
+per_team as (
+    select league, season, team, count(*) as fixtures
+    from appearances
+    group by league, season, team
+),
+
+per_season as (
+    select league, season, count(*) as teams
+    from per_team
+    group by league, season
+)
+
+select t.league, t.season, t.team, t.fixtures, 2 * (s.teams - 1) as expected
+from per_team t
+join per_season s
+    on s.league = t.league
+   and s.season = t.season
+where t.fixtures != 2 * (s.teams - 1)"""),
+]
+
+# Columns of `matches` read by at least one check
+CHECK_COLUMNS = list(dict.fromkeys(
+    col for check in CHECKS for col in [*SCOPE, *check.columns] if not col.endswith('_us')
+))
+
+
+class Validator:
+    """
+    Runs `checks` on every batch passed to check() and returns
+    per-(league, season) results from finish().
+
+    Batches smaller than `chunksize` rows (one file is ~380 matches) are
+    buffered and checked together, so the fixed cost of each pandas call is
+    paid per chunk rather than per file. Only the columns the checks read
+    are kept.
+    """
+
+    def __init__(self, checks=CHECKS, chunksize=CHUNKSIZE):
+        self.checks = list(checks)
+        self.chunksize = chunksize
+        self.rows = 0
+        self.seconds = 0.0
+        self._columns = list(dict.fromkeys(col for check in self.checks for col in [*SCOPE, *check.columns]))
+        self._buffer = []
+        self._buffered = 0
+        self._partials = {check.name: [] for check in self.checks}
+
+    def check(self, batch):
+        start = time.perf_counter()
+        self.rows += len(batch)
+        self._buffer.append(batch[[col for col in self._columns if col in batch.columns]])
+        self._buffered += len(batch)
+        if self._buffered >= self.chunksize:
+            self._flush()
+        self.seconds += time.perf_counter() - start
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        batch = self._buffer[0] if len(self._buffer) == 1 else pd.concat(self._buffer, ignore_index=True)
+        self._buffer, self._buffered = [], 0
+        applicable = [check for check in self.checks if check.applies(batch)]
+
+        rows = [check for check in applicable if check.kind == 'row']
+        if rows:
+            flags = pd.DataFrame({check.name: check.failing(batch) for check in rows}, index=batch.index)
+            groups = flags.groupby([batch['league'], batch['season']], sort=False, observed=True)
+            checked, failed = groups.count(), groups.sum()
+            for check in rows:
+                self._partials[check.name].append(
+                    pd.DataFrame({'checked': checked[check.name], 'failed': failed[check.name]})
+                )
+
+        for check in applicable:
+            if check.kind == 'group':
+                self._partials[check.name].append(check.partial(batch))
+
+    def finish(self):
+        """DataFrame of RESULT_COLUMNS, one row per check and (league, season) seen."""
+        start = time.perf_counter()
+        self._flush()
+        frames = []
+        for check in self.checks:
+            partials = self._partials[check.name]
+            if not partials:
+                continue
+            totals = pd.concat(partials)
+            totals = totals.groupby(level=list(range(totals.index.nlevels)), sort=False, observed=True).sum()
+            if check.kind == 'group':
+                totals = check.evaluate(totals)
+            result = totals[['checked', 'failed']].astype(int).rename_axis(SCOPE).reset_index()
+            result['check_name'] = check.name
+            result['severity'] = check.severity
+            failing = result['failed'] > check.tolerance * result['checked']
+            result['status'] = np.where(failing, check.severity, 'pass')
+            frames.append(result)
+        self.seconds += time.perf_counter() - start
+        if not frames:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+        return pd.concat(frames, ignore_index=True)[RESULT_COLUMNS].sort_values(
+            ['check_name', 'league', 'season'], ignore_index=True
+        )
+
+
+def write_results(conn, results, stage):
+    """Append one run's results to the data_quality table. Returns the run id."""
+    run_id = uuid.uuid4().hex[:12]
+    with conn:
+        conn.execute(DDL)
+        conn.execute(INDEX)
+    rows = results.assign(run_id=run_id, stage=stage,
+                          checked_at=datetime.now().isoformat(timespec='seconds'))
+    bulk_insert(conn, TABLE, rows)
+    return run_id
+
+
+def totals(results, check_name):
+    """(checked, failed) summed over every (league, season) for one check."""
+    rows = results[results['check_name'] == check_name]
+    return int(rows['checked'].sum()), int(rows['failed'].sum())
+
+
+def print_results(results):
+    """One line per check, then every (league, season) that did not pass."""
+    for name, rows in results.groupby('check_name', sort=False):
+        checked, failed = int(rows['checked'].sum()), int(rows['failed'].sum())
+        flagged = rows[rows['status'] != 'pass']
+        mark = '✓' if flagged.empty else ('⚠' if (flagged['status'] == 'warn').all() else '✗')
+        print(f"  {mark} {name:22s}: {failed:>6,} of {checked:>8,} failed")
+        for row in flagged.itertuples():
+            print(f"      {row.status:5s} {row.league:16s} {row.season}: {row.failed:,} of {row.checked:,}")
+
+
+def table_batches(conn, chunksize=CHUNKSIZE):
+    """The matches table in chunks, with only the columns the checks read."""
+    present = {row[1] for row in conn.execute("PRAGMA table_info(matches)")}
+    columns = [col for col in CHECK_COLUMNS if col in present]
+    return pd.read_sql_query(f"SELECT {', '.join(columns)} FROM matches", conn, chunksize=chunksize)
+
+
+def dbt_test_sql(check):
+    """A dbt singular test selecting the rows (or groups) that fail `check`."""
+    matches = "{{ source('football_data', 'matches') }}"
+    if check.kind == 'row':
+        columns = list(dict.fromkeys(['league', 'season', 'date', 'home_team', 'away_team', *check.columns]))
+        query = f"select {', '.join(columns)}\nfrom {matches}\nwhere {check.sql}"
+    else:
+        query = check.sql.replace('{matches}', matches)
+    config = "{{ config(severity='warn') }}\n\n" if check.severity == 'warn' else ""
+    return (f"-- Generated from the `{check.name}` check in etl/data_quality.py; edit CHECKS\n"
+            f"-- and run `python data_quality.py --write-dbt-tests` instead of this file.\n"
+            f"-- {check.description}\n\n{config}{query}\n")
+
+
+def write_dbt_tests(tests_dir=TESTS_DIR):
+    """Write one assert_<check>.sql per check with SQL, removing tests of checks that are gone."""
+    os.makedirs(tests_dir, exist_ok=True)
+    written = []
+    for check in CHECKS:
+        if check.sql is None:
+            continue
+        path = os.path.join(tests_dir, f"assert_{check.name}.sql")
+        with open(path, "w") as f:
+            f.write(dbt_test_sql(check))
+        written.append(path)
+    for name in os.listdir(tests_dir):
+        path = os.path.join(tests_dir, name)
+        if name.startswith("assert_") and name.endswith(".sql") and path not in written:
+            os.remove(path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the data-quality checks or generate their dbt tests")
+    parser.add_argument("--db-path", default=DB_PATH)
+    parser.add_argument("--write-dbt-tests", action="store_true",
+                        help=f"write the dbt tests to {os.path.relpath(TESTS_DIR, ROOT)} and exit")
+    args = parser.parse_args()
+
+    if args.write_dbt_tests:
+        for path in write_dbt_tests():
+            print(f"✓ {os.path.relpath(path, ROOT)}")
+        return
+
+    print("=" * 60)
+    print("Data quality: matches")
+    print("=" * 60)
+    conn = connect(args.db_path)
+    validator = Validator()
+    for batch in table_batches(conn):
+        validator.check(batch)
+    results = validator.finish()
+    print_results(results)
+    run_id = write_results(conn, results, 'manual')
+    conn.close()
+
+    print("=" * 60)
+    print(f"✅ {validator.rows:,} rows checked in {validator.seconds:.2f}s (run {run_id} → {TABLE})")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
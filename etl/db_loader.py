@@ -0,0 +1,149 @@
+"""
+Football Data Warehouse - Bulk SQLite Loader
+=============================================
+Shared write path for the ETL scripts: connections tuned for bulk loads
+(WAL journal, synchronous=NORMAL, large page cache, in-memory temp store)
+and chunked executemany inserts, one transaction per chunk. Indexes are
+created after the data is in place rather than maintained row by row.
+
+Every writer ends with bump_data_version(), so readers holding cached
+results (query_service.py) know the warehouse changed.
+"""
+
+import sqlite3
+
+import pandas as pd
+
+CHUNK_SIZE = 5000
+
+VERSION_TABLE = "data_version"
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,    # negative = KiB, i.e. ~64 MB of page cache
+    "temp_store": "MEMORY",
+}
+
+
+def connect(db_path, pragmas=None, **kwargs):
+    """Open a SQLite connection with the bulk-load PRAGMAs (plus any `pragmas` overrides) applied."""
+    conn = sqlite3.connect(db_path, **kwargs)
+    for name, value in {**PRAGMAS, **(pragmas or {})}.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def copy_database(db_path, dest_path):
+    """
+    Consistent copy of a database, including pages still in its WAL file,
+    through SQLite's online backup API (a plain file copy misses them).
+    """
+    source = sqlite3.connect(db_path)
+    dest = sqlite3.connect(dest_path)
+    try:
+        with dest:
+            source.backup(dest)
+    finally:
+        dest.close()
+        source.close()
+
+
+def frame_rows(df, columns=None):
+    """
+    Yield plain tuples from a DataFrame with NaN/NaT mapped to None and
+    datetimes written as 'YYYY-MM-DD HH:MM:SS' text, as to_sql does.
+
+    Works column-wise through .tolist() (native Python scalars) and zips the
+    columns back into rows, which is much cheaper than astype(object).
+    """
+    columns = list(columns) if columns is not None else list(df.columns)
+    values = []
+    for col in columns:
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            series = series.dt.strftime("%Y-%m-%d %H:%M:%S")
+        column = series.tolist()
+        if series.hasnans:
+            column = [None if missing else v for v, missing in zip(column, series.isna().tolist())]
+        values.append(column)
+    return zip(*values)
+
+
+def insert_sql(table, columns, on_conflict=""):
+    placeholders = ", ".join("?" for _ in columns)
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) {on_conflict}".rstrip()
+
+
+def bulk_insert(conn, table, df, columns=None, chunk_size=CHUNK_SIZE, on_conflict=""):
+    """
+    Insert `df` into an existing table with executemany, committing once per
+    chunk of `chunk_size` rows. Returns the number of rows written.
+    """
+    columns = [c for c in (columns or df.columns)]
+    sql = insert_sql(table, columns, on_conflict)
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        with conn:
+            conn.executemany(sql, frame_rows(chunk, columns))
+    return len(df)
+
+
+def create_table_from_frame(conn, table, df):
+    """CREATE TABLE IF NOT EXISTS using the column types pandas would pick."""
+    ddl = pd.io.sql.get_schema(df, table, con=conn)
+    conn.execute(ddl.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1))
+
+
+def replace_table(conn, table, df, indexes=(), chunk_size=CHUNK_SIZE):
+    """
+    Drop and reload `table` from `df`, then build `indexes`.
+
+    `indexes` is a sequence of (index_name, column_list_sql[, unique]) tuples.
+    """
+    with conn:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+        create_table_from_frame(conn, table, df)
+    bulk_insert(conn, table, df, chunk_size=chunk_size)
+    create_indexes(conn, table, indexes)
+
+
+def create_indexes(conn, table, indexes):
+    """Create indexes after a load. Each entry is (name, columns_sql[, unique])."""
+    with conn:
+        for index in indexes:
+            name, columns = index[0], index[1]
+            unique = "UNIQUE " if len(index) > 2 and index[2] else ""
+            conn.execute(f"CREATE {unique}INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def bump_data_version(conn, source):
+    """
+    Increment the single-row data_version stamp, recording which `source` wrote last. Returns the new version.
+
+    The row also carries a random `generation`, written when the stamp is
+    created, so a recreated database (whose version restarts at 1) never
+    looks like the one it replaced to on-disk caches.
+    """
+    with conn:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL,
+                source TEXT,
+                updated_at TEXT,
+                generation TEXT
+            )
+        """)
+        if "generation" not in {row[1] for row in conn.execute(f"PRAGMA table_info({VERSION_TABLE})")}:
+            conn.execute(f"ALTER TABLE {VERSION_TABLE} ADD COLUMN generation TEXT")
+        conn.execute(f"""
+            INSERT INTO {VERSION_TABLE} (id, version, source, updated_at, generation)
+            VALUES (1, 1, ?, datetime('now'), lower(hex(randomblob(8))))
+            ON CONFLICT (id) DO UPDATE SET
+                version = version + 1,
+                source = excluded.source,
+                updated_at = excluded.updated_at,
+                generation = coalesce(generation, excluded.generation)
+        """, (source,))
+    return conn.execute(f"SELECT version FROM {VERSION_TABLE}").fetchone()[0]
@@ -1,12 +1,13 @@
 import pandas as pd
-import sqlite3
-import glob
 import os
 
+from db_loader import bulk_insert, connect
+from raw_catalog import build_catalog
+
 
 DB_PATH = "../db/footbase_big5.db"
 CSV_DIR = "../data/raw"
-conn = sqlite3.connect(DB_PATH)
+conn = connect(DB_PATH)
 cursor = conn.cursor()
 
 # Drop existing table (if you’re reloading from scratch)
@@ -39,14 +40,16 @@ print("✅ Table recreated with full schema!")
 
 #====LOAD SCRIPT====
 
-conn = sqlite3.connect(DB_PATH)
+conn = connect(DB_PATH)
+
+# One file per (league, season), as picked by the raw-file catalog
+catalog = build_catalog(conn, CSV_DIR, ["Premier_League", "La_Liga", "Bundesliga", "Serie_A", "Ligue_1"])
 
-for league in ["Premier_League", "La_Liga", "Bundesliga", "Serie_A", "Ligue_1"]:
-    files = glob.glob(os.path.join(CSV_DIR, league, "*.csv"))
-    for file in files:
-        df = pd.read_csv(file)
-        df["league"] = league.replace("_", " ")
-        df.to_sql("matches", conn, if_exists="append", index=False)
-        print(f"✅ Loaded {file}")
+for rel_path in catalog.loc[catalog["selected"], "file_path"]:
+    file = os.path.join(CSV_DIR, rel_path)
+    df = pd.read_csv(file)
+    df["league"] = rel_path.split("/")[0].replace("_", " ")
+    bulk_insert(conn, "matches", df)
+    print(f"✅ Loaded {file}")
 
 conn.close()
\ No newline at end of file
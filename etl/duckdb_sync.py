@@ -0,0 +1,114 @@
+"""
+Football Data Warehouse - DuckDB Raw Sync
+==========================================
+Copies the raw tables the dbt sources read (matches, team_aliases,
+raw_catalog, changed_partitions) from the SQLite database into a DuckDB file, so the same dbt
+project can be built with the `duckdb` target:
+
+    python duckdb_sync.py
+    dbt build --target duckdb
+
+`matches` is copied in SQLite rowid order. stg_matches numbers matchdays
+by row order, and DuckDB keeps insertion order in its own rowid.
+
+The copy goes through Arrow in Python rather than DuckDB's sqlite extension,
+so it also works where DuckDB extensions cannot be downloaded. Columns are
+cast to the type declared in SQLite, not the one pandas infers: an empty
+table (changed_partitions when nothing was corrected) would otherwise come
+out all INTEGER. A source table that SQLite does not have yet is dropped
+from DuckDB too, and the dbt sources treat it as missing.
+"""
+
+import os
+import sqlite3
+import time
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+
+SQLITE_PATH = "../db/footbase_big5.db"
+DUCKDB_PATH = "../db/footbase_big5.duckdb"
+
+# Tables declared in models/staging/sources.yml, with the order to copy them in
+SOURCE_TABLES = {
+    'matches': 'rowid',
+    'team_aliases': 'rowid',
+    'raw_catalog': 'file_path',
+    'changed_partitions': 'rowid',
+}
+
+# SQLite type affinity (https://www.sqlite.org/datatype3.html) -> DuckDB type
+AFFINITIES = [
+    (('INT',), 'BIGINT'),
+    (('CHAR', 'CLOB', 'TEXT'), 'VARCHAR'),
+    (('REAL', 'FLOA', 'DOUB'), 'DOUBLE'),
+]
+
+
+def duckdb_type(declared):
+    """DuckDB type for a declared SQLite column type, or None to keep what Arrow inferred."""
+    declared = declared.upper()
+    for markers, duck_type in AFFINITIES:
+        if any(marker in declared for marker in markers):
+            return duck_type
+    return None
+
+
+def column_casts(source, table):
+    """SELECT list casting every column of `table` to its declared type."""
+    casts = []
+    for _, name, declared, *_ in source.execute(f"PRAGMA table_info({table})"):
+        duck_type = duckdb_type(declared or '')
+        casts.append(f'CAST("{name}" AS {duck_type}) AS "{name}"' if duck_type else f'"{name}"')
+    return ', '.join(casts)
+
+
+def sync(sqlite_path=SQLITE_PATH, duckdb_path=DUCKDB_PATH):
+    """
+    Replace the raw tables in `duckdb_path` with the SQLite ones. Returns
+    {table: rows}, with None for a table SQLite does not have.
+    """
+    source = sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+    target = duckdb.connect(duckdb_path)
+    counts = {}
+    try:
+        present = {row[0] for row in source.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table, order in SOURCE_TABLES.items():
+            if table not in present:
+                target.execute(f"DROP TABLE IF EXISTS main.{table}")
+                counts[table] = None
+                continue
+            df = pd.read_sql_query(f"SELECT * FROM {table} ORDER BY {order}", source, dtype_backend='pyarrow')
+            rows = pa.Table.from_pandas(df, preserve_index=False)
+            target.register('rows', rows)
+            target.execute(f"CREATE OR REPLACE TABLE main.{table} AS SELECT {column_casts(source, table)} FROM rows")
+            target.unregister('rows')
+            counts[table] = rows.num_rows
+    finally:
+        source.close()
+        target.close()
+    return counts
+
+
+def main():
+    print("=" * 60)
+    print("DuckDB Raw Sync")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    counts = sync()
+    for table, rows in counts.items():
+        if rows is None:
+            print(f"  · {table:14s} not in SQLite yet, skipped")
+        else:
+            print(f"  ✓ {table:14s} → {rows:>6,} rows")
+
+    print("=" * 60)
+    print(f"✅ {os.path.basename(DUCKDB_PATH)} ready for `dbt build --target duckdb` "
+          f"({time.perf_counter() - start:.2f}s)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Football Data Warehouse - Tolerant Fixture Matcher
+===================================================
+Matches Football-Data fixtures to Understat fixtures on
+(league, season, home_team, away_team) and the nearest date within a
+±window, so kickoff timezone shifts and rescheduled matches still pick up
+their xG. Rows whose Football-Data date failed to parse are matched on the
+fixture key alone (each pairing is played once per league season).
+
+Everything runs on sorted frames (merge / merge_asof), never a cross join.
+When both an earlier and a later Understat fixture fall inside the window,
+the one whose goals agree with Football-Data wins, then the closer date.
+"""
+
+import numpy as np
+import pandas as pd
+
+from team_aliases import UNDERSTAT_LEAGUES, understat_season
+
+KEY = ['league', 'season', 'home_team', 'away_team']
+US_COLUMNS = ['home_xg', 'away_xg', 'forecast_home', 'forecast_draw', 'forecast_away',
+              'home_goals_us', 'away_goals_us']
+
+EXACT, NEAR, UNMATCHED = 'exact', 'near', 'unmatched'
+
+
+def understat_fixtures(understat):
+    """Clean Understat export relabelled to Football-Data league/season, with a row id."""
+    us = understat.copy()
+    us['league'] = us['league'].map(UNDERSTAT_LEAGUES).fillna(us['league'])
+    us['season'] = us['season'].map(understat_season)
+    us['date'] = pd.to_datetime(us['date'])
+    us = us.drop_duplicates(subset=KEY + ['date']).reset_index(drop=True)
+    us['us_id'] = np.arange(len(us))
+    return us[KEY + ['date', 'us_id'] + US_COLUMNS]
+
+
+def _goals_agree(df):
+    return (df['home_goals'] == df['home_goals_us']) & (df['away_goals'] == df['away_goals_us'])
+
+
+def _asof(left, us, direction, window):
+    """One merge_asof pass; left must be sorted by date and carry a `row` id."""
+    found = pd.merge_asof(
+        left, us.rename(columns={'date': 'date_us'}),
+        left_on='date', right_on='date_us', by=KEY,
+        direction=direction, tolerance=window, allow_exact_matches=True
+    )
+    found = found[found['us_id'].notna()].copy()
+    found['day_offset'] = (found['date_us'] - found['date']).dt.days
+    found['consistent'] = _goals_agree(found)
+    return found
+
+
+def match_fixtures(fd, understat, window_days=3):
+    """
+    Attach Understat xG to Football-Data fixtures.
+
+    `fd` needs league, season, date, home_team, away_team, home_goals and
+    away_goals. Returns `fd` (same row order) with home_xg, away_xg, the
+    three forecast_* probabilities, home_goals_us, away_goals_us, day_offset and match_kind
+    ('exact' / 'near' / 'unmatched'). Each Understat fixture is used at most once.
+    """
+    us = understat_fixtures(understat)
+    left = fd.copy()
+    left['row'] = np.arange(len(left))
+    left['date'] = pd.to_datetime(left['date'])
+
+    # 1. Exact date
+    exact = left.merge(us, on=KEY + ['date'], how='inner')
+    exact = exact.drop_duplicates('row').drop_duplicates('us_id')
+    exact['day_offset'] = 0
+    exact['match_kind'] = EXACT
+    used = set(exact['us_id'])
+
+    # 2. Nearest date inside the window, earlier and later candidates
+    free_us = us[~us['us_id'].isin(used)].sort_values('date')
+    rest = left[~left['row'].isin(exact['row']) & left['date'].notna()].sort_values('date')
+    window = pd.Timedelta(days=window_days)
+    candidates = pd.concat([
+        _asof(rest, free_us, 'backward', window),
+        _asof(rest, free_us, 'forward', window),
+    ], ignore_index=True)
+    candidates['abs_offset'] = candidates['day_offset'].abs()
+    near = (
+        candidates
+        .sort_values(['row', 'consistent', 'abs_offset'], ascending=[True, False, True])
+        .drop_duplicates('row')
+        .sort_values(['us_id', 'consistent', 'abs_offset'], ascending=[True, False, True])
+        .drop_duplicates('us_id')
+    )
+    near['match_kind'] = NEAR
+    used |= set(near['us_id'])
+
+    # 3. Undated rows: fixture key alone, when Understat has exactly one free candidate
+    free_us = us[~us['us_id'].isin(used)]
+    unique_us = free_us[~free_us.duplicated(KEY, keep=False)]
+    undated = left[left['date'].isna()].merge(unique_us.drop(columns='date'), on=KEY, how='inner')
+    undated = undated.drop_duplicates('us_id')
+    undated['day_offset'] = np.nan
+    undated['match_kind'] = NEAR
+
+    found = pd.concat([exact, near, undated], ignore_index=True)
+    found = found.set_index('row')[US_COLUMNS + ['day_offset', 'match_kind']]
+
+    result = fd.copy()
+    result = result.drop(columns=[c for c in found.columns if c in result.columns])
+    result = result.join(found.reindex(np.arange(len(fd))).set_axis(result.index))
+    result['match_kind'] = result['match_kind'].fillna(UNMATCHED)
+    return result
+
+
+def match_report(df):
+    """Per-league counts of exact / near / unmatched fixtures from a `match_kind` column."""
+    report = pd.crosstab(df['league'], df['match_kind'])
+    for kind in (EXACT, NEAR, UNMATCHED):
+        if kind not in report.columns:
+            report[kind] = 0
+    report = report[[EXACT, NEAR, UNMATCHED]]
+    report['total'] = report.sum(axis=1)
+    return report
@@ -0,0 +1,37 @@
+"""
+Football Data Warehouse - Analyst Access Layer
+===============================================
+Notebook access to the warehouse without pulling whole tables. Filters and
+column lists are pushed down into SQL, and derived frames are memoized on
+disk under the warehouse's data_version stamp.
+
+  Warehouse.table          lazy query on any table: where(league=, season=, team=),
+                           select(), order_by(), limit(), then df() / rows() / count()
+  Warehouse.team_history   one row per team per match (venue, for/against, points,
+                           running season totals), built from fct_matches
+  Warehouse.season_summary per team season record, goals, xG and points per match
+
+Query results are cached in memory and derived frames are pickled under
+../data/cache. Both are tagged with the data_version stamp, so a new ETL
+load or `dbt run` invalidates them. A repeated call costs one
+version lookup. Importing the package loads neither pandas nor NumPy. They
+are imported the first time a DataFrame is built.
+
+Usage (from notebooks/, with etl/ on sys.path):
+    import sys; sys.path.insert(0, "../etl")
+    from footbase import Warehouse
+
+    wh = Warehouse()
+    wh.table("fct_matches").where(league="Premier League", season="2023/24", team="arsenal") \\
+      .select("match_date", "home_team_id", "away_team_id", "home_xg", "away_xg").df()
+    wh.team_history("arsenal", season="2023/24")
+    wh.season_summary(league="serie_a")
+
+`python benchmarks/bench_notebook_access.py` compares it with reading whole
+tables and checks the results agree.
+"""
+
+from .query import Query, to_id
+from .warehouse import CACHE_DIR, DB_PATH, Warehouse
+
+__all__ = ['Warehouse', 'Query', 'to_id', 'DB_PATH', 'CACHE_DIR']
@@ -0,0 +1,74 @@
+"""
+Derived frames built from fct_matches rows. These are plain functions of a
+DataFrame; Warehouse memoizes them on disk.
+"""
+
+import numpy as np
+import pandas as pd
+
+MATCH_COLUMNS = [
+    'match_id', 'match_date', 'season', 'matchday', 'competition_id', 'home_team_id', 'away_team_id',
+    'home_goals', 'away_goals', 'home_xg', 'away_xg', 'home_shots', 'away_shots',
+]
+
+# Team-perspective name -> (home column, away column) of the fixture
+SIDES = {
+    'team_id': ('home_team_id', 'away_team_id'),
+    'opponent_id': ('away_team_id', 'home_team_id'),
+    'goals_for': ('home_goals', 'away_goals'),
+    'goals_against': ('away_goals', 'home_goals'),
+    'xg_for': ('home_xg', 'away_xg'),
+    'xg_against': ('away_xg', 'home_xg'),
+    'shots_for': ('home_shots', 'away_shots'),
+    'shots_against': ('away_shots', 'home_shots'),
+}
+KEYS = ['match_id', 'match_date', 'competition_id', 'season', 'matchday']
+
+
+def team_history(matches, teams=None):
+    """
+    One row per team per match, oldest first, with the result from the
+    team's side and running totals within its season. `teams` keeps only
+    those team ids (the fixtures were already filtered on either side).
+    """
+    frames = []
+    for venue, side in (('H', 0), ('A', 1)):
+        frame = matches[KEYS].copy()
+        for name, columns in SIDES.items():
+            frame[name] = matches[columns[side]].to_numpy()
+        frame.insert(len(KEYS), 'venue', venue)
+        frames.append(frame)
+    history = pd.concat(frames, ignore_index=True)
+    if teams is not None:
+        history = history[history['team_id'].isin(teams)]
+    history = history.sort_values(['team_id', 'match_date', 'match_id'], ignore_index=True)
+
+    margin = history['goals_for'] - history['goals_against']
+    history['result'] = np.select([margin > 0, margin == 0], ['W', 'D'], 'L')
+    history['points'] = np.select([margin > 0, margin == 0], [3, 1], 0)
+    season = history.groupby(['team_id', 'competition_id', 'season'], sort=False)
+    history['match_no'] = season.cumcount() + 1
+    history['cum_points'] = season['points'].cumsum()
+    history['cum_goal_difference'] = margin.groupby([history['team_id'], history['competition_id'],
+                                                     history['season']], sort=False).cumsum()
+    return history
+
+
+def season_summary(history):
+    """Per team and season: record, goals, xG and points per match from a team_history frame."""
+    outcomes = history.assign(
+        wins=history['result'].eq('W').astype(int),
+        draws=history['result'].eq('D').astype(int),
+        losses=history['result'].eq('L').astype(int),
+    )
+    grouped = outcomes.groupby(['team_id', 'competition_id', 'season'], sort=True)
+    summary = grouped[['wins', 'draws', 'losses', 'points', 'goals_for', 'goals_against']].sum()
+    summary.insert(0, 'played', grouped.size())
+    # NaN rather than 0 for seasons without xG
+    summary[['xg_for', 'xg_against']] = grouped[['xg_for', 'xg_against']].sum(min_count=1)
+    summary = summary.reset_index()
+    summary['goal_difference'] = summary['goals_for'] - summary['goals_against']
+    summary['xg_difference'] = summary['xg_for'] - summary['xg_against']
+    summary['points_per_match'] = (summary['points'] / summary['played']).round(2)
+    summary['xg_overperformance'] = summary['goals_for'] - summary['xg_for']
+    return summary
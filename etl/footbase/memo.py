@@ -0,0 +1,53 @@
+"""
+On-disk memo of derived frames, keyed by the warehouse's data_version.
+A frame is pickled to <cache_dir>/<name>-<key>.<generation>.v<version>.pkl.
+The key is a digest of the database path and the call's parameters; the
+generation is the random id of the database's stamp, since a database
+recreated at the same path starts again at version 1. Writing a new
+version removes the older files for the same key, so the cache holds one
+copy of each frame.
+"""
+
+import glob
+import hashlib
+import os
+import pickle
+
+
+class DiskMemo:
+    """Pickled frames under `cache_dir`, looked up by (name, params, generation, version)."""
+
+    def __init__(self, cache_dir, db_path):
+        self.cache_dir = cache_dir
+        self.db_path = os.path.realpath(db_path)
+
+    def _stem(self, name, params):
+        key = repr((self.db_path, sorted(params.items())))
+        return os.path.join(self.cache_dir, f"{name}-{hashlib.sha1(key.encode()).hexdigest()[:16]}")
+
+    def path(self, name, params, generation, version):
+        return f"{self._stem(name, params)}.{generation or 'none'}.v{version}.pkl"
+
+    def get(self, name, params, generation, version):
+        """The memoized frame, or None."""
+        try:
+            with open(self.path(name, params, generation, version), 'rb') as f:
+                return pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def put(self, name, params, generation, version, frame):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(name, params, generation, version)
+        for stale in glob.glob(f"{glob.escape(self._stem(name, params))}.*.v*.pkl"):
+            if stale != path:
+                os.remove(stale)
+        # Write then rename, so a reader never sees half a file
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, 'wb') as f:
+            pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(partial, path)
+
+    def clear(self):
+        for path in glob.glob(os.path.join(glob.escape(self.cache_dir), "*.pkl")):
+            os.remove(path)
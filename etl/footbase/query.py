@@ -0,0 +1,132 @@
+"""
+Lazy queries over one warehouse table. Building a query runs nothing: the
+filters, columns, order and limit are compiled into a single SELECT when a
+result is asked for (rows(), df(), count()).
+"""
+
+LEAGUE_COLUMNS = ('competition_id', 'league')
+TEAM_COLUMNS = (('team_id',), ('home_team_id', 'away_team_id'), ('home_team', 'away_team'))
+
+
+def to_id(value):
+    """Mart key for a league or team name, derived as fct_matches does ('Premier League' -> 'premier_league')."""
+    return value.lower().replace(' ', '_')
+
+
+def _values(value):
+    return list(value) if isinstance(value, (list, tuple, set, frozenset)) else [value]
+
+
+def _in(column, values):
+    return f"{column} IN ({', '.join('?' * len(values))})", list(values)
+
+
+class Query:
+    """
+    An immutable SELECT on `table`. where(), select(), order_by() and
+    limit() return a new Query, so a base query can be kept and refined.
+
+    where() takes the shared notebook filters, mapped to whatever columns
+    the table has:
+
+      league   competition_id, or the `league` name column
+      season   season
+      team     team_id, else either side of a fixture (home/away ids or names)
+
+    A filter value may be a list (SQL IN). League and team names are turned
+    into ids for *_id columns, so league='Premier League' works on both
+    `matches` and the marts. Any other keyword is an equality/IN filter on
+    that column, and a positional SQL condition with `?` parameters is
+    ANDed in as given.
+    """
+
+    def __init__(self, warehouse, table, columns=None, conditions=(), order=None, limit_rows=None):
+        self.warehouse = warehouse
+        self.table = table
+        self.columns = columns
+        self.conditions = tuple(conditions)
+        self.order = order
+        self.limit_rows = limit_rows
+
+    def _replace(self, **changes):
+        state = dict(columns=self.columns, conditions=self.conditions, order=self.order,
+                     limit_rows=self.limit_rows)
+        state.update(changes)
+        return Query(self.warehouse, self.table, **state)
+
+    def _column(self, name):
+        if name not in self.warehouse.columns(self.table):
+            raise KeyError(f"{self.table} has no column {name!r}")
+        return name
+
+    def _filter(self, name, value):
+        """(sql, params) for one keyword filter."""
+        available = self.warehouse.columns(self.table)
+        values = _values(value)
+        if name == 'league':
+            column = next((col for col in LEAGUE_COLUMNS if col in available), None)
+            if column is None:
+                raise KeyError(f"{self.table} has no league column")
+            return _in(column, [to_id(v) for v in values] if column.endswith('_id') else values)
+        if name == 'team':
+            columns = next((cols for cols in TEAM_COLUMNS if set(cols) <= available), None)
+            if columns is None:
+                raise KeyError(f"{self.table} has no team column")
+            if columns[0].endswith('_id'):
+                values = [to_id(v) for v in values]
+            parts = [_in(col, values) for col in columns]
+            return f"({' OR '.join(sql for sql, _ in parts)})", [p for _, params in parts for p in params]
+        return _in(self._column(name), values)
+
+    def where(self, *condition, **filters):
+        """Add filters, ANDed with the existing ones. Example: where("home_xg > ?", 2, season='2023/24')."""
+        conditions = list(self.conditions)
+        if condition:
+            conditions.append((f"({condition[0]})", list(condition[1:])))
+        for name, value in filters.items():
+            if value is not None:
+                conditions.append(self._filter(name, value))
+        return self._replace(conditions=conditions)
+
+    def select(self, *columns):
+        return self._replace(columns=tuple(self._column(col) for col in columns))
+
+    def order_by(self, *columns):
+        """Sort on `columns`; prefix a name with '-' for descending."""
+        terms = [f"{self._column(col[1:])} DESC" if col.startswith('-') else self._column(col) for col in columns]
+        return self._replace(order=', '.join(terms))
+
+    def limit(self, rows):
+        return self._replace(limit_rows=int(rows))
+
+    def _where(self):
+        if not self.conditions:
+            return "", []
+        return (" WHERE " + " AND ".join(sql for sql, _ in self.conditions),
+                [p for _, params in self.conditions for p in params])
+
+    @property
+    def sql(self):
+        """The compiled (sql, params)."""
+        where, params = self._where()
+        sql = f"SELECT {', '.join(self.columns) if self.columns else '*'} FROM {self.table}{where}"
+        if self.order:
+            sql += f" ORDER BY {self.order}"
+        if self.limit_rows is not None:
+            sql += f" LIMIT {self.limit_rows}"
+        return sql, params
+
+    def rows(self):
+        """Result rows as tuples, without loading pandas."""
+        return self.warehouse.execute(*self.sql)
+
+    def df(self):
+        """Result as a DataFrame (a copy; cached results are never handed out)."""
+        return self.warehouse.read_frame(*self.sql)
+
+    def count(self):
+        where, params = self._where()
+        return self.warehouse.execute(f"SELECT COUNT(*) FROM {self.table}{where}", params)[0][0]
+
+    def __repr__(self):
+        return f"<Query {self.sql[0]}>"
@@ -0,0 +1,182 @@
+"""
+The warehouse handle: one read-only SQLite connection, lazy table queries,
+an in-process result cache and the on-disk memo of derived frames. Every
+cached result is tagged with the data_version stamp that the ETL writers
+and `dbt run` bump (db_loader.bump_data_version), and is dropped once the
+stamp moves.
+"""
+
+import os
+import sqlite3
+from collections import OrderedDict
+
+from .memo import DiskMemo
+from .query import Query, to_id
+
+DB_PATH = "../db/footbase_big5.db"
+CACHE_DIR = "../data/cache"
+CACHE_SIZE = 256        # query results kept in memory
+STATEMENT_CACHE = 64
+
+# db_loader.VERSION_TABLE; not imported from there, db_loader loads pandas
+VERSION_TABLE = "data_version"
+
+
+def _key(params):
+    """Hashable, order-independent form of a call's parameters (lists become sorted tuples)."""
+    return {name: tuple(sorted(value)) if isinstance(value, (list, tuple, set, frozenset)) else value
+            for name, value in params.items()}
+
+
+class Warehouse:
+    """
+    Read-only access to the warehouse for notebooks and analysis scripts.
+
+        wh = Warehouse()
+        wh.table('fct_matches').where(league='serie_a', season='2023/24').select('match_date', 'home_xg').df()
+        wh.team_history('arsenal', season='2023/24')
+    """
+
+    def __init__(self, db_path=DB_PATH, cache_dir=CACHE_DIR, cache_size=CACHE_SIZE):
+        self.db_path = db_path
+        self.memo = DiskMemo(cache_dir, db_path) if cache_dir else None
+        self.cache_size = cache_size
+        self._results = OrderedDict()
+        self._frames = {}
+        self._columns = {}
+        self._conn = None
+
+    @property
+    def conn(self):
+        """The read-only connection, opened on first use."""
+        if self._conn is None:
+            if not os.path.exists(self.db_path):
+                raise FileNotFoundError(f"No warehouse at {self.db_path}")
+            self._conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True,
+                                         cached_statements=STATEMENT_CACHE)
+            self._conn.execute("PRAGMA query_only = ON")
+        return self._conn
+
+    def data_version(self):
+        """Current data_version stamp of the warehouse (0 if it has none)."""
+        try:
+            row = self.conn.execute(f"SELECT version FROM {VERSION_TABLE}").fetchone()
+        except sqlite3.OperationalError:
+            return 0    # warehouse built before the stamp existed
+        return row[0] if row else 0
+
+    def generation(self):
+        """Random id of the database's data_version stamp, set when it was created (None if it has none)."""
+        try:
+            row = self.conn.execute(f"SELECT generation FROM {VERSION_TABLE}").fetchone()
+        except sqlite3.OperationalError:
+            return None     # no stamp, or one written before generations existed
+        return row[0] if row else None
+
+    def tables(self):
+        return sorted(row[0] for row in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+        ))
+
+    def columns(self, table):
+        """Column names of `table`, as a set."""
+        if table not in self._columns:
+            if table not in self.tables():
+                raise KeyError(f"No table {table!r} in {self.db_path}")
+            self._columns[table] = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        return self._columns[table]
+
+    def table(self, name):
+        """A lazy Query on `name`; nothing runs until rows(), df() or count()."""
+        self.columns(name)
+        return Query(self, name)
+
+    def _cached(self, key, version, load):
+        entry = self._results.get(key)
+        if entry is not None and entry[0] == version:
+            self._results.move_to_end(key)
+            return entry[1]
+        value = load()
+        self._results[key] = (version, value)
+        self._results.move_to_end(key)
+        while len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+        return value
+
+    def execute(self, sql, params=()):
+        """Rows of `sql` as a list of tuples, cached in memory for the current data version."""
+        version = self.data_version()
+        return self._cached(('rows', sql, tuple(params)), version,
+                            lambda: self.conn.execute(sql, params).fetchall())[:]
+
+    def read_frame(self, sql, params=()):
+        """`sql` as a DataFrame, cached in memory for the current data version. Returns a copy."""
+        import pandas as pd
+
+        version = self.data_version()
+        frame = self._cached(('frame', sql, tuple(params)), version,
+                             lambda: pd.read_sql_query(sql, self.conn, params=list(params)))
+        return frame.copy()
+
+    def memoized(self, name, build, **params):
+        """
+        Frame `name` for `params`: from memory, else from the disk memo, else
+        build() and store it in both. Keyed by the current data version and,
+        on disk, by the stamp's generation.
+        """
+        params = _key(params)
+        version = self.data_version()
+        key = (name, tuple(sorted(params.items())))
+        entry = self._frames.get(key)
+        if entry is None or entry[0] != version:
+            generation = self.generation()
+            frame = self.memo.get(name, params, generation, version) if self.memo else None
+            if frame is None:
+                frame = build()
+                if self.memo:
+                    self.memo.put(name, params, generation, version, frame)
+            entry = self._frames[key] = (version, frame)
+        return entry[1].copy()
+
+    def team_history(self, team=None, league=None, season=None):
+        """
+        Per-team match history from fct_matches: one row per team per match
+        with venue, goals and xG for/against, result, points and running
+        season totals. `team` is an id or name (or a list).
+        """
+        from . import features
+
+        def build():
+            matches = self.table('fct_matches').where(team=team, league=league, season=season)
+            teams = None if team is None else [to_id(t) for t in ([team] if isinstance(team, str) else team)]
+            return features.team_history(matches.select(*features.MATCH_COLUMNS).df(), teams)
+
+        return self.memoized('team_history', build, team=team, league=league, season=season)
+
+    def season_summary(self, league=None, season=None, team=None):
+        """Per team and season aggregates (record, goals, xG, points per match) from team_history()."""
+        from . import features
+
+        return self.memoized(
+            'season_summary',
+            lambda: features.season_summary(self.team_history(team=team, league=league, season=season)),
+            league=league, season=season, team=team,
+        )
+
+    def clear_cache(self):
+        """Drop the in-memory results and the disk memo."""
+        self._results.clear()
+        self._frames.clear()
+        if self.memo:
+            self.memo.clear()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
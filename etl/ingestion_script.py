@@ -3,178 +3,384 @@ Football Data Warehouse - Fixed CSV Ingestion Script
 =====================================================
 Loads Football-Data.co.uk CSVs into SQLite with proper date parsing.
 Fixes the DD/MM/YYYY date format issue.
+
+Usage:
+    python ingestion_script.py                 # full DROP-and-reload
+    python ingestion_script.py --incremental   # load only new/changed files
+    python ingestion_script.py --stream        # read files in chunks (bounded memory)
+    python ingestion_script.py --workers 4     # parse files on 4 processes, one writer
 """
 
 import pandas as pd
-import sqlite3
-import glob
+import argparse
 import os
+import time
 from datetime import datetime
 
-print("=" * 60)
-print("Football Data CSV Ingestion (Fixed)")
-print("=" * 60)
+from change_capture import capture_changes, print_capture
+from data_quality import TABLE as QUALITY_TABLE, Validator, print_results, totals, write_results
+from db_loader import bulk_insert, bump_data_version, connect, copy_database
+from team_aliases import canonicalize, ensure_alias_table, load_aliases
+from manifest import (
+    MANIFEST_DDL, MATCHES_DDL, check_file, delete_matches, ensure_incremental_schema, forget_file,
+    hash_file, prune_matches, record_file, refresh_match_keys, reset_file_keys, stage_file_keys,
+    upsert_matches
+)
+from raw_catalog import STREAM_CHUNKSIZE, build_catalog, iter_match_csv, overlap_report, read_match_csv
+from parallel_ingest import parse_files, to_frame
 
 # Configuration
 DB_PATH = "../db/footbase_big5.db"
 CSV_DIR = "../data/raw"
+# Leagues with Understat xG; multiscrapper also downloads Primeira_Liga, which is not loaded
+LEAGUES = ["Premier_League", "La_Liga", "Bundesliga", "Serie_A", "Ligue_1"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load Football-Data CSVs into SQLite")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="skip files unchanged since the last run and upsert rows from changed files"
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="read each CSV in chunks and write every chunk straight to SQLite"
+    )
+    parser.add_argument("--chunksize", type=int, default=STREAM_CHUNKSIZE, help="rows per chunk with --stream")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="parse and clean files on this many processes; this process stays the only SQLite writer"
+    )
+    parser.add_argument("--db-path", default=DB_PATH)
+    parser.add_argument("--csv-dir", default=CSV_DIR)
+    args = parser.parse_args()
+    if args.stream and args.workers > 1:
+        parser.error("--stream and --workers are alternatives, pick one")
+    return args
+
 
-# ============================================================================
-# 1. BACKUP EXISTING DATABASE
-# ============================================================================
-print(f"\n[1/5] Checking for existing database...")
-
-if os.path.exists(DB_PATH):
-    backup_path = DB_PATH.replace('.db', f'_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db')
-    print(f"  ✓ Creating backup: {os.path.basename(backup_path)}")
-    import shutil
-    shutil.copy(DB_PATH, backup_path)
-else:
-    print(f"  ℹ No existing database found")
-
-# ============================================================================
-# 2. CREATE DATABASE & SCHEMA
-# ============================================================================
-print(f"\n[2/5] Creating database schema...")
-
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
-
-# Drop existing table (reloading from scratch)
-cursor.execute("DROP TABLE IF EXISTS matches;")
-
-# Create with full column list
-cursor.execute("""
-CREATE TABLE matches (
-    date TEXT,
-    home_team TEXT,
-    away_team TEXT,
-    home_goals INTEGER,
-    away_goals INTEGER,
-    result TEXT,
-    home_shots INTEGER,
-    away_shots INTEGER,
-    home_shots_on_target INTEGER,
-    away_shots_on_target INTEGER,
-    odds_home REAL,
-    odds_draw REAL,
-    odds_away REAL,
-    league TEXT,
-    season TEXT
-);
-""")
-conn.commit()
-print("  ✓ Table 'matches' created successfully")
-
-# ============================================================================
-# 3. LOAD CSVs BY LEAGUE
-# ============================================================================
-print(f"\n[3/5] Loading CSV files...")
-
-leagues = ["Premier_League", "La_Liga", "Bundesliga", "Serie_A", "Ligue_1"]
-total_loaded = 0
-league_stats = {}
-
-for league in leagues:
-    league_dir = os.path.join(CSV_DIR, league)
-    files = glob.glob(os.path.join(league_dir, "*.csv"))
-    
-    if not files:
-        print(f"  ⚠ No files found for {league} in {league_dir}")
-        continue
-    
-    league_matches = 0
-    league_name = league.replace("_", " ")
-    
-    for file in files:
+def timed(frames, timings, stage):
+    """Yield from `frames`, adding the time spent producing each one to timings[stage]."""
+    frames = iter(frames)
+    while True:
+        start = time.perf_counter()
         try:
-            # Read CSV
-            df = pd.read_csv(file)
-            
-            # CRITICAL: Parse dates with DD/MM/YYYY format
-            df['date'] = pd.to_datetime(df['date'], format='%d/%m/%Y', errors='coerce')
-            
-            # Convert back to string for SQLite (YYYY-MM-DD format)
-            df['date'] = df['date'].dt.strftime('%Y-%m-%d')
-            
-            # Add league name
-            df["league"] = league_name
-            
-            # Append to database
-            df.to_sql("matches", conn, if_exists="append", index=False)
-            
-            matches_count = len(df)
-            league_matches += matches_count
-            total_loaded += matches_count
-            
-            print(f"  ✓ {os.path.basename(file):40s} → {matches_count:>4} matches")
-            
-        except Exception as e:
-            print(f"  ✗ Error loading {os.path.basename(file)}: {e}")
-    
-    league_stats[league_name] = league_matches
-
-conn.close()
-
-# ============================================================================
-# 4. VALIDATE DATA
-# ============================================================================
-print(f"\n[4/5] Validating database...")
-
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
-
-# Check total records
-cursor.execute("SELECT COUNT(*) FROM matches")
-total_count = cursor.fetchone()[0]
-
-# Check valid dates
-cursor.execute("SELECT COUNT(*) FROM matches WHERE date IS NOT NULL AND date != 'NaT'")
-valid_dates = cursor.fetchone()[0]
-
-# Check NULL dates
-cursor.execute("SELECT COUNT(*) FROM matches WHERE date IS NULL OR date = 'NaT'")
-null_dates = cursor.fetchone()[0]
-
-print(f"  Total matches: {total_count:,}")
-print(f"  Valid dates: {valid_dates:,} ({100*valid_dates/total_count:.1f}%)")
-print(f"  Invalid dates: {null_dates:,} ({100*null_dates/total_count:.1f}%)")
-
-# Show date range
-cursor.execute("SELECT MIN(date), MAX(date) FROM matches WHERE date IS NOT NULL AND date != 'NaT'")
-date_range = cursor.fetchone()
-if date_range[0]:
-    print(f"  Date range: {date_range[0]} to {date_range[1]}")
-
-# Matches by league
-print("\n  Matches by league:")
-for league, count in league_stats.items():
-    print(f"    {league:20s}: {count:>5,} matches")
-
-# Matches by season
-cursor.execute("SELECT season, COUNT(*) FROM matches GROUP BY season ORDER BY season")
-seasons = cursor.fetchall()
-print("\n  Matches by season:")
-for season, count in seasons:
-    print(f"    {season}: {count:>5,} matches")
-
-conn.close()
-
-# ============================================================================
-# 5. SUMMARY
-# ============================================================================
-print("\n" + "=" * 60)
-print("✅ INGESTION COMPLETE!")
-print("=" * 60)
-print(f"Database: {DB_PATH}")
-print(f"Total matches: {total_count:,}")
-print(f"Valid dates: {valid_dates:,} ({100*valid_dates/total_count:.1f}%)")
-print(f"Leagues loaded: {len(league_stats)}")
-print(f"Seasons: {len(seasons)}")
-
-if null_dates > 0:
-    print(f"\n⚠ Warning: {null_dates:,} matches have invalid dates")
-    print("  Check the source CSV files for date formatting issues")
-
-
-print("=" * 60)
\ No newline at end of file
+            df = next(frames)
+        except StopIteration:
+            return
+        timings[stage] += time.perf_counter() - start
+        yield df
+
+
+def main():
+    args = parse_args()
+    incremental, stream, workers = args.incremental, args.stream, args.workers
+    db_path, csv_dir = args.db_path, args.csv_dir
+
+    mode = 'Incremental' if incremental else 'Fixed'
+    if stream:
+        mode += ', streaming'
+    elif workers > 1:
+        mode += f', {workers} workers'
+    print("=" * 60)
+    print(f"Football Data CSV Ingestion ({mode})")
+    print("=" * 60)
+
+    # Streaming keeps SQLite's sorts (index builds, de-duplication, GROUP BY)
+    # in temp files rather than RAM, so memory stays bounded on large drops
+    db_pragmas = {"temp_store": "FILE"} if stream else {}
+
+    # Wall-clock seconds per stage, printed with the summary
+    timings = {}
+    stage_start = time.perf_counter()
+
+    # ============================================================================
+    # 1. BACKUP EXISTING DATABASE
+    # ============================================================================
+    print(f"\n[1/6] Checking for existing database...")
+
+    if incremental:
+        # Rows are upserted in place, one transaction per file, so a partial
+        # refresh never leaves the table half-empty and needs no full-file copy
+        print(f"  ℹ Incremental mode: skipping full database backup")
+    elif os.path.exists(db_path):
+        backup_path = db_path.replace('.db', f'_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db')
+        print(f"  ✓ Creating backup: {os.path.basename(backup_path)}")
+        copy_database(db_path, backup_path)
+    else:
+        print(f"  ℹ No existing database found")
+
+    timings['backup'] = time.perf_counter() - stage_start
+
+    # ============================================================================
+    # 2. CREATE DATABASE & SCHEMA
+    # ============================================================================
+    print(f"\n[2/6] Creating database schema...")
+    stage_start = time.perf_counter()
+
+    conn = connect(db_path, pragmas=db_pragmas)
+    cursor = conn.cursor()
+
+    if incremental:
+        # Keep existing rows; make sure the manifest and natural-key index exist
+        ensure_incremental_schema(conn)
+        print("  ✓ Table 'matches' and 'ingest_manifest' ready")
+    else:
+        # Drop existing table (reloading from scratch)
+        cursor.execute("DROP TABLE IF EXISTS matches;")
+        cursor.execute("DROP TABLE IF EXISTS ingest_manifest;")
+        cursor.execute("DROP INDEX IF EXISTS ux_matches_natural_key;")
+        cursor.execute("DROP INDEX IF EXISTS ux_matches_match_key;")
+
+        # Create with full column list; indexes are built after the load
+        cursor.execute(MATCHES_DDL)
+        cursor.execute(MANIFEST_DDL)
+        conn.commit()
+        print("  ✓ Table 'matches' created successfully")
+
+    timings['schema'] = time.perf_counter() - stage_start
+
+    # ============================================================================
+    # 3. CATALOG RAW FILES
+    # ============================================================================
+    print(f"\n[3/6] Cataloguing raw files...")
+    stage_start = time.perf_counter()
+
+    # (league, season) is read from each file's content; one file per season is
+    # selected by the precedence rule in raw_catalog.py
+    catalog = build_catalog(conn, csv_dir, LEAGUES)
+    selected = catalog[catalog['selected']]
+    print(f"  ✓ {len(catalog)} files, {len(selected)} (league, season) sources selected")
+
+    for league, season, chosen, rejected in overlap_report(catalog, csv_dir):
+        print(f"  ⚠ {league} {season}: {len(rejected) + 1} files, loading {chosen}")
+        for rel_path, shared in rejected:
+            print(f"      skipped {rel_path} ({shared} fixtures duplicated)")
+
+    for row in catalog[catalog['duplicate_fixtures'] > 0].itertuples():
+        print(f"  ⚠ {row.file_path}: {row.duplicate_fixtures} fixtures appear more than once")
+
+    timings['catalog'] = time.perf_counter() - stage_start
+
+    # ============================================================================
+    # 4. LOAD CSVs BY LEAGUE
+    # ============================================================================
+    print(f"\n[4/6] Loading CSV files...")
+    stage_start = time.perf_counter()
+
+    total_loaded = 0
+    skipped_files = 0
+    league_stats = {}
+    # Parse (read + clean) and write time, summed over files
+    timings['parse'] = timings['write'] = 0.0
+    # Data-quality checks on every frame before it is written
+    validator = Validator()
+
+    # Known team aliases (exact-match fast path); new names are learned by the merge
+    ensure_alias_table(conn)
+    team_aliases = load_aliases(conn)
+
+    if incremental:
+        # Files loaded by an earlier run that are now superseded: remove the rows
+        # only they contributed, so the table ends up as a full reload would
+        key = ['league', 'season', 'date', 'home_team', 'away_team']
+        winners = selected.set_index(['league', 'season'])['file_path']
+        loaded = {row[0] for row in conn.execute("SELECT file_path FROM ingest_manifest")}
+        for row in catalog[~catalog['selected'] & catalog['file_path'].isin(loaded)].itertuples():
+            league_name = row.file_path.split("/")[0].replace("_", " ")
+            stale = read_match_csv(os.path.join(csv_dir, row.file_path), league_name, row.season)
+            kept = read_match_csv(os.path.join(csv_dir, winners[(row.league, row.season)]), league_name, row.season)
+            stale = canonicalize(stale, team_aliases)[key].merge(
+                canonicalize(kept, team_aliases)[key], how='left', indicator=True
+            )
+            with conn:
+                removed = delete_matches(conn, stale[stale['_merge'] == 'left_only'])
+                forget_file(conn, row.file_path)
+            print(f"  ✓ Retired {row.file_path} ({removed:,} rows only it provided)")
+
+    # Files to load this run, as (rel_path, league_name, season, size, mtime, content_hash)
+    pending = []
+    for league in LEAGUES:
+        files = selected[selected['file_path'].str.startswith(f"{league}/")]
+
+        if files.empty:
+            print(f"  ⚠ No files found for {league} in {os.path.join(csv_dir, league)}")
+            continue
+
+        league_name = league.replace("_", " ")
+        league_stats[league_name] = 0
+
+        for row in files.itertuples():
+            file = os.path.join(csv_dir, row.file_path)
+            if incremental:
+                changed, size, mtime, content_hash = check_file(conn, file, row.file_path)
+                if not changed:
+                    skipped_files += 1
+                    print(f"  · {os.path.basename(file):40s} → unchanged, skipped")
+                    continue
+            else:
+                stat = os.stat(file)
+                size, mtime, content_hash = stat.st_size, stat.st_mtime, hash_file(file)
+            pending.append((row.file_path, league_name, row.season, size, mtime, content_hash))
+
+    def store(rel_path, league_name, frames, size, mtime, content_hash):
+        """The single writer: load one file's frames and record it in the manifest."""
+        nonlocal total_loaded
+        matches_count = 0
+        # Incremental: upserts, the rows the new version dropped and the manifest
+        # entry share one transaction. Full reload: bulk_insert commits once per
+        # chunk of rows
+        with conn:
+            if incremental:
+                reset_file_keys(conn)
+            for df in frames:
+                validator.check(df)
+                write_start = time.perf_counter()
+                if incremental:
+                    upsert_matches(conn, df)
+                    stage_file_keys(conn, df)
+                else:
+                    bulk_insert(conn, "matches", df)
+                timings['write'] += time.perf_counter() - write_start
+                matches_count += len(df)
+            if incremental:
+                removed = prune_matches(conn)
+                if removed:
+                    print(f"  ✓ {os.path.basename(rel_path):40s} → {removed:>4} rows no longer in the file removed")
+            record_file(conn, rel_path, size, mtime, content_hash, matches_count)
+
+        league_stats[league_name] += matches_count
+        total_loaded += matches_count
+        print(f"  ✓ {os.path.basename(rel_path):40s} → {matches_count:>4} matches")
+
+    if workers > 1:
+        # Workers read, clean and canonicalize whole files and send back Arrow
+        # tables; only this process touches SQLite. Files are written in the
+        # order they finish, rows within a file keep their CSV order
+        tasks = [
+            (i, os.path.join(csv_dir, rel_path), league_name, season, team_aliases)
+            for i, (rel_path, league_name, season, *_) in enumerate(pending)
+        ]
+        for i, future in parse_files(tasks, workers):
+            rel_path, league_name, _, size, mtime, content_hash = pending[i]
+            try:
+                table, parse_seconds = future.result()
+                timings['parse'] += parse_seconds
+                store(rel_path, league_name, [to_frame(table)], size, mtime, content_hash)
+            except Exception as e:
+                print(f"  ✗ Error loading {os.path.basename(rel_path)}: {e}")
+    else:
+        for rel_path, league_name, season, size, mtime, content_hash in pending:
+            file = os.path.join(csv_dir, rel_path)
+            try:
+                # Read CSV and normalize it as the workers do (raw_catalog.normalize_frame).
+                # --stream yields fixed-size chunks instead of the whole file
+                if stream:
+                    frames = iter_match_csv(file, league_name, season, args.chunksize)
+                else:
+                    frames = [read_match_csv(file, league_name, season)]
+
+                # Canonical team names, shared with the xG merge
+                frames = (canonicalize(df, team_aliases) for df in frames)
+                store(rel_path, league_name, timed(frames, timings, 'parse'), size, mtime, content_hash)
+            except Exception as e:
+                print(f"  ✗ Error loading {os.path.basename(file)}: {e}")
+
+    timings['load (wall)'] = time.perf_counter() - stage_start
+    timings['checks'] = validator.seconds
+    stage_start = time.perf_counter()
+
+    if not incremental:
+        # Natural-key index built once after the bulk load, so the next
+        # --incremental run can upsert straight away
+        ensure_incremental_schema(conn)
+
+    # Deterministic match_key for new (or re-keyed) rows
+    keyed = refresh_match_keys(conn)
+    print(f"  ✓ Match keys assigned to {keyed:,} rows")
+
+    # History of corrected scores/odds, and the partitions the marts must rebuild
+    print_capture('football_data', capture_changes(conn, 'football_data', args.chunksize))
+
+    version = bump_data_version(conn, 'ingestion')
+    print(f"  ✓ Data version {version}")
+
+    conn.close()
+    timings['index + keys'] = time.perf_counter() - stage_start
+
+    # ============================================================================
+    # 5. VALIDATE DATA
+    # ============================================================================
+    print(f"\n[5/6] Validating database...")
+    stage_start = time.perf_counter()
+
+    conn = connect(db_path, pragmas=db_pragmas)
+    cursor = conn.cursor()
+
+    # Check total records
+    cursor.execute("SELECT COUNT(*) FROM matches")
+    total_count = cursor.fetchone()[0]
+    print(f"  Total matches: {total_count:,}")
+
+    # Data-quality results for the rows loaded this run (every row on a full
+    # reload), counted while the frames were written
+    results = validator.finish()
+    checked_dates, null_dates = totals(results, 'dates_parsed')
+    valid_dates = checked_dates - null_dates
+    print(f"  Rows checked: {validator.rows:,}")
+    print_results(results)
+    run_id = write_results(conn, results, 'ingestion')
+    print(f"  ✓ Results written to {QUALITY_TABLE} (run {run_id})")
+
+    # Show date range
+    cursor.execute("SELECT MIN(date), MAX(date) FROM matches WHERE date IS NOT NULL AND date != 'NaT'")
+    date_range = cursor.fetchone()
+    if date_range[0]:
+        print(f"  Date range: {date_range[0]} to {date_range[1]}")
+
+    # Matches by league
+    print(f"\n  {'Rows upserted by league (this run)' if incremental else 'Matches by league'}:")
+    for league, count in league_stats.items():
+        print(f"    {league:20s}: {count:>5,} matches")
+
+    # Matches by season
+    cursor.execute("SELECT season, COUNT(*) FROM matches GROUP BY season ORDER BY season")
+    seasons = cursor.fetchall()
+    print("\n  Matches by season:")
+    for season, count in seasons:
+        print(f"    {season}: {count:>5,} matches")
+
+    conn.close()
+    timings['validate'] = time.perf_counter() - stage_start
+
+    # ============================================================================
+    # 6. SUMMARY
+    # ============================================================================
+    print("\n" + "=" * 60)
+    print("✅ INGESTION COMPLETE!")
+    print("=" * 60)
+    print(f"Database: {db_path}")
+    print(f"Total matches: {total_count:,}")
+    if incremental:
+        print(f"Rows upserted this run: {total_loaded:,}")
+        print(f"Files skipped (unchanged): {skipped_files}")
+    if checked_dates:
+        print(f"Valid dates: {valid_dates:,} of {checked_dates:,} loaded ({100*valid_dates/checked_dates:.1f}%)")
+    print(f"Leagues loaded: {len(league_stats)}")
+    print(f"Seasons: {len(seasons)}")
+
+    print("\nStage timing:")
+    for stage, seconds in timings.items():
+        note = f"  (summed over {workers} workers)" if stage == 'parse' and workers > 1 else ""
+        print(f"  {stage:14s}: {seconds:7.2f}s{note}")
+
+    if null_dates > 0:
+        print(f"\n⚠ Warning: {null_dates:,} loaded matches have invalid dates")
+        print("  Check the source CSV files for date formatting issues")
+
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
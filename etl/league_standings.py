@@ -0,0 +1,310 @@
+"""
+Football Data Warehouse - League Standings
+===========================================
+Builds the league table of every competition season after every matchday.
+The result is stored as a snapshot table, so the table at matchday k is one
+indexed range read and does not need the season aggregated again.
+
+Each (competition, season) takes one pass over its matches, sorted by
+matchday. Every match adds its result to both teams in a (matchday × team)
+grid, and a cumulative sum down the matchdays gives the running totals:
+played, W/D/L, goals, goal difference, points and xG. Matchdays are the
+ones derived in stg_matches, so "after matchday k" means every match with
+matchday <= k. Every team gets a row at every matchday, including teams
+without a match in that round. Missing xG counts as 0.
+
+Positions are decided by TIEBREAKERS, a list of criteria per competition,
+compared in order (higher is better):
+
+  points, goal_difference, goals_for, won, ...   any running total
+  h2h_points, h2h_goal_difference, h2h_goals_for mini-league of the matches
+                                                 played so far between the
+                                                 teams still tied
+
+La Liga and Serie A settle ties on points by head-to-head before goal
+difference. The Premier League and Bundesliga use goal difference first.
+Teams tied on every criterion are ordered by team_id.
+
+Results go to SQLite as `fct_league_standings`, one row per team per
+matchday. `through_date` is the last match date played up to that matchday,
+which standings_at() uses to answer "table as of a date". An incremental
+run rebuilds the latest season plus every (competition, season) flagged in
+changed_partitions since the last run, as the incremental dbt marts do.
+Use --full-refresh after changing TIEBREAKERS.
+
+Usage (after `dbt build`):
+    python league_standings.py [--full-refresh]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from change_capture import changed_since, utc_now
+from db_loader import bulk_insert, bump_data_version, connect, replace_table
+
+DB_PATH = "../db/footbase_big5.db"
+TABLE = "fct_league_standings"
+
+DEFAULT_TIEBREAKERS = ['points', 'goal_difference', 'goals_for']
+
+TIEBREAKERS = {
+    'premier_league': ['points', 'goal_difference', 'goals_for', 'h2h_points', 'h2h_goals_for'],
+    'bundesliga': ['points', 'goal_difference', 'goals_for', 'h2h_points', 'h2h_goals_for'],
+    'ligue_1': ['points', 'goal_difference', 'h2h_points', 'h2h_goal_difference', 'goals_for'],
+    'la_liga': ['points', 'h2h_points', 'h2h_goal_difference', 'goal_difference', 'goals_for'],
+    'serie_a': ['points', 'h2h_points', 'h2h_goal_difference', 'goal_difference', 'goals_for'],
+}
+
+INDEXES = [
+    ('ux_fct_league_standings', 'competition_id, season, matchday, position', True),
+    ('ix_fct_league_standings_team', 'team_id, season, matchday'),
+    ('ix_fct_league_standings_date', 'competition_id, season, through_date'),
+]
+
+MATCHES_SQL = """
+SELECT match_id, competition_id, season, matchday, match_date,
+       home_team_id, away_team_id, home_goals, away_goals, home_xg, away_xg
+FROM fct_matches
+"""
+
+# Running totals, in grid order
+STATS = ['played', 'won', 'drawn', 'lost', 'goals_for', 'goals_against', 'points', 'xg_for', 'xg_against']
+
+H2H = ['h2h_points', 'h2h_goal_difference', 'h2h_goals_for']
+
+
+def tiebreakers_for(competition_id, tiebreakers=None):
+    criteria = (TIEBREAKERS if tiebreakers is None else tiebreakers).get(competition_id, DEFAULT_TIEBREAKERS)
+    unknown = set(criteria) - set(STATS) - {'goal_difference', 'xg_difference'} - set(H2H)
+    if unknown:
+        raise ValueError(f"Unknown tiebreakers for {competition_id}: {sorted(unknown)}")
+    return criteria
+
+
+def side_stats(goals_for, goals_against, xg_for, xg_against):
+    """Per-match (n × len(STATS)) increments for one side."""
+    won = goals_for > goals_against
+    drawn = goals_for == goals_against
+    return np.column_stack([
+        np.ones_like(goals_for), won, drawn, goals_for < goals_against,
+        goals_for, goals_against, 3 * won + drawn, xg_for, xg_against,
+    ]).astype(float)
+
+
+class SeasonTable:
+    """Running totals of one competition season, and the table after any matchday."""
+
+    def __init__(self, matches, criteria):
+        self.criteria = criteria
+        self.teams = np.unique(np.concatenate([matches['home_team_id'], matches['away_team_id']]))
+        self.home = np.searchsorted(self.teams, matches['home_team_id'].to_numpy())
+        self.away = np.searchsorted(self.teams, matches['away_team_id'].to_numpy())
+        self.home_goals = matches['home_goals'].to_numpy(dtype=float)
+        self.away_goals = matches['away_goals'].to_numpy(dtype=float)
+        self.matchday = matches['matchday'].to_numpy()
+        self.matchdays = int(self.matchday.max())
+
+        home_xg = np.nan_to_num(matches['home_xg'].to_numpy(dtype=float))
+        away_xg = np.nan_to_num(matches['away_xg'].to_numpy(dtype=float))
+        grid = np.zeros((self.matchdays, len(self.teams), len(STATS)))
+        np.add.at(grid, (self.matchday - 1, self.home),
+                  side_stats(self.home_goals, self.away_goals, home_xg, away_xg))
+        np.add.at(grid, (self.matchday - 1, self.away),
+                  side_stats(self.away_goals, self.home_goals, away_xg, home_xg))
+        self.totals = np.cumsum(grid, axis=0)
+
+        # Last date played by each matchday; dates are ISO text, so max() works
+        last_dates = {}
+        for matchday, date in zip(self.matchday, matches['match_date']):
+            if date is not None and date > last_dates.get(matchday, ''):
+                last_dates[matchday] = date
+        self.through_date, latest = [], None
+        for matchday in range(1, self.matchdays + 1):
+            latest = max(latest or '', last_dates.get(matchday, '')) or None
+            self.through_date.append(latest)
+
+    def stats_after(self, matchday):
+        """{name: array over teams} of the running totals after `matchday`."""
+        totals = self.totals[matchday - 1]
+        stats = {name: totals[:, i] for i, name in enumerate(STATS)}
+        stats['goal_difference'] = stats['goals_for'] - stats['goals_against']
+        stats['xg_difference'] = stats['xg_for'] - stats['xg_against']
+        return stats
+
+    def head_to_head(self, group, matchday):
+        """{h2h criterion: array over `group`} from the matches among `group` up to `matchday`."""
+        member = np.zeros(len(self.teams), dtype=bool)
+        member[group] = True
+        played = (self.matchday <= matchday) & member[self.home] & member[self.away]
+        home, away = self.home[played], self.away[played]
+        home_goals, away_goals = self.home_goals[played], self.away_goals[played]
+
+        points = np.zeros(len(self.teams))
+        goals_for = np.zeros(len(self.teams))
+        goals_against = np.zeros(len(self.teams))
+        np.add.at(points, home, 3 * (home_goals > away_goals) + (home_goals == away_goals))
+        np.add.at(points, away, 3 * (away_goals > home_goals) + (home_goals == away_goals))
+        np.add.at(goals_for, home, home_goals)
+        np.add.at(goals_for, away, away_goals)
+        np.add.at(goals_against, home, away_goals)
+        np.add.at(goals_against, away, home_goals)
+        return {
+            'h2h_points': points[group],
+            'h2h_goal_difference': (goals_for - goals_against)[group],
+            'h2h_goals_for': goals_for[group],
+        }
+
+    def order(self, matchday):
+        """Team indices in table order after `matchday`."""
+        stats = self.stats_after(matchday)
+
+        def split(group, criteria):
+            if len(group) == 1 or not criteria:
+                return sorted(group)    # teams are sorted by team_id
+            name, rest = criteria[0], criteria[1:]
+            if name in H2H:
+                values = self.head_to_head(group, matchday)[name]
+            else:
+                values = stats[name][group]
+            ordered = []
+            for value in np.unique(values)[::-1]:
+                ordered.extend(split(group[values == value], rest))
+            return ordered
+
+        return split(np.arange(len(self.teams)), self.criteria)
+
+    def rows(self, competition_id, season):
+        """One row per team per matchday, in table order."""
+        orders = np.array([self.order(matchday) for matchday in range(1, self.matchdays + 1)])
+        totals = np.take_along_axis(self.totals, orders[:, :, None], axis=1).reshape(-1, len(STATS))
+        stats = dict(zip(STATS, totals.T))
+        teams = len(self.teams)
+        return pd.DataFrame({
+            'competition_id': competition_id,
+            'season': season,
+            'matchday': np.repeat(np.arange(1, self.matchdays + 1), teams),
+            'through_date': np.repeat(np.array(self.through_date, dtype=object), teams),
+            'position': np.tile(np.arange(1, teams + 1), self.matchdays),
+            'team_id': self.teams[orders.ravel()],
+            'played': stats['played'].astype(int),
+            'won': stats['won'].astype(int),
+            'drawn': stats['drawn'].astype(int),
+            'lost': stats['lost'].astype(int),
+            'goals_for': stats['goals_for'].astype(int),
+            'goals_against': stats['goals_against'].astype(int),
+            'goal_difference': (stats['goals_for'] - stats['goals_against']).astype(int),
+            'points': stats['points'].astype(int),
+            'xg_for': stats['xg_for'],
+            'xg_against': stats['xg_against'],
+            'xg_difference': stats['xg_for'] - stats['xg_against'],
+        })
+
+
+def build_standings(matches, tiebreakers=None):
+    """Standings of every competition season in `matches` after every matchday."""
+    matches = matches.sort_values(['competition_id', 'season', 'matchday', 'match_id'], ignore_index=True)
+    frames = []
+    for (competition_id, season), season_matches in matches.groupby(['competition_id', 'season'], sort=False):
+        table = SeasonTable(season_matches, tiebreakers_for(competition_id, tiebreakers))
+        frames.append(table.rows(competition_id, season))
+    return pd.concat(frames, ignore_index=True)
+
+
+def table_exists(conn, table=TABLE):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+
+def has_audit_column(conn, table=TABLE):
+    """Tables written before _created_at existed get rebuilt in full once."""
+    return any(row[1] == '_created_at' for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def partition_filter(since_season, changed):
+    """(sql, params) selecting seasons >= `since_season` and the (competition_id, season) pairs in `changed`."""
+    sql, params = "season >= ?", [since_season]
+    if changed:
+        sql += f" OR (competition_id, season) IN (VALUES {', '.join(['(?, ?)'] * len(changed))})"
+        params += [value for pair in changed for value in pair]
+    return sql, params
+
+
+def load_matches(conn, since_season=None, changed=()):
+    """fct_matches rows, optionally only seasons >= `since_season` and the `changed` partitions."""
+    if since_season is None:
+        return pd.read_sql_query(MATCHES_SQL, conn)
+    where, params = partition_filter(since_season, changed)
+    return pd.read_sql_query(f"{MATCHES_SQL} WHERE {where}", conn, params=params)
+
+
+def update_standings(conn, full_refresh=False, tiebreakers=None):
+    """
+    Bring fct_league_standings up to date with fct_matches. Returns the
+    number of rows written.
+    """
+    if full_refresh or not table_exists(conn) or not has_audit_column(conn):
+        rows = build_standings(load_matches(conn), tiebreakers)
+        rows['_created_at'] = utc_now()
+        replace_table(conn, TABLE, rows, INDEXES)
+        bump_data_version(conn, 'league_standings')
+        return len(rows)
+
+    since = conn.execute(f"SELECT max(season) FROM {TABLE}").fetchone()[0]
+    changed = changed_since(conn, TABLE)
+    rows = build_standings(load_matches(conn, since_season=since, changed=changed), tiebreakers)
+    rows['_created_at'] = utc_now()
+    where, params = partition_filter(since, changed)
+    with conn:
+        conn.execute(f"DELETE FROM {TABLE} WHERE {where}", params)
+    bulk_insert(conn, TABLE, rows)
+    bump_data_version(conn, 'league_standings')
+    return len(rows)
+
+
+def standings_at(conn, competition_id, season, matchday=None, date=None):
+    """
+    The table after `matchday`, or after the last matchday played by `date`
+    ('YYYY-MM-DD'), or at the end of the season if neither is given.
+    """
+    return pd.read_sql_query(f"""
+        SELECT * FROM {TABLE}
+        WHERE competition_id = :competition_id AND season = :season
+          AND matchday = (
+              SELECT max(matchday) FROM {TABLE}
+              WHERE competition_id = :competition_id AND season = :season
+                AND (:matchday IS NULL OR matchday <= :matchday)
+                AND (:date IS NULL OR substr(through_date, 1, 10) <= :date)
+          )
+        ORDER BY position
+    """, conn, params={'competition_id': competition_id, 'season': season,
+                       'matchday': matchday, 'date': date})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build league standings after every matchday")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--full-refresh", action="store_true", help="Rebuild every season")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("League Standings")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    conn = connect(args.db)
+    try:
+        written = update_standings(conn, full_refresh=args.full_refresh)
+        total = conn.execute(f"SELECT count(*) FROM {TABLE}").fetchone()[0]
+    finally:
+        conn.close()
+
+    print(f"  ✓ Wrote {written:,} rows → {TABLE} ({total:,} rows)")
+    print("=" * 60)
+    print(f"✅ Done ({time.perf_counter() - start:.2f}s)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Football Data Warehouse - Ingestion Manifest
+=============================================
+Helpers for incremental CSV ingestion: tracks every raw file that has been
+loaded (size, mtime, content hash, row count) and upserts match rows on the
+natural key (league, season, date, home_team, away_team). Each natural key
+also gets a deterministic 64-bit `match_key`, the warehouse's match_id.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+
+from db_loader import frame_rows, insert_sql
+
+# Columns written by the CSV loaders, in table order
+MATCH_COLUMNS = [
+    'date', 'home_team', 'away_team', 'home_goals', 'away_goals', 'result',
+    'home_shots', 'away_shots', 'home_shots_on_target', 'away_shots_on_target',
+    'odds_home', 'odds_draw', 'odds_away', 'league', 'season'
+]
+
+# Natural key of a fixture. NULL dates are folded to '' so that rows whose
+# date failed to parse still upsert instead of piling up as duplicates.
+NATURAL_KEY = "league, season, coalesce(date, ''), home_team, away_team"
+
+MATCHES_DDL = """
+CREATE TABLE IF NOT EXISTS matches (
+    date TEXT,
+    home_team TEXT,
+    away_team TEXT,
+    home_goals INTEGER,
+    away_goals INTEGER,
+    result TEXT,
+    home_shots INTEGER,
+    away_shots INTEGER,
+    home_shots_on_target INTEGER,
+    away_shots_on_target INTEGER,
+    odds_home REAL,
+    odds_draw REAL,
+    odds_away REAL,
+    league TEXT,
+    season TEXT,
+    match_key INTEGER
+);
+"""
+
+MANIFEST_DDL = """
+CREATE TABLE IF NOT EXISTS ingest_manifest (
+    file_path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    content_hash TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    loaded_at TEXT NOT NULL
+);
+"""
+
+KEY_INDEX = "ux_matches_natural_key"
+MATCH_KEY_INDEX = "ux_matches_match_key"
+# Temp table of the natural keys in the file being upserted
+FILE_KEYS = "_file_keys"
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ensure_incremental_schema(conn):
+    """
+    Create `matches`, `ingest_manifest` and the natural-key unique index if
+    they are missing.
+
+    A `matches` table left behind by a full reload (or replaced by the merge
+    script) has no unique index, so before creating it we normalise
+    timestamp-style dates back to YYYY-MM-DD and drop exact key duplicates,
+    keeping the earliest row.
+    """
+    cursor = conn.cursor()
+    cursor.execute(MATCHES_DDL)
+    cursor.execute(MANIFEST_DDL)
+
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (KEY_INDEX,)
+    )
+    if cursor.fetchone() is None:
+        cursor.execute("UPDATE matches SET date = substr(date, 1, 10) WHERE length(date) > 10")
+        cursor.execute(f"""
+            DELETE FROM matches
+            WHERE rowid NOT IN (
+                SELECT MIN(rowid) FROM matches GROUP BY {NATURAL_KEY}
+            )
+        """)
+        removed = cursor.rowcount
+        cursor.execute(f"CREATE UNIQUE INDEX {KEY_INDEX} ON matches ({NATURAL_KEY})")
+        if removed:
+            print(f"  ℹ Removed {removed:,} duplicate fixtures before indexing")
+    conn.commit()
+
+
+def match_key(league, season, date, home_team, away_team):
+    """
+    Signed 64-bit integer derived from the fixture's natural key (first 8
+    bytes of a BLAKE2b digest). Depends only on the key values, never on
+    load order, and timestamp-style dates hash like their YYYY-MM-DD prefix.
+    """
+    raw = "|".join([league or '', season or '', (date or '')[:10], home_team or '', away_team or ''])
+    digest = hashlib.blake2b(raw.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def refresh_match_keys(conn):
+    """
+    (Re)compute `matches.match_key` wherever it is missing or stale (new
+    rows, renamed teams, a table replaced by the merge script) and rebuild
+    its unique index. Returns the number of rows whose key changed.
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(matches)")}
+    conn.create_function("match_key", 5, match_key, deterministic=True)
+    with conn:
+        if "match_key" not in existing:
+            conn.execute("ALTER TABLE matches ADD COLUMN match_key INTEGER")
+        # Dropped while keys are rewritten so a stale key can never collide
+        conn.execute(f"DROP INDEX IF EXISTS {MATCH_KEY_INDEX}")
+        cursor = conn.execute("""
+            UPDATE matches
+            SET match_key = match_key(league, season, date, home_team, away_team)
+            WHERE match_key IS NOT match_key(league, season, date, home_team, away_team)
+        """)
+        conn.execute(f"CREATE UNIQUE INDEX {MATCH_KEY_INDEX} ON matches (match_key)")
+    return cursor.rowcount
+
+
+def check_file(conn, path, rel_path):
+    """
+    Compare a file on disk against its manifest entry.
+
+    Returns (changed, size, mtime, content_hash). The content hash is only
+    computed when size or mtime differ from the manifest, so an untouched
+    tree costs one stat() per file. A file that was touched but whose bytes
+    are identical gets its mtime refreshed and is reported as unchanged.
+    """
+    stat = os.stat(path)
+    size, mtime = stat.st_size, stat.st_mtime
+
+    row = conn.execute(
+        "SELECT size, mtime, content_hash FROM ingest_manifest WHERE file_path = ?",
+        (rel_path,)
+    ).fetchone()
+
+    if row is not None and row[0] == size and row[1] == mtime:
+        return False, size, mtime, row[2]
+
+    content_hash = hash_file(path)
+    if row is not None and row[2] == content_hash:
+        with conn:
+            conn.execute(
+                "UPDATE ingest_manifest SET size = ?, mtime = ? WHERE file_path = ?",
+                (size, mtime, rel_path)
+            )
+        return False, size, mtime, content_hash
+
+    return True, size, mtime, content_hash
+
+
+def upsert_matches(conn, df):
+    """
+    Insert or update match rows on the natural key.
+
+    Only the columns present in `df` are written, so columns maintained by
+    later stages (home_xg/away_xg from the merge script) are left untouched
+    on existing rows. Does not commit.
+    """
+    cols = [c for c in MATCH_COLUMNS if c in df.columns]
+    updates = ", ".join(f"{c} = excluded.{c}" for c in cols)
+    sql = insert_sql("matches", cols, f"ON CONFLICT ({NATURAL_KEY}) DO UPDATE SET {updates}")
+    conn.executemany(sql, frame_rows(df, cols))
+
+
+def delete_matches(conn, df):
+    """Delete the rows whose natural key appears in `df`. Does not commit. Returns rows deleted."""
+    cursor = conn.executemany(
+        """
+        DELETE FROM matches
+        WHERE league = ? AND season = ? AND coalesce(date, '') = coalesce(?, '')
+          AND home_team = ? AND away_team = ?
+        """,
+        frame_rows(df, ['league', 'season', 'date', 'home_team', 'away_team'])
+    )
+    return cursor.rowcount
+
+
+def reset_file_keys(conn):
+    """Start an empty key set for the next file (a failed file may have left one behind)."""
+    conn.execute(f"DROP TABLE IF EXISTS temp.{FILE_KEYS}")
+    conn.execute(f"CREATE TEMP TABLE {FILE_KEYS} (league, season, date, home_team, away_team)")
+
+
+def stage_file_keys(conn, df):
+    """
+    Remember the natural keys of a file being upserted, for prune_matches.
+    Call once per frame of the file, after reset_file_keys. Does not commit.
+    """
+    conn.executemany(
+        f"INSERT INTO {FILE_KEYS} VALUES (?, ?, coalesce(?, ''), ?, ?)",
+        frame_rows(df, ['league', 'season', 'date', 'home_team', 'away_team'])
+    )
+
+
+def prune_matches(conn):
+    """
+    Delete the rows of the staged file's (league, season) sources that its
+    new version no longer contains: fixtures that were re-dated, renamed or
+    removed upstream. A selected file is the only source of its seasons, so
+    after the upsert these rows are exactly what a full reload would not load.
+    Does not commit. Returns rows deleted.
+    """
+    conn.execute(f"CREATE INDEX IF NOT EXISTS temp.ix{FILE_KEYS} ON {FILE_KEYS} "
+                 "(league, season, date, home_team, away_team)")
+    cursor = conn.execute(f"""
+        DELETE FROM matches
+        WHERE (league, season) IN (SELECT DISTINCT league, season FROM {FILE_KEYS})
+          AND NOT EXISTS (
+              SELECT 1 FROM {FILE_KEYS} k
+              WHERE k.league = matches.league AND k.season = matches.season
+                AND k.date = coalesce(matches.date, '')
+                AND k.home_team = matches.home_team AND k.away_team = matches.away_team
+          )
+    """)
+    removed = cursor.rowcount
+    conn.execute(f"DROP TABLE {FILE_KEYS}")
+    return removed
+
+
+def forget_file(conn, rel_path):
+    """Drop a file's manifest entry. Does not commit."""
+    conn.execute("DELETE FROM ingest_manifest WHERE file_path = ?", (rel_path,))
+
+
+def record_file(conn, rel_path, size, mtime, content_hash, row_count):
+    """Write or refresh the manifest entry for a loaded file. Does not commit."""
+    conn.execute(
+        """
+        INSERT INTO ingest_manifest (file_path, size, mtime, content_hash, row_count, loaded_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (file_path) DO UPDATE SET
+            size = excluded.size,
+            mtime = excluded.mtime,
+            content_hash = excluded.content_hash,
+            row_count = excluded.row_count,
+            loaded_at = excluded.loaded_at
+        """,
+        (rel_path, size, mtime, content_hash, row_count,
+         datetime.now().isoformat(timespec='seconds'))
+    )
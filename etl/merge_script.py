@@ -3,14 +3,63 @@ Football Data Warehouse - Merge xG Data from Understat
 ========================================================
 This script merges Football-Data.co.uk match data with Understat xG data,
 standardizing team names and updating the SQLite database.
+
+Usage:
+    python merge_script.py              # rebuild `matches` in pandas
+    python merge_script.py --in-place   # update xG in SQLite, rows that changed only
 """
 
 import pandas as pd
-import sqlite3
+import argparse
 from datetime import datetime
 
+from change_capture import capture_changes, print_capture
+from data_quality import CHECK_COLUMNS, TABLE as QUALITY_TABLE, Validator, print_results, totals, write_results
+from db_loader import bump_data_version, connect, replace_table
+from manifest import ensure_incremental_schema, refresh_match_keys
+from team_aliases import canonicalize, ensure_alias_table, load_aliases, resolve_new_aliases, understat_teams
+from fixture_matcher import match_fixtures, match_report
+from xg_merge import (
+    XG_COLUMNS, backup_changed_rows, ensure_xg_columns, exact_matched_keys, match_kind_by_league,
+    matches_with_staged_goals, merge_summary, rename_teams, rotate_backups, stage_understat,
+    unmatched_fixtures, update_xg_by_rowid, update_xg_in_place
+)
+
+parser = argparse.ArgumentParser(description="Merge Understat xG into the matches table")
+parser.add_argument(
+    "--in-place", action="store_true",
+    help="stage Understat rows in SQLite and update xG and forecasts in place"
+)
+parser.add_argument(
+    "--date-window", type=int, default=0, metavar="DAYS",
+    help="also match fixtures whose dates differ by up to DAYS (0 = exact date only)"
+)
+parser.add_argument("--db-path", default='../db/footbase_big5.db')
+parser.add_argument("--understat-csv", default='../data/raw/understat_xg_data_clean.csv')
+args = parser.parse_args()
+IN_PLACE = args.in_place
+DATE_WINDOW = args.date_window
+
+DB_PATH = args.db_path
+UNDERSTAT_CSV = args.understat_csv
+
+
+def report_quality(results):
+    """Print the data-quality results, then xG coverage by league from the xg_coverage check."""
+    print_results(results)
+    _, mismatches = totals(results, 'goals_match_understat')
+    if mismatches > 0:
+        print(f"    (Goal mismatches might indicate date/team matching issues)")
+
+    print("\n  xG coverage by league:")
+    coverage = results[results['check_name'] == 'xg_coverage'].groupby('league')[['checked', 'failed']].sum()
+    for league, (league_total, missing) in coverage.iterrows():
+        league_matched = league_total - missing
+        print(f"    {league:20s}: {league_matched:>4} / {league_total:<4} ({100*league_matched/league_total:>5.1f}%)")
+
+
 print("=" * 60)
-print("Football Data + Understat xG Merge Script")
+print(f"Football Data + Understat xG Merge Script{' (in place)' if IN_PLACE else ''}")
 print("=" * 60)
 
 # ============================================================================
@@ -18,15 +67,30 @@ print("=" * 60)
 # ============================================================================
 print("\n[1/5] Loading data...")
 
-# Load Football-Data from SQLite
-conn = sqlite3.connect('../db/footbase_big5.db')
-matches_fd = pd.read_sql_query("SELECT * FROM matches", conn)
-print(f"  ✓ Loaded {len(matches_fd):,} matches from Football-Data")
+conn = connect(DB_PATH)
+
+# Load Understat xG data (clean export: goals are renamed to *_us so they
+# can be compared with the Football-Data goals after the join)
+understat = pd.read_csv(UNDERSTAT_CSV).rename(
+    columns={'home_goals': 'home_goals_us', 'away_goals': 'away_goals_us'}
+)
+
+if IN_PLACE:
+    # Matches stay in SQLite; only make sure the xG columns, YYYY-MM-DD
+    # dates and the natural-key index are there
+    ensure_incremental_schema(conn)
+    ensure_xg_columns(conn)
+    total_fd = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+    print(f"  ✓ {total_fd:,} matches from Football-Data left in place")
+else:
+    # Load Football-Data from SQLite
+    matches_fd = pd.read_sql_query("SELECT * FROM matches", conn)
+    # xG and forecasts from a previous merge are recomputed below, match keys after the save
+    matches_fd = matches_fd.drop(columns=XG_COLUMNS + ['match_key'], errors='ignore')
+    print(f"  ✓ Loaded {len(matches_fd):,} matches from Football-Data")
+    understat['date'] = pd.to_datetime(understat['date'])
+    matches_fd['date'] = pd.to_datetime(matches_fd['date'])
 
-# Load Understat xG data
-understat = pd.read_csv('../data/raw/understat_xg_data3.csv')
-understat['date'] = pd.to_datetime(understat['date'])
-matches_fd['date'] = pd.to_datetime(matches_fd['date'])
 print(f"  ✓ Loaded {len(understat):,} matches from Understat")
 
 # ============================================================================
@@ -34,61 +98,33 @@ print(f"  ✓ Loaded {len(understat):,} matches from Understat")
 # ============================================================================
 print("\n[2/5] Standardizing team names...")
 
-# Mapping: Football-Data abbreviated names → Understat proper names
-team_name_map = {
-    # Premier League
-    'Man City': 'Manchester City',
-    'Man United': 'Manchester United',
-    'Newcastle': 'Newcastle United',
-    "Nott'm Forest": 'Nottingham Forest',
-    'West Brom': 'West Bromwich Albion',
-    'Wolves': 'Wolverhampton Wanderers',
-    
-    # La Liga
-    'Ath Bilbao': 'Athletic Club',
-    'Ath Madrid': 'Atletico Madrid',
-    'Celta': 'Celta Vigo',
-    'La Coruna': 'Deportivo La Coruna',
-    'Espanol': 'Espanyol',
-    'Vallecano': 'Rayo Vallecano',
-    'Betis': 'Real Betis',
-    'Sociedad': 'Real Sociedad',
-    'Valladolid': 'Real Valladolid',
-    'Huesca': 'SD Huesca',
-    
-    # Bundesliga
-    'Bielefeld': 'Arminia Bielefeld',
-    'Leverkusen': 'Bayer Leverkusen',
-    'Dortmund': 'Borussia Dortmund',
-    "M'gladbach": 'Borussia M.Gladbach',
-    'Ein Frankfurt': 'Eintracht Frankfurt',
-    'FC Koln': 'FC Cologne',
-    'Heidenheim': 'FC Heidenheim',
-    'Fortuna Dusseldorf': 'Fortuna Duesseldorf',
-    'Greuther Furth': 'Greuther Fuerth',
-    'Hamburg': 'Hamburger SV',
-    'Hannover': 'Hannover 96',
-    'Hertha': 'Hertha Berlin',
-    'Mainz': 'Mainz 05',
-    'Nurnberg': 'Nuernberg',
-    'RB Leipzig': 'RasenBallsport Leipzig',
-    'St Pauli': 'St. Pauli',
-    'Stuttgart': 'VfB Stuttgart',
-    
-    # Serie A
-    'Milan': 'AC Milan',
-    'Parma': 'Parma Calcio 1913',
-    'Spal': 'SPAL 2013',
-    
-    # Ligue 1
-    'Clermont': 'Clermont Foot',
-    'Paris SG': 'Paris Saint Germain',
-    'St Etienne': 'Saint-Etienne',
-}
+# Mapping: Football-Data names → Understat proper names, from the persistent
+# team_aliases table (seeded with the known abbreviations). Names seen for
+# the first time are matched within their (league, season) and written back.
+ensure_alias_table(conn)
+if IN_PLACE:
+    fd_teams = pd.read_sql_query("""
+        SELECT league, season, home_team AS team FROM matches
+        UNION
+        SELECT league, season, away_team AS team FROM matches
+    """, conn)
+else:
+    fd_teams = pd.concat([
+        matches_fd[['league', 'season', 'home_team']].rename(columns={'home_team': 'team'}),
+        matches_fd[['league', 'season', 'away_team']].rename(columns={'away_team': 'team'}),
+    ], ignore_index=True)
+new_aliases = resolve_new_aliases(conn, fd_teams, understat_teams(understat))
+for raw, canonical, score in new_aliases:
+    print(f"  + Learned alias: {raw} → {canonical} (score {score:.2f})")
+
+team_name_map = {raw: canonical for raw, canonical in load_aliases(conn).items() if raw != canonical}
 
 # Apply standardization to Football-Data
-matches_fd['home_team'] = matches_fd['home_team'].replace(team_name_map)
-matches_fd['away_team'] = matches_fd['away_team'].replace(team_name_map)
+if IN_PLACE:
+    renamed = rename_teams(conn, team_name_map)
+    print(f"  ✓ Renamed {renamed:,} team references in place")
+else:
+    canonicalize(matches_fd, team_name_map)
 print(f"  ✓ Standardized {len(team_name_map)} team names to proper format")
 
 # ============================================================================
@@ -96,19 +132,35 @@ print(f"  ✓ Standardized {len(team_name_map)} team names to proper format")
 # ============================================================================
 print("\n[3/5] Merging datasets...")
 
-# Merge on date + home_team + away_team
-merged = matches_fd.merge(
-    understat[['date', 'home_team', 'away_team', 'home_xg', 'away_xg', 
-               'home_goals_us', 'away_goals_us']],
-    on=['date', 'home_team', 'away_team'],
-    how='left',
-    indicator=True
-)
+if IN_PLACE:
+    # Stage Understat rows in an indexed temp table and join in SQLite
+    staged = stage_understat(conn, understat)
+    print(f"  ✓ Staged {staged:,} Understat rows in temp table")
+    total_matches, matched = merge_summary(conn)
+    unmatched = total_matches - matched
+elif DATE_WINDOW:
+    # Fixture key + nearest date within ±DATE_WINDOW days (goals break ties)
+    merged = match_fixtures(matches_fd, understat, window_days=DATE_WINDOW)
+    merged['_merge'] = (merged['match_kind'] != 'unmatched').map({True: 'both', False: 'left_only'})
+    merged = merged.drop(columns='day_offset')
 
-# Calculate merge statistics
-total_matches = len(merged)
-matched = (merged['_merge'] == 'both').sum()
-unmatched = (merged['_merge'] == 'left_only').sum()
+    total_matches = len(merged)
+    matched = (merged['_merge'] == 'both').sum()
+    unmatched = (merged['_merge'] == 'left_only').sum()
+else:
+    # Merge on date + home_team + away_team
+    merged = matches_fd.merge(
+        understat[['date', 'home_team', 'away_team', *XG_COLUMNS,
+                   'home_goals_us', 'away_goals_us']],
+        on=['date', 'home_team', 'away_team'],
+        how='left',
+        indicator=True
+    )
+
+    # Calculate merge statistics
+    total_matches = len(merged)
+    matched = (merged['_merge'] == 'both').sum()
+    unmatched = (merged['_merge'] == 'left_only').sum()
 
 print(f"  ✓ Total matches: {total_matches:,}")
 print(f"  ✓ Matched with xG: {matched:,} ({100*matched/total_matches:.1f}%)")
@@ -119,49 +171,94 @@ print(f"  ✓ Without xG: {unmatched:,} ({100*unmatched/total_matches:.1f}%)")
 # ============================================================================
 print("\n[4/5] Validating merge quality...")
 
-# Check goal consistency (where both datasets have data)
-has_both = merged['_merge'] == 'both'
-goal_mismatch = (
-    (merged.loc[has_both, 'home_goals'] != merged.loc[has_both, 'home_goals_us']) |
-    (merged.loc[has_both, 'away_goals'] != merged.loc[has_both, 'away_goals_us'])
-)
-
-if goal_mismatch.sum() > 0:
-    print(f"  ⚠ Warning: {goal_mismatch.sum()} matches have goal mismatches")
-    print(f"    (This might indicate date/team matching issues)")
+# The data-quality checks (goals against Understat, xG coverage, ...) run in
+# one pass over the merged rows. In place they read the stored xG, so they
+# run after the update in step 5
+validator = Validator()
+if IN_PLACE:
+    print("  ✓ Checked after the update (step 5)")
 else:
-    print(f"  ✓ All matched goals are consistent!")
-
-# Show xG coverage by league
-print("\n  xG coverage by league:")
-coverage = merged.groupby('league', as_index=False).apply(
-    lambda x: pd.Series({
-        'matched': x['home_xg'].notna().sum(),
-        'total': len(x),
-        'percentage': 100 * x['home_xg'].notna().sum() / len(x)
-    }), include_groups=False
-)
-for _, row in coverage.iterrows():
-    print(f"    {row['league']:20s}: {int(row['matched']):>4} / {int(row['total']):<4} ({row['percentage']:>5.1f}%)")
+    validator.check(merged)
+    quality = validator.finish()
+    report_quality(quality)
+
+    if DATE_WINDOW:
+        print(f"\n  Fixture matching by league (±{DATE_WINDOW} days):")
+        for league, row in match_report(merged).iterrows():
+            print(f"    {league:20s}: exact {row['exact']:>4}  near {row['near']:>4}  unmatched {row['unmatched']:>4}")
 
 # ============================================================================
 # 5. SAVE TO DATABASE
 # ============================================================================
 print("\n[5/5] Saving to database...")
 
-# Drop helper columns before saving
-merged_clean = merged.drop(columns=['_merge', 'home_goals_us', 'away_goals_us'])
+if IN_PLACE:
+    # Back up only the rows about to change, then update them in place
+    backup_name = backup_changed_rows(conn)
+    if backup_name:
+        print(f"  ✓ Backup of changed rows created: {backup_name}")
+    updated = update_xg_in_place(conn)
+    print(f"  ✓ Updated xG on {updated:,} rows (missing or changed)")
+
+    if DATE_WINDOW:
+        # Tolerant pass over every row without an exact-date counterpart,
+        # including rows near-matched on earlier runs (so revised Understat
+        # values reach them), using only the Understat fixtures that were
+        # not matched exactly
+        leftover = unmatched_fixtures(conn)
+        taken = pd.DataFrame(exact_matched_keys(conn), columns=['date', 'home_team', 'away_team'])
+        free = understat.merge(taken, how='left', indicator=True)
+        free = free[free['_merge'] == 'left_only'].drop(columns='_merge')
+        found = match_fixtures(leftover, free, window_days=DATE_WINDOW)
+        found = found[found['match_kind'] != 'unmatched']
+        near_updated = update_xg_by_rowid(conn, found)
+        matched += len(found)
+        print(f"  ✓ Matched {len(found):,} more fixtures within ±{DATE_WINDOW} days "
+              f"({near_updated:,} new or revised)")
+
+        print(f"\n  Fixture matching by league (±{DATE_WINDOW} days):")
+        for league, exact, near, unmatched_league, _ in match_kind_by_league(conn):
+            print(f"    {league:20s}: exact {exact:>4}  near {near:>4}  unmatched {unmatched_league:>4}")
+
+    print("\n  Data quality:")
+    for batch in matches_with_staged_goals(conn, CHECK_COLUMNS):
+        validator.check(batch)
+    quality = validator.finish()
+    report_quality(quality)
+    total_in_db = total_matches
+else:
+    # Drop helper columns before saving
+    merged_clean = merged.drop(columns=['_merge', 'home_goals_us', 'away_goals_us', 'match_kind'], errors='ignore')
+
+    # Backup existing table (optional but recommended)
+    backup_name = f"matches_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE TABLE {backup_name} AS SELECT * FROM matches")
+    conn.commit()
+    print(f"  ✓ Backup created: {backup_name}")
+
+    # Save merged data
+    replace_table(conn, 'matches', merged_clean)
+    print(f"  ✓ Updated 'matches' table with xG data")
+    total_in_db = len(merged_clean)
+
+# Team renames change the natural key, so re-key the affected rows
+keyed = refresh_match_keys(conn)
+print(f"  ✓ Match keys refreshed on {keyed:,} rows")
+
+# History of revised xG, and the partitions the marts must rebuild
+print_capture('understat', capture_changes(conn, 'understat'))
+
+# Keep only the newest few backup tables
+dropped = rotate_backups(conn)
+if dropped:
+    print(f"  ✓ Rotated out {len(dropped)} old backup table(s)")
 
-# Backup existing table (optional but recommended)
-backup_name = f"matches_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-cursor = conn.cursor()
-cursor.execute(f"CREATE TABLE {backup_name} AS SELECT * FROM matches")
-conn.commit()
-print(f"  ✓ Backup created: {backup_name}")
+run_id = write_results(conn, quality, 'xg_merge')
+print(f"  ✓ Data-quality results written to {QUALITY_TABLE} (run {run_id})")
 
-# Save merged data
-merged_clean.to_sql('matches', conn, if_exists='replace', index=False)
-print(f"  ✓ Updated 'matches' table with xG data")
+version = bump_data_version(conn, 'xg_merge')
+print(f"  ✓ Data version {version}")
 
 # Close connection
 conn.close()
@@ -172,7 +269,7 @@ conn.close()
 print("\n" + "=" * 60)
 print("✅ MERGE COMPLETE!")
 print("=" * 60)
-print(f"Total matches in database: {len(merged_clean):,}")
+print(f"Total matches in database: {total_in_db:,}")
 print(f"Matches with xG data: {matched:,} ({100*matched/total_matches:.1f}%)")
 print(f"Team names standardized: {len(team_name_map)}")
 print("\nNext steps:")
@@ -1,60 +1,237 @@
-import pandas as pd
+"""
+Football Data Warehouse - Parallel Season Downloader
+=====================================================
+Downloads every LEAGUES x SEASONS file from football-data.co.uk on a bounded
+thread pool sharing one keep-alive session, sends ETag / If-Modified-Since
+so unchanged files are not fetched again, and keeps an on-disk manifest so
+an interrupted run resumes where it stopped.
+
+Files are written where ingestion reads them, one folder per league:
+
+    <out-dir>/Premier_League/Premier_League_1718.csv
+
+Primeira Liga lands in Primeira_Liga/, which ingestion does not read yet
+(see LEAGUES).
+
+with the raw-layer columns (raw_catalog.RENAME_MAP) plus league and season.
+`python benchmarks/bench_downloader.py` runs it against a local stand-in
+for the site and checks the 304 replay and resume after a killed run.
+
+Usage:
+    python multiscrapper.py
+    python multiscrapper.py --workers 8 --base-url http://localhost:8000
+"""
+
+import argparse
+import io
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from raw_catalog import KEEP_COLS, RENAME_MAP
 
 BASE_URL = "https://www.football-data.co.uk/mmz4281"
+# football-data.co.uk code -> league name; the folder is the name with underscores.
+# Primeira Liga is downloaded into Primeira_Liga/ but not loaded yet:
+# ingestion_script.LEAGUES (and pipeline.LEAGUE_CSVS) cover the five leagues
+# Understat publishes xG for, and it has none for Portugal.
 LEAGUES = {
+    "E0": "Premier League",
     "D1": "Bundesliga",
     "I1": "Serie A",
     "F1": "Ligue 1",
     "SP1": "La Liga",
-    "P1" : "Primeira Liga"
+    "P1": "Primeira Liga",
 }
 
 SEASONS = ["1718", "1819", "1920", "2021", "2122", "2223", "2324", "2425"]
 
 CSV_DIR = "../data/raw"
-os.makedirs(CSV_DIR, exist_ok=True)
-
-for code, league_name in LEAGUES.items():
-    for season in SEASONS:
-        url = f"{BASE_URL}/{season}/{code}.csv"
-        print(f"📥 Downloading {league_name} {season} from {url}")
-        try:
-            df = pd.read_csv(url)
-            if df.empty:
-                print(f"⚠️ Skipped {league_name} {season} (empty file)")
-                continue
-        except Exception as e:
-            print(f"❌ Error loading {league_name} {season}: {e}")
-            continue
-
-        df = df.rename(columns={
-            'Date': 'date',
-            'HomeTeam': 'home_team',
-            'AwayTeam': 'away_team',
-            'FTHG': 'home_goals',
-            'FTAG': 'away_goals',
-            'FTR': 'result',
-            'HS': 'home_shots',
-            'AS': 'away_shots',
-            'HST': 'home_shots_on_target',
-            'AST': 'away_shots_on_target',
-            'B365H': 'odds_home',
-            'B365D': 'odds_draw',
-            'B365A': 'odds_away'
-        })
-
-        keep_cols = [
-            'date', 'home_team', 'away_team', 'home_goals', 'away_goals', 'result',
-            'home_shots', 'away_shots', 'home_shots_on_target', 'away_shots_on_target',
-            'odds_home', 'odds_draw', 'odds_away'
+MANIFEST_NAME = ".download_manifest.json"
+MAX_WORKERS = 6
+TIMEOUT = 30
+
+
+class DownloadManifest:
+    """
+    JSON manifest of validators (ETag / Last-Modified) per URL plus the state
+    of the current run. Saved atomically after every completed file so a
+    crash loses at most the downloads that were in flight.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = {"files": {}, "run": None}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def start_run(self):
+        """Resume an unfinished run, or start a new one. Returns keys already done."""
+        run = self.data.get("run")
+        if run and not run.get("finished"):
+            return set(run["done"])
+        self.data["run"] = {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "finished": False,
+            "done": [],
+        }
+        self.save()
+        return set()
+
+    def finish_run(self):
+        with self._lock:
+            self.data["run"]["finished"] = True
+            self._save_locked()
+
+    def validators(self, url):
+        return self.data["files"].get(url, {})
+
+    def mark_done(self, key, url, entry=None):
+        with self._lock:
+            if entry is not None:
+                self.data["files"][url] = entry
+            self.data["run"]["done"].append(key)
+            self._save_locked()
+
+    def save(self):
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def make_session(pool_size):
+    """requests session with a keep-alive pool sized to the worker count and retries."""
+    retry = Retry(
+        total=4,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def transform(raw_bytes, league_name, season):
+    """Parse a football-data.co.uk CSV into the raw-layer column layout."""
+    df = pd.read_csv(io.BytesIO(raw_bytes))
+    df = df.rename(columns=RENAME_MAP)
+    df = df[[col for col in KEEP_COLS if col in df.columns]]
+    df['league'] = league_name
+    df['season'] = f"20{season[:2]}/{season[2:]}"
+    return df
+
+
+def download_season(session, manifest, base_url, out_dir, code, league_name, season):
+    """
+    Fetch one league/season. Returns (status, message) where status is one of
+    'saved', 'unchanged', 'empty', 'missing' or 'error'.
+    """
+    url = f"{base_url}/{season}/{code}.csv"
+    key = f"{code}/{season}"
+    folder = league_name.replace(' ', '_')
+    fname = f"{folder}/{folder}_{season}.csv"
+    fpath = os.path.join(out_dir, folder, f"{folder}_{season}.csv")
+
+    headers = {}
+    cached = manifest.validators(url)
+    if os.path.exists(fpath):
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        response = session.get(url, headers=headers, timeout=TIMEOUT)
+        if response.status_code == 304:
+            manifest.mark_done(key, url)
+            return "unchanged", f"⏭️ {league_name} {season} not modified"
+        if response.status_code == 404:
+            # Season not published (yet); nothing to retry on resume
+            manifest.mark_done(key, url)
+            return "missing", f"⚠️ Skipped {league_name} {season} (not found)"
+        response.raise_for_status()
+
+        df = transform(response.content, league_name, season)
+        if df.empty:
+            manifest.mark_done(key, url)
+            return "empty", f"⚠️ Skipped {league_name} {season} (empty file)"
+
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+        tmp_path = fpath + ".part"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, fpath)
+    except Exception as e:
+        return "error", f"❌ Error loading {league_name} {season}: {e}"
+
+    manifest.mark_done(key, url, {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "file": fname,
+        "rows": len(df),
+        "downloaded_at": datetime.now().isoformat(timespec="seconds"),
+    })
+    return "saved", f"💾 Saved {fpath} ({len(df)} rows)"
+
+
+def run(base_url=BASE_URL, out_dir=CSV_DIR, workers=MAX_WORKERS, leagues=LEAGUES, seasons=SEASONS):
+    """Download every league/season not already done in this run. Returns status counts."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = DownloadManifest(os.path.join(out_dir, MANIFEST_NAME))
+    already_done = manifest.start_run()
+    if already_done:
+        print(f"↩️ Resuming interrupted run ({len(already_done)} files already done)")
+
+    jobs = [
+        (code, league_name, season)
+        for code, league_name in leagues.items()
+        for season in seasons
+        if f"{code}/{season}" not in already_done
+    ]
+
+    counts = {"saved": 0, "unchanged": 0, "empty": 0, "missing": 0, "error": 0}
+    session = make_session(workers)
+    with session, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(download_season, session, manifest, base_url.rstrip("/"), out_dir, *job)
+            for job in jobs
         ]
-        df = df[[col for col in keep_cols if col in df.columns]]
-        df['league'] = league_name
-        df['season'] = f"20{season[:2]}/{season[2:]}"
-
-        # Save file
-        fname = f"{league_name.replace(' ', '_')}_{season}.csv"
-        fpath = os.path.join(CSV_DIR, fname)
-        df.to_csv(fpath, index=False)
-        print(f"💾 Saved {fpath} ({len(df)} rows)")
\ No newline at end of file
+        for future in as_completed(futures):
+            status, message = future.result()
+            counts[status] += 1
+            print(message)
+
+    # Errors leave the run open so the next invocation retries only those files
+    if counts["error"] == 0:
+        manifest.finish_run()
+
+    print(
+        f"✅ Done: {counts['saved']} saved, {counts['unchanged']} unchanged, "
+        f"{counts['empty']} empty, {counts['missing']} missing, {counts['error']} errors"
+    )
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download football-data.co.uk seasons")
+    parser.add_argument("--base-url", default=BASE_URL, help="mirror or local stand-in serving <season>/<code>.csv")
+    parser.add_argument("--out-dir", default=CSV_DIR)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+    run(base_url=args.base_url, out_dir=args.out_dir, workers=args.workers)
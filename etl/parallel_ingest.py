@@ -0,0 +1,55 @@
+"""
+Football Data Warehouse - Parallel CSV Parsing
+===============================================
+Reads and normalizes raw CSVs in a ProcessPoolExecutor. Each worker applies
+raw_catalog.normalize_frame (the Football-Data rename map and keep_cols,
+DD/MM/YYYY dates, league and season tags), as the single-process path does,
+and canonicalizes team names. It then returns the
+rows as an Arrow table, which crosses the process boundary as compact
+buffers rather than pickled Python objects.
+
+Workers never touch SQLite. The caller iterates parse_files() and is the
+single writer that owns the connection.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import pyarrow as pa
+
+from raw_catalog import CSV_DTYPES, normalize_frame
+from team_aliases import canonicalize
+
+# Nullable integer columns come back as Int16 rather than float64
+_ARROW_TYPES = {pa.int16(): pd.Int16Dtype()}.get
+
+
+def parse_file(path, league_name, season=None, aliases=None):
+    """Worker: read and normalize one CSV. Returns (arrow_table, seconds)."""
+    start = time.perf_counter()
+    df = normalize_frame(pd.read_csv(path, dtype=CSV_DTYPES), league_name, season)
+    if aliases:
+        canonicalize(df, aliases)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    return table, time.perf_counter() - start
+
+
+def to_frame(table):
+    """Arrow table from a worker -> DataFrame for the SQLite writer."""
+    return table.to_pandas(types_mapper=_ARROW_TYPES)
+
+
+def parse_files(tasks, workers):
+    """
+    Parse `tasks` on `workers` processes. Each task is a (key, path,
+    league_name, season, aliases) tuple. Yields (key, future) in completion
+    order; future.result() returns parse_file's result or raises its error.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(parse_file, path, league_name, season, aliases): key
+            for key, path, league_name, season, aliases in tasks
+        }
+        for future in as_completed(futures):
+            yield futures[future], future
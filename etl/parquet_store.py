@@ -0,0 +1,181 @@
+"""
+Football Data Warehouse - Parquet Staging Layer
+================================================
+Writes the warehouse tables as Parquet datasets under data/parquet/, one
+directory per dataset, hive-partitioned by league and season:
+
+    data/parquet/fct_matches/competition_id=premier_league/season=2017%2F18/part-0.parquet
+
+Datasets:
+  matches                 ETL raw layer (SQLite `matches`)
+  understat               cleaned Understat xG (understat_xg_data_clean.csv)
+  fct_matches             dbt mart
+  fct_team_season_stats   dbt mart
+  dim_teams               dbt mart (partitioned by league only)
+
+Partition values are URI-encoded in directory names ('2017/18' is stored as
+'2017%2F18'). Readers get the decoded value back.
+
+Reader API:
+    from parquet_store import read_dataset
+    df = read_dataset("fct_matches", columns=["match_date", "home_xg"],
+                      filters={"competition_id": "serie_a", "season": ["2022/23", "2023/24"]})
+
+`columns` limits which column chunks are read. Filters on partition columns
+skip whole directories. Filters on other columns are pushed down to the
+Parquet row-group statistics.
+
+Usage (after ingestion, the xG merge and `dbt build`):
+    python parquet_store.py
+"""
+
+import os
+import shutil
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from db_loader import connect
+
+DB_PATH = "../db/footbase_big5.db"
+PARQUET_DIR = "../data/parquet"
+UNDERSTAT_CSV = "../data/raw/understat_xg_data_clean.csv"
+
+# dataset -> (source, partition columns, sort order within a partition).
+# A source ending in .csv is read from disk, anything else is a SQLite table
+DATASETS = {
+    'matches': ('matches', ['league', 'season'], ['date', 'home_team']),
+    'understat': (UNDERSTAT_CSV, ['league', 'season'], ['date', 'home_team']),
+    'fct_matches': ('fct_matches', ['competition_id', 'season'], ['match_date', 'match_id']),
+    'fct_team_season_stats': ('fct_team_season_stats', ['competition_id', 'season'], ['team_id']),
+    'dim_teams': ('dim_teams', ['league'], ['team_id']),
+}
+
+# Nullable integer columns come back as pandas nullable ints rather than float64
+_ARROW_TYPES = {
+    pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+}.get
+
+
+def load_source(conn, name):
+    """The dataset's rows as an Arrow table, sorted for good row-group statistics."""
+    source, partition_cols, order = DATASETS[name]
+    if source.endswith('.csv'):
+        df = pd.read_csv(source, dtype_backend='pyarrow')
+    else:
+        df = pd.read_sql_query(f"SELECT * FROM {source}", conn, dtype_backend='pyarrow')
+    df = df.sort_values(partition_cols + order, ignore_index=True)
+    # No pandas metadata: readers get plain NumPy/nullable dtypes, not ArrowDtype
+    return pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+
+
+def write_dataset(table, path, partition_cols):
+    """
+    Replace the dataset at `path`. Partitions are written to a sibling
+    staging directory. The old dataset is then renamed aside, the staging
+    directory renamed into place, and only then is the old one deleted. A
+    reader sees the old dataset or the new one, never a half-written or
+    half-deleted mix, and nothing at `path` only between the two renames.
+    An export killed between them leaves the old dataset at `<path>.old`,
+    which the next export puts back first.
+    """
+    staging, old = f"{path}.tmp", f"{path}.old"
+    if not os.path.exists(path) and os.path.exists(old):
+        os.replace(old, path)
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.rmtree(old, ignore_errors=True)
+    pq.write_to_dataset(
+        table, staging, partition_cols=partition_cols,
+        basename_template="part-{i}.parquet", existing_data_behavior='delete_matching'
+    )
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(staging, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def export_dataset(conn, name, root=PARQUET_DIR):
+    """Export one dataset. Returns (rows, partitions, bytes on disk)."""
+    _, partition_cols, _ = DATASETS[name]
+    table = load_source(conn, name)
+    path = os.path.join(root, name)
+    write_dataset(table, path, partition_cols)
+    files = dataset_files(name, root=root)
+    return table.num_rows, len(files), sum(os.path.getsize(f) for f in files)
+
+
+def dataset_files(name, filters=None, root=PARQUET_DIR):
+    """Parquet files a read with `filters` would open, after partition pruning."""
+    dataset = _dataset(name, root)
+    return [fragment.path for fragment in dataset.get_fragments(filter=_expression(filters))]
+
+
+def scan(name, columns=None, filters=None, root=PARQUET_DIR):
+    """Read a dataset as an Arrow table with column projection and partition pruning."""
+    return _dataset(name, root).to_table(columns=columns, filter=_expression(filters))
+
+
+def read_dataset(name, columns=None, filters=None, root=PARQUET_DIR):
+    """
+    Read a dataset into a DataFrame.
+
+    columns: list of column names to read (all when None)
+    filters: {column: value or list of values}, combined with AND
+    """
+    return scan(name, columns, filters, root).to_pandas(types_mapper=_ARROW_TYPES)
+
+
+def _dataset(name, root):
+    path = os.path.join(root, name)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No Parquet dataset at {path}; run parquet_store.py first")
+    return ds.dataset(path, format='parquet', partitioning='hive')
+
+
+def _expression(filters):
+    """{column: value | [values]} -> pyarrow dataset filter expression (None when empty)."""
+    expression = None
+    for column, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set)):
+            term = pc.field(column).isin(list(value))
+        else:
+            term = pc.field(column) == value
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def main():
+    print("=" * 60)
+    print("Parquet Staging Export")
+    print("=" * 60)
+
+    conn = connect(DB_PATH)
+    os.makedirs(PARQUET_DIR, exist_ok=True)
+
+    total_bytes = 0
+    for name in DATASETS:
+        start = time.perf_counter()
+        try:
+            rows, partitions, size = export_dataset(conn, name)
+        except Exception as e:
+            print(f"  ✗ {name:24s} → {e}")
+            continue
+        total_bytes += size
+        print(f"  ✓ {name:24s} → {rows:>6,} rows, {partitions:>3} partitions, "
+              f"{size / 1024:>7.1f} KB ({time.perf_counter() - start:.2f}s)")
+
+    conn.close()
+
+    print("=" * 60)
+    print(f"✅ Parquet datasets written to {PARQUET_DIR} ({total_bytes / 2**20:.1f} MB)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+Football Data Warehouse - Pipeline
+===================================
+One entry point for the whole refresh. The ETL scripts and dbt are stages
+of a DAG, and each stage declares:
+
+  deps      stages that must finish first
+  inputs    files it reads (globs from the project root), including its own
+            code. They are content-hashed into the stage's fingerprint,
+            together with its command and the fingerprints of its deps
+  outputs   files and tables it writes, counted after each run
+
+A stage is skipped when its fingerprint matches its last successful run
+and its outputs exist. Fetch stages (football-data.co.uk, Understat) ask a
+remote that may have changed, so they always run; their own download
+caches keep that cheap. With --offline they are skipped. A fetch stage's
+fingerprint is the hash of what it wrote, so stages downstream of an
+unchanged download are skipped too.
+
+Stages whose deps are done run in parallel, up to --workers at a time: the
+football-data download runs alongside the Understat fetch and clean. Each
+stage is a subprocess, and its output goes to logs/pipeline/<stage>.log.
+All paths are resolved from the project root and passed to the scripts, so
+the pipeline runs from any directory. dbt writes to the database named in
+profiles.yml, which must be the same file as --db.
+
+Every run appends one row per stage to `pipeline_metrics` in the warehouse:
+status (ran, skipped, failed, blocked), wall-clock seconds, output rows and
+the subprocess's peak RSS (os.wait4; sampled with psutil on Windows, and
+NULL there without it).
+
+Usage:
+    python etl/pipeline.py [--offline] [--force [STAGE ...]] [--workers 4]
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import shlex
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import pandas as pd
+
+from db_loader import bulk_insert, connect
+from manifest import hash_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ETL_DIR = os.path.join(ROOT, "etl")
+DB_PATH = os.path.join(ROOT, "db", "footbase_big5.db")
+RAW_DIR = os.path.join(ROOT, "data", "raw")
+UNDERSTAT_RAW = os.path.join(RAW_DIR, "understat_xg_data.csv")
+UNDERSTAT_CLEAN = os.path.join(RAW_DIR, "understat_xg_data_clean.csv")
+LOG_DIR = os.path.join(ROOT, "logs", "pipeline")
+DBT_COMMAND = "dbt build"
+MAX_WORKERS = 4
+
+METRICS_TABLE = "pipeline_metrics"
+
+METRICS_DDL = f"""
+CREATE TABLE IF NOT EXISTS {METRICS_TABLE} (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    fingerprint TEXT,
+    started_at TEXT NOT NULL,
+    seconds REAL,
+    output_rows INTEGER,
+    peak_rss_mb REAL,
+    exit_code INTEGER
+);
+"""
+
+METRICS_INDEX = f"CREATE INDEX IF NOT EXISTS ix_{METRICS_TABLE}_stage ON {METRICS_TABLE} (stage, started_at)"
+
+# Football-Data league folders under data/raw (ingestion_script.LEAGUES)
+LEAGUE_CSVS = [f"data/raw/{league}/*.csv"
+               for league in ["Premier_League", "La_Liga", "Bundesliga", "Serie_A", "Ligue_1"]]
+
+LOADER_CODE = ["etl/db_loader.py", "etl/manifest.py", "etl/team_aliases.py", "etl/data_quality.py",
+               "etl/change_capture.py"]
+
+MARTS = ["fct_matches", "fct_team_season_stats", "fct_team_form",
+         "fct_match_probabilities", "fct_forecast_calibration", "fct_forecast_scores"]
+
+
+class Stage:
+    """One step of the pipeline: a command plus what it reads and writes."""
+
+    def __init__(self, name, command, deps=(), inputs=(), output_files=(), output_tables=(),
+                 cwd=ETL_DIR, fetch=False):
+        self.name = name
+        self.command = command
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.output_files = list(output_files)
+        self.output_tables = list(output_tables)
+        self.cwd = cwd
+        self.fetch = fetch
+
+
+def build_stages(db_path=DB_PATH, dbt_command=DBT_COMMAND):
+    python = sys.executable
+    return [
+        Stage('football_data', [python, 'multiscrapper.py', '--out-dir', RAW_DIR],
+              inputs=['etl/multiscrapper.py'], output_files=LEAGUE_CSVS, fetch=True),
+        Stage('understat', [python, 'understat_scrapper.py', '--output-csv', UNDERSTAT_RAW],
+              inputs=['etl/understat_scrapper.py'], output_files=['data/raw/understat_xg_data.csv'],
+              fetch=True),
+        Stage('understat_clean', [python, 'understat_cleaner.py',
+                                  '--raw-csv', UNDERSTAT_RAW, '--clean-csv', UNDERSTAT_CLEAN],
+              deps=['understat'],
+              inputs=['etl/understat_cleaner.py', 'data/raw/understat_xg_data.csv'],
+              output_files=['data/raw/understat_xg_data_clean.csv']),
+        Stage('ingest', [python, 'ingestion_script.py', '--incremental',
+                         '--db-path', db_path, '--csv-dir', RAW_DIR],
+              deps=['football_data'],
+              inputs=['etl/ingestion_script.py', 'etl/raw_catalog.py', 'etl/parallel_ingest.py',
+                      *LOADER_CODE, *LEAGUE_CSVS],
+              output_tables=['matches']),
+        Stage('xg_merge', [python, 'merge_script.py', '--in-place',
+                           '--db-path', db_path, '--understat-csv', UNDERSTAT_CLEAN],
+              deps=['ingest', 'understat_clean'],
+              inputs=['etl/merge_script.py', 'etl/xg_merge.py', 'etl/fixture_matcher.py',
+                      *LOADER_CODE, 'data/raw/understat_xg_data_clean.csv'],
+              output_tables=['matches']),
+        Stage('dbt', shlex.split(dbt_command), deps=['xg_merge'],
+              inputs=['dbt_project.yml', 'models/**/*', 'macros/**/*', 'tests/**/*'],
+              output_tables=MARTS, cwd=ROOT),
+        Stage('team_ratings', [python, 'team_ratings.py', '--db', db_path], deps=['dbt'],
+              inputs=['etl/team_ratings.py', 'etl/db_loader.py'], output_tables=['fct_team_ratings']),
+        Stage('league_standings', [python, 'league_standings.py', '--db', db_path], deps=['dbt'],
+              inputs=['etl/league_standings.py', 'etl/db_loader.py'],
+              output_tables=['fct_league_standings']),
+    ]
+
+
+def expand(patterns):
+    """Project-relative files matched by `patterns`, sorted."""
+    paths = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(ROOT, pattern), recursive=True):
+            if os.path.isfile(path):
+                paths.add(os.path.relpath(path, ROOT))
+    return sorted(paths)
+
+
+def fingerprint(parts, files):
+    """SHA-256 over `parts` (strings) and the path and content hash of each file."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8') + b'\0')
+    for path in files:
+        digest.update(path.encode('utf-8') + b'\0')
+        digest.update(hash_file(os.path.join(ROOT, path)).encode('ascii'))
+    return digest.hexdigest()
+
+
+def input_fingerprint(stage, dep_fingerprints):
+    # Paths in the command are absolute; the fingerprint should not depend on the checkout location
+    command = [os.path.relpath(arg, ROOT) if os.path.isabs(arg) else arg for arg in stage.command[1:]]
+    parts = [stage.name, *command, *(dep_fingerprints[dep] for dep in stage.deps)]
+    return fingerprint(parts, expand(stage.inputs))
+
+
+def existing_tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+
+
+def outputs_exist(stage, tables):
+    files = all(expand([pattern]) for pattern in stage.output_files)
+    return files and set(stage.output_tables) <= tables
+
+
+def count_rows(stage, conn):
+    """Rows in the stage's output tables plus data lines in its output CSVs."""
+    rows = 0
+    for table in stage.output_tables:
+        rows += conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+    for path in expand(stage.output_files):
+        with open(os.path.join(ROOT, path), 'rb') as f:
+            rows += max(sum(1 for _ in f) - 1, 0)
+    return rows
+
+
+def _wait_polling(proc, interval=0.1):
+    """
+    Wait for `proc` where os.wait4 is missing (Windows), sampling its memory
+    with psutil. Returns the peak RSS in MB, or None without psutil.
+    """
+    try:
+        import psutil
+    except ImportError:
+        proc.wait()
+        return None
+    peak = 0
+    try:
+        child = psutil.Process(proc.pid)
+        while proc.poll() is None:
+            info = child.memory_info()
+            # Windows tracks the peak working set itself; elsewhere keep the largest sample
+            peak = max(peak, getattr(info, 'peak_wset', 0), info.rss)
+            time.sleep(interval)
+    except psutil.NoSuchProcess:
+        pass
+    proc.wait()
+    return peak / 2**20
+
+
+def run_command(stage, log_dir=LOG_DIR):
+    """Run the stage's command. Returns (exit code, peak RSS in MB, or None where it cannot be measured)."""
+    os.makedirs(log_dir, exist_ok=True)
+    with open(os.path.join(log_dir, f"{stage.name}.log"), 'w') as log:
+        proc = subprocess.Popen(stage.command, cwd=stage.cwd, stdout=log, stderr=subprocess.STDOUT)
+        if not hasattr(os, 'wait4'):
+            peak_rss_mb = _wait_polling(proc)
+            return proc.returncode, peak_rss_mb
+        # wait4 reports the resource usage of this child alone
+        _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in bytes on macOS and KiB on Linux
+    return proc.returncode, usage.ru_maxrss / (2**20 if sys.platform == 'darwin' else 1024)
+
+
+def last_fingerprints(conn):
+    """Fingerprint of each stage's latest successful (ran or skipped) run."""
+    if METRICS_TABLE not in existing_tables(conn):
+        return {}
+    rows = conn.execute(f"""
+        SELECT stage, fingerprint FROM {METRICS_TABLE} m
+        WHERE status IN ('ran', 'skipped')
+          AND started_at = (
+              SELECT max(started_at) FROM {METRICS_TABLE}
+              WHERE stage = m.stage AND status IN ('ran', 'skipped')
+          )
+    """).fetchall()
+    return dict(rows)
+
+
+def record_metrics(conn, metrics):
+    with conn:
+        conn.execute(METRICS_DDL)
+        conn.execute(METRICS_INDEX)
+    bulk_insert(conn, METRICS_TABLE, pd.DataFrame(metrics))
+
+
+class Pipeline:
+    """Runs Stage objects in dependency order, in parallel where the DAG allows."""
+
+    def __init__(self, stages, db_path=DB_PATH, workers=MAX_WORKERS, offline=False, force=(),
+                 log_dir=LOG_DIR):
+        self.stages = {stage.name: stage for stage in stages}
+        self.db_path = db_path
+        self.workers = workers
+        self.offline = offline
+        self.force = set(self.stages) if force is True else set(force)
+        self.log_dir = log_dir
+        self.run_id = uuid.uuid4().hex[:12]
+        for stage in stages:
+            missing = set(stage.deps) - set(self.stages)
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages: {sorted(missing)}")
+
+    def execute(self, stage, dep_fingerprints, previous):
+        """Skip or run one stage. Returns its metrics row."""
+        started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+        start = time.perf_counter()
+        conn = connect(self.db_path)
+        try:
+            tables = existing_tables(conn)
+            if stage.fetch:
+                run = not self.offline or not outputs_exist(stage, tables) or stage.name in self.force
+                key = None
+            else:
+                key = input_fingerprint(stage, dep_fingerprints)
+                run = (stage.name in self.force or previous.get(stage.name) != key
+                       or not outputs_exist(stage, tables))
+
+            exit_code = peak_rss_mb = rows = None
+            if run:
+                exit_code, peak_rss_mb = run_command(stage, self.log_dir)
+            if exit_code:
+                status = 'failed'
+            else:
+                status = 'ran' if run else 'skipped'
+                if stage.fetch:
+                    key = fingerprint([stage.name], expand(stage.output_files))
+                if run:
+                    rows = count_rows(stage, conn)
+        finally:
+            conn.close()
+
+        return {
+            'run_id': self.run_id, 'stage': stage.name, 'status': status, 'fingerprint': key,
+            'started_at': started_at, 'seconds': time.perf_counter() - start,
+            'output_rows': rows, 'peak_rss_mb': peak_rss_mb, 'exit_code': exit_code,
+        }
+
+    def run(self):
+        """Run every stage. Returns one metrics dict per stage, in completion order."""
+        conn = connect(self.db_path)
+        try:
+            previous = last_fingerprints(conn)
+        finally:
+            conn.close()
+
+        fingerprints, metrics = {}, []
+        pending = dict(self.stages)
+        failed = set()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = {}
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if set(stage.deps) & failed:
+                        del pending[name]
+                        failed.add(name)
+                        metrics.append({
+                            'run_id': self.run_id, 'stage': name, 'status': 'blocked',
+                            'fingerprint': None,
+                            'started_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"),
+                            'seconds': None, 'output_rows': None, 'peak_rss_mb': None, 'exit_code': None,
+                        })
+                    elif all(dep in fingerprints for dep in stage.deps):
+                        del pending[name]
+                        running[pool.submit(self.execute, stage, dict(fingerprints), previous)] = name
+                if not running:
+                    if pending:
+                        raise ValueError(f"Dependency cycle among stages: {sorted(pending)}")
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    row = future.result()
+                    metrics.append(row)
+                    if row['status'] == 'failed':
+                        failed.add(name)
+                    else:
+                        fingerprints[name] = row['fingerprint']
+                    print_stage(row)
+
+        conn = connect(self.db_path)
+        try:
+            record_metrics(conn, metrics)
+        finally:
+            conn.close()
+        return metrics
+
+
+def print_stage(row):
+    marker = {'ran': '✓', 'skipped': '·', 'failed': '✗', 'blocked': '✗'}[row['status']]
+    details = f"{row['seconds']:7.2f}s"
+    if row['output_rows'] is not None:
+        details += f"  {row['output_rows']:>9,} rows"
+    if row['peak_rss_mb'] is not None:
+        details += f"  {row['peak_rss_mb']:7.1f} MB peak"
+    print(f"  {marker} {row['stage']:18s} {row['status']:8s} {details}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ETL and dbt stages as one DAG")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--offline", action="store_true",
+                        help="skip the football-data and Understat fetches (when their files exist)")
+    parser.add_argument("--force", nargs="*", metavar="STAGE",
+                        help="run these stages even if unchanged (all stages if none are named)")
+    parser.add_argument("--dbt-command", default=DBT_COMMAND, help="command for the dbt stage")
+    args = parser.parse_args()
+
+    stages = build_stages(os.path.abspath(args.db), args.dbt_command)
+    force = True if args.force == [] else (args.force or ())
+    unknown = set(force if force is not True else ()) - {stage.name for stage in stages}
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    print("=" * 60)
+    print("Footbase Pipeline")
+    print("=" * 60)
+    start = time.perf_counter()
+    pipeline = Pipeline(stages, os.path.abspath(args.db), args.workers, args.offline, force)
+    metrics = pipeline.run()
+    failed = [row['stage'] for row in metrics if row['status'] in ('failed', 'blocked')]
+
+    print("=" * 60)
+    if failed:
+        print(f"❌ Failed: {', '.join(failed)} (logs in {os.path.relpath(LOG_DIR, ROOT)}/)")
+    else:
+        print(f"✅ Done ({time.perf_counter() - start:.2f}s, run {pipeline.run_id} → {METRICS_TABLE})")
+    print("=" * 60)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Football Data Warehouse - Read-Only Query Service
+==================================================
+Serves the dashboard queries from a pool of read-only SQLite connections
+(`mode=ro`). This replaces opening a new connection for every request.
+
+  team_season_stats   fct_team_season_stats rows for one team (optionally one season)
+  team_fixtures       one team's matches in a season
+  head_to_head        every meeting of two teams, both venues
+  league_table        standings of a competition season after a matchday
+                      (fct_league_standings, built by league_standings.py)
+
+Each query is a fixed SQL string with named parameters. sqlite3 keeps it
+prepared in every connection's statement cache, so it is parsed once per
+connection. Results go into an LRU cache with a TTL. Every entry is tagged
+with the warehouse's data_version stamp. The ETL writers and
+`dbt run` bump that stamp (db_loader.bump_data_version), and entries from an
+older version are never served.
+
+    from query_service import QueryService
+    with QueryService() as service:
+        table = service.league_table('premier_league', '2023/24', matchday=19)
+
+Rows come back as dicts, shared with the cache: treat them as read-only.
+`python benchmarks/bench_query_service.py` load-tests it.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from db_loader import VERSION_TABLE
+
+DB_PATH = "../db/footbase_big5.db"
+POOL_SIZE = 4
+CACHE_SIZE = 1024
+CACHE_TTL = 300         # seconds
+STATEMENT_CACHE = 64    # prepared statements kept per connection
+
+QUERIES = {
+    'team_season_stats': """
+        SELECT *
+        FROM fct_team_season_stats
+        WHERE team_id = :team_id
+          AND (:season IS NULL OR season = :season)
+        ORDER BY season, competition_id
+    """,
+    'team_fixtures': """
+        SELECT match_id, match_date, matchday, home_team_id, away_team_id,
+               home_goals, away_goals, home_xg, away_xg
+        FROM fct_matches
+        WHERE season = :season
+          AND (home_team_id = :team_id OR away_team_id = :team_id)
+        ORDER BY matchday, match_date
+    """,
+    'head_to_head': """
+        SELECT match_id, match_date, season, competition_id, matchday,
+               home_team_id, away_team_id, home_goals, away_goals, result,
+               home_xg, away_xg
+        FROM fct_matches
+        WHERE (home_team_id = :team_a AND away_team_id = :team_b)
+           OR (home_team_id = :team_b AND away_team_id = :team_a)
+        ORDER BY season, matchday, match_date
+    """,
+    'league_table': """
+        SELECT position, team_id, played, won, drawn, lost,
+               goals_for, goals_against, goal_difference, points,
+               xg_for, xg_against, xg_difference
+        FROM fct_league_standings
+        WHERE competition_id = :competition_id AND season = :season
+          AND matchday = (
+              SELECT max(matchday) FROM fct_league_standings
+              WHERE competition_id = :competition_id AND season = :season
+                AND (:matchday IS NULL OR matchday <= :matchday)
+          )
+        ORDER BY position
+    """,
+}
+
+
+class QueryCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds or when the data version moves."""
+
+    def __init__(self, max_size=CACHE_SIZE, ttl=CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """The cached value for `key` at `version`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_version, expires, value = entry
+                if entry_version == version and expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class QueryService:
+    """Named warehouse queries over a pool of read-only connections, with a version-checked cache."""
+
+    def __init__(self, db_path=DB_PATH, pool_size=POOL_SIZE, cache_size=CACHE_SIZE, ttl=CACHE_TTL):
+        self.cache = QueryCache(cache_size, ttl)
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect(db_path))
+
+    @staticmethod
+    def _connect(db_path):
+        conn = sqlite3.connect(
+            f"file:{db_path}?mode=ro", uri=True,
+            check_same_thread=False, cached_statements=STATEMENT_CACHE
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection, blocking until one is free."""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @staticmethod
+    def _data_version(conn):
+        try:
+            row = conn.execute(f"SELECT version FROM {VERSION_TABLE}").fetchone()
+        except sqlite3.OperationalError:
+            return 0    # warehouse built before the stamp existed
+        return row[0] if row else 0
+
+    def data_version(self):
+        """Current data_version stamp of the warehouse (0 if it has none)."""
+        with self.connection() as conn:
+            return self._data_version(conn)
+
+    def query(self, name, **params):
+        """Run the named query in QUERIES. Returns a tuple of row dicts, from the cache when current."""
+        key = (name, tuple(sorted(params.items())))
+        with self.connection() as conn:
+            version = self._data_version(conn)
+            rows = self.cache.get(key, version)
+            if rows is None:
+                rows = tuple(dict(row) for row in conn.execute(QUERIES[name], params))
+                self.cache.put(key, version, rows)
+        return rows
+
+    def team_season_stats(self, team_id, season=None):
+        return self.query('team_season_stats', team_id=team_id, season=season)
+
+    def team_fixtures(self, team_id, season):
+        return self.query('team_fixtures', team_id=team_id, season=season)
+
+    def head_to_head(self, team_a, team_b):
+        return self.query('head_to_head', team_a=team_a, team_b=team_b)
+
+    def league_table(self, competition_id, season, matchday=None):
+        """Standings after `matchday` (the whole season if None)."""
+        return self.query('league_table', competition_id=competition_id, season=season, matchday=matchday)
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
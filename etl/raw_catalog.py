@@ -0,0 +1,259 @@
+"""
+Football Data Warehouse - Raw File Catalog
+===========================================
+Works out which (league, season) each CSV under data/raw/<league>/ holds
+from the file *content* (its league/season columns, or the match dates when
+those are missing) rather than its name. Two downloads of the same season
+under different names, such as multiscrapper.py's `Premier_League_1718.csv`
+and scrapper.py's `Premier_League_2017-18.csv`, are never both loaded.
+
+Precedence when several files cover one (league, season):
+  1. more fixtures (a complete season beats a partial download)
+  2. more dates readable by the ingestion parser (DD/MM/YYYY)
+  3. newer file (mtime)
+  4. file path, as a deterministic tie-break
+
+The catalog is stored in the `raw_catalog` table. Files whose size and
+mtime are unchanged since the last scan are not read again.
+"""
+
+import glob
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from db_loader import frame_rows, insert_sql
+from manifest import hash_file
+
+DATE_FORMAT = '%d/%m/%Y'
+
+# Football-Data.co.uk headers -> raw-layer columns (shared with multiscrapper.py)
+RENAME_MAP = {
+    'Date': 'date',
+    'HomeTeam': 'home_team',
+    'AwayTeam': 'away_team',
+    'FTHG': 'home_goals',
+    'FTAG': 'away_goals',
+    'FTR': 'result',
+    'HS': 'home_shots',
+    'AS': 'away_shots',
+    'HST': 'home_shots_on_target',
+    'AST': 'away_shots_on_target',
+    'B365H': 'odds_home',
+    'B365D': 'odds_draw',
+    'B365A': 'odds_away'
+}
+
+KEEP_COLS = [
+    'date', 'home_team', 'away_team', 'home_goals', 'away_goals', 'result',
+    'home_shots', 'away_shots', 'home_shots_on_target', 'away_shots_on_target',
+    'odds_home', 'odds_draw', 'odds_away'
+]
+
+# Explicit dtypes so chunks never need type inference and stay compact:
+# nullable small ints (older seasons lack shot columns), categories for
+# low-cardinality labels
+CSV_DTYPES = {
+    'date': 'str',
+    'home_team': 'str',
+    'away_team': 'str',
+    'home_goals': 'Int16',
+    'away_goals': 'Int16',
+    'result': 'category',
+    'home_shots': 'Int16',
+    'away_shots': 'Int16',
+    'home_shots_on_target': 'Int16',
+    'away_shots_on_target': 'Int16',
+    'odds_home': 'float64',
+    'odds_draw': 'float64',
+    'odds_away': 'float64',
+    'league': 'category',
+    'season': 'category',
+}
+
+# Rows per chunk for streaming reads (ingestion_script.py --stream)
+STREAM_CHUNKSIZE = 50_000
+
+CATALOG_COLUMNS = [
+    'file_path', 'league', 'season', 'rows', 'parsed_dates', 'duplicate_fixtures',
+    'content_hash', 'size', 'mtime', 'selected', 'reason', 'scanned_at'
+]
+
+CATALOG_DDL = """
+CREATE TABLE IF NOT EXISTS raw_catalog (
+    file_path TEXT PRIMARY KEY,
+    league TEXT NOT NULL,
+    season TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    parsed_dates INTEGER NOT NULL,
+    duplicate_fixtures INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    selected INTEGER NOT NULL,
+    reason TEXT,
+    scanned_at TEXT NOT NULL
+);
+"""
+
+FIXTURE = ['home_team', 'away_team']
+
+
+def parse_match_dates(dates):
+    """Football-Data DD/MM/YYYY strings -> 'YYYY-MM-DD' (None where unreadable)."""
+    return pd.to_datetime(dates, format=DATE_FORMAT, errors='coerce').dt.strftime('%Y-%m-%d')
+
+
+def normalize_frame(df, league_name, season=None):
+    """
+    Raw CSV rows as ingestion loads them: Football-Data headers renamed,
+    KEEP_COLS (and season) kept, dates parsed, league set, and season filled
+    from the catalog where the file has no season column. Shared by the
+    single-process, --workers and --stream paths.
+    """
+    df = df.rename(columns=RENAME_MAP)
+    df = df[[c for c in KEEP_COLS + ['season'] if c in df.columns]].copy()
+    df['date'] = parse_match_dates(df['date'])
+    df['league'] = league_name
+    if 'season' not in df.columns:
+        df['season'] = season
+    return df
+
+
+def read_match_csv(path, league_name, season=None):
+    """Read one raw CSV the way ingestion loads it (normalize_frame)."""
+    return normalize_frame(pd.read_csv(path, dtype=CSV_DTYPES), league_name, season)
+
+
+def iter_match_csv(path, league_name, season=None, chunksize=STREAM_CHUNKSIZE):
+    """read_match_csv in chunks of `chunksize` rows, so memory does not grow with the file."""
+    for chunk in pd.read_csv(path, dtype=CSV_DTYPES, chunksize=chunksize):
+        yield normalize_frame(chunk, league_name, season)
+
+
+def infer_season(first, last):
+    """'2017/18' when the midpoint of the first and last fixture falls in Jul 2017 - Jun 2018."""
+    if pd.isna(first) or pd.isna(last):
+        return None
+    middle = first + (last - first) / 2
+    start = middle.year if middle.month >= 7 else middle.year - 1
+    return f"{start}/{str(start + 1)[-2:]}"
+
+
+def _label(values):
+    """A file's single league/season label, or 'first..last' when it spans several."""
+    values = sorted(values)
+    if not values:
+        return None
+    return values[0] if len(values) == 1 else f"{values[0]}..{values[-1]}"
+
+
+def describe_file(path, league_name, chunksize=STREAM_CHUNKSIZE):
+    """
+    Content facts for one raw file: league, season, rows, readable dates and
+    duplicate fixtures. The file is streamed in chunks; only an 8-byte hash
+    per fixture is kept for the duplicate count.
+    """
+    leagues, seasons, bounds, key_hashes = set(), set(), [], []
+    rows = parsed_dates = 0
+    for chunk in pd.read_csv(path, dtype=CSV_DTYPES, chunksize=chunksize):
+        chunk = chunk.rename(columns=RENAME_MAP)
+        rows += len(chunk)
+        for column, values in (('league', leagues), ('season', seasons)):
+            if column in chunk.columns:
+                values.update(chunk[column].dropna().unique())
+        parsed_dates += int(parse_match_dates(chunk['date']).notna().sum())
+        dates = pd.to_datetime(chunk['date'], format='mixed', dayfirst=True, errors='coerce')
+        bounds += [dates.min(), dates.max()]
+        key = [c for c in ('season', 'home_team', 'away_team') if c in chunk.columns]
+        key_hashes.append(pd.util.hash_pandas_object(chunk[key].astype(str), index=False).to_numpy())
+
+    key_hashes = np.concatenate(key_hashes) if key_hashes else np.empty(0, dtype=np.uint64)
+    bounds = [d for d in bounds if pd.notna(d)]
+    return {
+        'league': _label(leagues) or league_name,
+        'season': _label(seasons) or infer_season(min(bounds, default=pd.NaT), max(bounds, default=pd.NaT)) or 'unknown',
+        'rows': rows,
+        'parsed_dates': parsed_dates,
+        'duplicate_fixtures': int(len(key_hashes) - len(np.unique(key_hashes))),
+    }
+
+
+def _previous_scan(conn):
+    conn.execute(CATALOG_DDL)
+    previous = pd.read_sql_query("SELECT * FROM raw_catalog", conn)
+    return previous.set_index('file_path').to_dict('index')
+
+
+def scan_files(conn, csv_dir, leagues):
+    """One catalog row per raw CSV, reusing the previous scan for untouched files."""
+    previous = _previous_scan(conn)
+    now = datetime.now().isoformat(timespec='seconds')
+    rows = []
+    for league in leagues:
+        for path in sorted(glob.glob(os.path.join(csv_dir, league, "*.csv"))):
+            rel_path = os.path.relpath(path, csv_dir).replace(os.sep, "/")
+            stat = os.stat(path)
+            cached = previous.get(rel_path)
+            if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime:
+                facts = {k: cached[k] for k in ('league', 'season', 'rows', 'parsed_dates',
+                                                'duplicate_fixtures', 'content_hash', 'scanned_at')}
+            else:
+                facts = describe_file(path, league.replace("_", " "))
+                facts['content_hash'] = hash_file(path)
+                facts['scanned_at'] = now
+            rows.append({'file_path': rel_path, 'size': stat.st_size, 'mtime': stat.st_mtime, **facts})
+    return pd.DataFrame(rows, columns=[c for c in CATALOG_COLUMNS if c not in ('selected', 'reason')])
+
+
+def select_sources(catalog):
+    """Apply the precedence rule: exactly one selected file per (league, season)."""
+    ranked = catalog.sort_values(
+        ['league', 'season', 'rows', 'parsed_dates', 'mtime', 'file_path'],
+        ascending=[True, True, False, False, False, True]
+    )
+    winners = ranked.drop_duplicates(['league', 'season'])
+    catalog = catalog.copy()
+    catalog['selected'] = catalog.index.isin(winners.index)
+    chosen = winners.set_index(['league', 'season'])[['file_path', 'content_hash']]
+    reasons = []
+    for selected, league, season, content_hash in catalog[['selected', 'league', 'season', 'content_hash']].itertuples(index=False):
+        if selected:
+            reasons.append(None)
+            continue
+        winner = chosen.loc[(league, season)]
+        same = " (identical content)" if winner['content_hash'] == content_hash else ""
+        reasons.append(f"superseded by {winner['file_path']}{same}")
+    catalog['reason'] = reasons
+    return catalog
+
+
+def build_catalog(conn, csv_dir, leagues):
+    """Scan, select one source per (league, season) and store the result in `raw_catalog`."""
+    catalog = select_sources(scan_files(conn, csv_dir, leagues))
+    with conn:
+        conn.execute("DELETE FROM raw_catalog")
+        conn.executemany(insert_sql("raw_catalog", CATALOG_COLUMNS), frame_rows(catalog, CATALOG_COLUMNS))
+    return catalog
+
+
+def overlap_report(catalog, csv_dir):
+    """
+    [(league, season, chosen, [(rejected, shared_fixtures), ...])] for every
+    (league, season) covered by more than one file. Shared fixtures are
+    (home_team, away_team) pairs present in both files, compared without the
+    date so differently formatted copies are still recognised.
+    """
+    report = []
+    overlapping = catalog[catalog.duplicated(['league', 'season'], keep=False)]
+    for (league, season), group in overlapping.groupby(['league', 'season']):
+        chosen = group.loc[group['selected'], 'file_path'].iloc[0]
+        chosen_fixtures = pd.read_csv(os.path.join(csv_dir, chosen), usecols=FIXTURE).drop_duplicates()
+        rejected = []
+        for rel_path in group.loc[~group['selected'], 'file_path']:
+            fixtures = pd.read_csv(os.path.join(csv_dir, rel_path), usecols=FIXTURE).drop_duplicates()
+            rejected.append((rel_path, len(fixtures.merge(chosen_fixtures, on=FIXTURE))))
+        report.append((league, season, chosen, rejected))
+    return report
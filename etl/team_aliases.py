@@ -0,0 +1,241 @@
+"""
+Football Data Warehouse - Team Name Resolution
+===============================================
+Persistent `team_aliases` table mapping (source, raw_name) to a canonical
+team. Canonical names follow Understat's spelling and team_id follows the
+dim_teams convention (lower-case, spaces to underscores), so dbt can join
+dim_teams.team_id straight onto it.
+
+Known names resolve through an exact dictionary lookup. Names that are not
+in the table yet are matched with a fuzzy matcher that only compares teams
+inside the same (league, season) block, so it never does an all-pairs
+comparison, and the aliases it finds are written back.
+"""
+
+import re
+import unicodedata
+from datetime import datetime
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+FOOTBALL_DATA = "football_data"
+
+ALIAS_DDL = """
+CREATE TABLE IF NOT EXISTS team_aliases (
+    source TEXT NOT NULL,
+    raw_name TEXT NOT NULL,
+    team_id TEXT NOT NULL,
+    canonical_name TEXT NOT NULL,
+    method TEXT NOT NULL,
+    score REAL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (source, raw_name)
+);
+"""
+
+# Understat league codes / season start years -> Football-Data labels
+UNDERSTAT_LEAGUES = {
+    'EPL': 'Premier League',
+    'La_Liga': 'La Liga',
+    'Bundesliga': 'Bundesliga',
+    'Serie_A': 'Serie A',
+    'Ligue_1': 'Ligue 1',
+}
+
+# Football-Data abbreviated names -> Understat proper names. Seeds the
+# table; everything else is learned by the fuzzy matcher.
+SEED_ALIASES = {
+    # Premier League
+    'Man City': 'Manchester City',
+    'Man United': 'Manchester United',
+    'Newcastle': 'Newcastle United',
+    "Nott'm Forest": 'Nottingham Forest',
+    'West Brom': 'West Bromwich Albion',
+    'Wolves': 'Wolverhampton Wanderers',
+
+    # La Liga
+    'Ath Bilbao': 'Athletic Club',
+    'Ath Madrid': 'Atletico Madrid',
+    'Celta': 'Celta Vigo',
+    'La Coruna': 'Deportivo La Coruna',
+    'Espanol': 'Espanyol',
+    'Vallecano': 'Rayo Vallecano',
+    'Betis': 'Real Betis',
+    'Sociedad': 'Real Sociedad',
+    'Valladolid': 'Real Valladolid',
+    'Huesca': 'SD Huesca',
+
+    # Bundesliga
+    'Bielefeld': 'Arminia Bielefeld',
+    'Leverkusen': 'Bayer Leverkusen',
+    'Dortmund': 'Borussia Dortmund',
+    "M'gladbach": 'Borussia M.Gladbach',
+    'Ein Frankfurt': 'Eintracht Frankfurt',
+    'FC Koln': 'FC Cologne',
+    'Heidenheim': 'FC Heidenheim',
+    'Fortuna Dusseldorf': 'Fortuna Duesseldorf',
+    'Greuther Furth': 'Greuther Fuerth',
+    'Hamburg': 'Hamburger SV',
+    'Hannover': 'Hannover 96',
+    'Hertha': 'Hertha Berlin',
+    'Mainz': 'Mainz 05',
+    'Nurnberg': 'Nuernberg',
+    'RB Leipzig': 'RasenBallsport Leipzig',
+    'St Pauli': 'St. Pauli',
+    'Stuttgart': 'VfB Stuttgart',
+
+    # Serie A
+    'Milan': 'AC Milan',
+    'Parma': 'Parma Calcio 1913',
+    'Spal': 'SPAL 2013',
+
+    # Ligue 1
+    'Clermont': 'Clermont Foot',
+    'Paris SG': 'Paris Saint Germain',
+    'St Etienne': 'Saint-Etienne',
+}
+
+FUZZY_THRESHOLD = 0.6
+# When a block has exactly one unresolved name on each side, accept a weaker match
+SOLE_CANDIDATE_THRESHOLD = 0.3
+
+_NOISE_TOKENS = {'fc', 'cf', 'ac', 'afc', 'sc', 'ssc', 'sv', 'club', 'calcio', 'de', 'cd', 'ud', 'rc'}
+
+
+def team_id(name):
+    """Same rule as dim_teams / fct_matches: lower(replace(name, ' ', '_'))."""
+    return name.replace(' ', '_').lower()
+
+
+def understat_season(season):
+    """2017 -> '2017/18'"""
+    start = int(season)
+    return f"{start}/{str(start + 1)[-2:]}"
+
+
+def ensure_alias_table(conn):
+    """Create `team_aliases` and seed it with SEED_ALIASES."""
+    now = datetime.now().isoformat(timespec='seconds')
+    with conn:
+        conn.execute(ALIAS_DDL)
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO team_aliases
+                (source, raw_name, team_id, canonical_name, method, score, created_at)
+            VALUES (?, ?, ?, ?, 'seed', NULL, ?)
+            """,
+            [(FOOTBALL_DATA, raw, team_id(canonical), canonical, now)
+             for raw, canonical in SEED_ALIASES.items()]
+        )
+
+
+def load_aliases(conn, source=FOOTBALL_DATA):
+    """{raw_name: canonical_name} for one source (the exact-match fast path)."""
+    return dict(conn.execute(
+        "SELECT raw_name, canonical_name FROM team_aliases WHERE source = ?", (source,)
+    ).fetchall())
+
+
+def canonicalize(df, aliases, columns=('home_team', 'away_team')):
+    """Replace known raw names in `columns` with their canonical names (vectorized)."""
+    for col in columns:
+        df[col] = df[col].map(aliases).fillna(df[col])
+    return df
+
+
+def _normalize(name):
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode()
+    tokens = re.findall(r'[a-z0-9]+', name.lower())
+    return [t for t in tokens if t not in _NOISE_TOKENS] or tokens
+
+
+def similarity(a, b):
+    """0..1 similarity; abbreviations fully contained in the other name score high."""
+    ta, tb = _normalize(a), _normalize(b)
+    sa, sb = ' '.join(ta), ' '.join(tb)
+    score = SequenceMatcher(None, sa, sb).ratio()
+    short, long_ = (ta, tb) if len(ta) <= len(tb) else (tb, ta)
+    if short and all(any(tok.startswith(s) or s.startswith(tok) for tok in long_) for s in short):
+        score = max(score, 0.9)
+    return score
+
+
+def match_block(unknown, candidates):
+    """
+    Greedy one-to-one assignment of `unknown` names to `candidates` inside a
+    single (league, season) block. Returns [(raw, canonical, score)].
+    """
+    unknown, candidates = sorted(unknown), sorted(candidates)
+    if not unknown or not candidates:
+        return []
+    if len(unknown) == 1 and len(candidates) == 1:
+        score = similarity(unknown[0], candidates[0])
+        return [(unknown[0], candidates[0], score)] if score >= SOLE_CANDIDATE_THRESHOLD else []
+
+    scored = sorted(
+        ((similarity(u, c), u, c) for u in unknown for c in candidates),
+        reverse=True
+    )
+    taken_u, taken_c, matches = set(), set(), []
+    for score, u, c in scored:
+        if score < FUZZY_THRESHOLD:
+            break
+        if u in taken_u or c in taken_c:
+            continue
+        taken_u.add(u)
+        taken_c.add(c)
+        matches.append((u, c, score))
+    return matches
+
+
+def resolve_new_aliases(conn, fd_teams, us_teams, source=FOOTBALL_DATA):
+    """
+    Learn aliases for Football-Data names that are neither in the alias
+    table nor spelled like an Understat team in the same block.
+
+    fd_teams / us_teams are DataFrames with columns (league, season, team)
+    using Football-Data league and season labels. New aliases are written
+    back and returned as [(raw, canonical, score)].
+    """
+    aliases = load_aliases(conn, source)
+    fd = fd_teams.drop_duplicates().copy()
+    fd['team'] = fd['team'].map(aliases).fillna(fd['team'])
+    us = us_teams.drop_duplicates()
+
+    us_blocks = us.groupby(['league', 'season'])['team'].apply(set).to_dict()
+    fd_blocks = fd.groupby(['league', 'season'])['team'].apply(set).to_dict()
+
+    learned = {}
+    for block, fd_names in fd_blocks.items():
+        us_names = us_blocks.get(block)
+        if not us_names:
+            continue
+        unknown = {n for n in fd_names - us_names if n not in learned}
+        already = {learned[n][0] for n in fd_names if n in learned}
+        free = us_names - fd_names - already
+        for raw, canonical, score in match_block(unknown, free):
+            learned[raw] = (canonical, score)
+
+    now = datetime.now().isoformat(timespec='seconds')
+    with conn:
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO team_aliases
+                (source, raw_name, team_id, canonical_name, method, score, created_at)
+            VALUES (?, ?, ?, ?, 'fuzzy', ?, ?)
+            """,
+            [(source, raw, team_id(c), c, round(score, 3), now) for raw, (c, score) in learned.items()]
+        )
+    return [(raw, c, score) for raw, (c, score) in learned.items()]
+
+
+def understat_teams(understat):
+    """(league, season, team) frame from a clean Understat export, in Football-Data labels."""
+    teams = pd.concat([
+        understat[['league', 'season', 'home_team']].rename(columns={'home_team': 'team'}),
+        understat[['league', 'season', 'away_team']].rename(columns={'away_team': 'team'}),
+    ], ignore_index=True).drop_duplicates()
+    teams['league'] = teams['league'].map(UNDERSTAT_LEAGUES).fillna(teams['league'])
+    teams['season'] = teams['season'].map(understat_season)
+    return teams
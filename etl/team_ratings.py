@@ -0,0 +1,338 @@
+"""
+Football Data Warehouse - Team Ratings
+=======================================
+Rates every team before and after each match in fct_matches with two
+models:
+
+  elo       World Football Elo: home advantage, a goal-difference
+            multiplier, and a pull back towards the mean at each team's
+            first match of a new season
+  attack /  online Poisson goals model in the Dixon-Coles style (without the
+  defence   low-score correction). A side's expected goals are
+            exp(base + home + attack - opponent defence). Both ratings take a
+            gradient step on the error after each match
+
+Matches are ordered in batches. A batch is one match date within a season.
+2017/18 has no dates for four leagues, and there a batch is one matchday.
+Within a batch, matches are ordered by match_id.
+
+The models are updated with numpy, many matches per step. A match can be
+rated once both teams' previous matches are, so each step takes one layer
+of that dependency graph. A layer holds at most one match per team and
+spans dates and leagues: the full history is ~350 steps for ~1,450
+batches. The result is the same as rating one match at a time.
+
+Results go to SQLite as `fct_team_ratings`, one row per team per match,
+with pre- and post-match ratings. Every row is a checkpoint: ratings as of
+any batch are each team's last row before it. An incremental run restores
+that checkpoint at the first unrated batch and rates only from there on, so
+a new matchday costs O(new matches). A season flagged in changed_partitions
+since the last run (a corrected score) moves that start back to the
+season's first batch. Rerun with --full-refresh after changing PARAMS.
+
+Usage (after `dbt build`):
+    python team_ratings.py [--full-refresh]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from change_capture import changed_since, utc_now
+from db_loader import bulk_insert, bump_data_version, connect, replace_table
+
+DB_PATH = "../db/footbase_big5.db"
+TABLE = "fct_team_ratings"
+
+PARAMS = {
+    "elo_initial": 1500.0,
+    "elo_k": 20.0,
+    "elo_home_advantage": 60.0,
+    "season_reversion": 1 / 3,       # share of the distance to the mean dropped each new season
+    "goals_base": np.log(1.35),      # log goals per side at neutral ratings
+    "goals_home_advantage": 0.2,
+    "goals_learning_rate": 0.05,
+}
+
+INDEXES = [
+    ('ux_fct_team_ratings', 'team_id, match_id', True),
+    ('ix_fct_team_ratings_team_batch', 'team_id, rating_batch, match_id'),
+    ('ix_fct_team_ratings_batch', 'rating_batch'),
+]
+
+# One date per season, or one matchday where the date is missing. Undated
+# keys sort after dated ones, which only reorders leagues that never meet.
+BATCH_SQL = "season || '|' || coalesce(substr(match_date, 1, 10), 'md' || printf('%02d', matchday))"
+
+MATCHES_SQL = f"""
+SELECT match_id, season, competition_id, match_date, matchday,
+       home_team_id, away_team_id, home_goals, away_goals,
+       {BATCH_SQL} AS rating_batch
+FROM fct_matches
+"""
+
+# Per-match outputs of the models, one array per side
+OUTPUTS = [
+    'elo_pre', 'elo_post', 'elo_expected',
+    'attack_pre', 'attack_post', 'defence_pre', 'defence_post', 'goals_expected',
+]
+
+
+class RatingState:
+    """Current ratings per team, plus the season (start year) each team last played in."""
+
+    def __init__(self, params=None):
+        self.params = {**PARAMS, **(params or {})}
+        self.index = {}
+        self.elo = np.empty(0)
+        self.attack = np.empty(0)
+        self.defence = np.empty(0)
+        self.season = np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def from_checkpoint(cls, df, params=None):
+        """State from rows of (team_id, season, elo, attack, defence)."""
+        state = cls(params)
+        state.index = {team: i for i, team in enumerate(df['team_id'])}
+        state.elo = df['elo'].to_numpy(float, copy=True)
+        state.attack = df['attack'].to_numpy(float, copy=True)
+        state.defence = df['defence'].to_numpy(float, copy=True)
+        state.season = season_year(df['season'])
+        return state
+
+    def codes(self, teams):
+        """Integer codes for a Series of team_ids, adding unseen teams at the initial ratings."""
+        new = [team for team in pd.unique(teams) if team not in self.index]
+        if new:
+            self.index.update({team: len(self.index) + i for i, team in enumerate(new)})
+            self.elo = np.concatenate([self.elo, np.full(len(new), self.params['elo_initial'])])
+            self.attack = np.concatenate([self.attack, np.zeros(len(new))])
+            self.defence = np.concatenate([self.defence, np.zeros(len(new))])
+            self.season = np.concatenate([self.season, np.full(len(new), -1)])
+        return teams.map(self.index).to_numpy(np.int64)
+
+    def start_seasons(self, teams, year):
+        """Regress teams playing their first match of a new season towards the mean."""
+        stale = self.season[teams] != year
+        if not stale.any():
+            return
+        teams, year = teams[stale], year[stale]
+        seen = self.season[teams] >= 0
+        keep = np.where(seen, 1 - self.params['season_reversion'], 1.0)
+        initial = self.params['elo_initial']
+        self.elo[teams] = initial + (self.elo[teams] - initial) * keep
+        self.attack[teams] *= keep
+        self.defence[teams] *= keep
+        self.season[teams] = year
+
+    def update(self, idx, home, away, home_goals, away_goals, year, out):
+        """
+        Rate one layer of matches (no team twice) at once. `idx` selects the
+        layer's rows in the per-match arrays and in `out`, which receives the
+        pre/post ratings for each side.
+        """
+        h, a = home[idx], away[idx]
+        hg, ag = home_goals[idx], away_goals[idx]
+        self.start_seasons(h, year[idx])
+        self.start_seasons(a, year[idx])
+        p = self.params
+
+        # Elo
+        elo_h, elo_a = self.elo[h], self.elo[a]
+        expected = 1 / (1 + 10 ** ((elo_a - elo_h - p['elo_home_advantage']) / 400))
+        score = np.where(hg > ag, 1.0, np.where(hg == ag, 0.5, 0.0))
+        margin = np.abs(hg - ag)
+        multiplier = np.where(margin <= 1, 1.0, np.where(margin == 2, 1.5, (11 + margin) / 8))
+        delta = p['elo_k'] * multiplier * (score - expected)
+        self.elo[h] = elo_h + delta
+        self.elo[a] = elo_a - delta
+
+        # Poisson attack / defence
+        att_h, att_a = self.attack[h], self.attack[a]
+        def_h, def_a = self.defence[h], self.defence[a]
+        rate_h = np.exp(p['goals_base'] + p['goals_home_advantage'] + att_h - def_a)
+        rate_a = np.exp(p['goals_base'] + att_a - def_h)
+        step_h = p['goals_learning_rate'] * (hg - rate_h)
+        step_a = p['goals_learning_rate'] * (ag - rate_a)
+        self.attack[h] = att_h + step_h
+        self.attack[a] = att_a + step_a
+        self.defence[h] = def_h - step_a
+        self.defence[a] = def_a - step_h
+
+        for side, values in (
+            ('home', (elo_h, self.elo[h], expected, att_h, self.attack[h], def_h, self.defence[h], rate_h)),
+            ('away', (elo_a, self.elo[a], 1 - expected, att_a, self.attack[a], def_a, self.defence[a], rate_a)),
+        ):
+            for name, value in zip(OUTPUTS, values):
+                out[side][name][idx] = value
+
+
+def season_year(seasons):
+    """'2023/24' -> 2023, as an int64 array."""
+    return pd.Series(seasons).str[:4].astype(np.int64).to_numpy()
+
+
+def sort_matches(matches):
+    """Rating order: batch, then match_id within a batch."""
+    return matches.sort_values(['rating_batch', 'match_id'], ignore_index=True)
+
+
+def layers(home, away):
+    """
+    Group rows into layers that can be rated in one numpy step. A match goes
+    one layer after the later of its two teams' previous matches, so every
+    team plays at most once per layer and its matches keep their row order.
+    Returns a list of row-index arrays, in layer order.
+    """
+    last, layer = {}, np.empty(len(home), dtype=np.int64)
+    for row, (h, a) in enumerate(zip(home.tolist(), away.tolist())):
+        layer[row] = last[h] = last[a] = max(last.get(h, -1), last.get(a, -1)) + 1
+    order = np.argsort(layer, kind='stable')
+    bounds = np.flatnonzero(np.diff(layer[order])) + 1
+    return np.split(order, bounds)
+
+
+def rate(matches, state=None, params=None):
+    """
+    Rate `matches` (columns of MATCHES_SQL) in batch order, starting from
+    `state` (fresh ratings if None). Returns (team rows, updated state).
+    """
+    state = state or RatingState(params)
+    m = sort_matches(matches)
+    home = state.codes(m['home_team_id'])
+    away = state.codes(m['away_team_id'])
+    home_goals = m['home_goals'].to_numpy(float)
+    away_goals = m['away_goals'].to_numpy(float)
+    year = season_year(m['season'])
+
+    out = {side: {name: np.empty(len(m)) for name in OUTPUTS} for side in ('home', 'away')}
+    for idx in layers(home, away):
+        state.update(idx, home, away, home_goals, away_goals, year, out)
+    return team_rows(m, out), state
+
+
+def team_rows(m, out):
+    """Unpivot per-match outputs into one row per team per match."""
+    keys = ['match_id', 'season', 'competition_id', 'match_date', 'matchday', 'rating_batch']
+    sides = []
+    for side, team, opponent in (('home', 'home_team_id', 'away_team_id'),
+                                 ('away', 'away_team_id', 'home_team_id')):
+        df = m[keys].copy()
+        df.insert(1, 'team_id', m[team])
+        df.insert(2, 'opponent_id', m[opponent])
+        df['venue'] = side
+        for name in OUTPUTS:
+            df[name] = out[side][name]
+        sides.append(df)
+    return pd.concat(sides, ignore_index=True)
+
+
+def table_exists(conn, table=TABLE):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+
+def load_matches(conn, since=None):
+    """fct_matches rows to rate, optionally only batches >= `since`."""
+    if since is None:
+        return pd.read_sql_query(MATCHES_SQL, conn)
+    return pd.read_sql_query(f"{MATCHES_SQL} WHERE {BATCH_SQL} >= ?", conn, params=(since,))
+
+
+def first_unrated_batch(conn):
+    """Earliest batch holding a match that is not in fct_team_ratings yet, or None."""
+    return conn.execute(f"""
+        SELECT min({BATCH_SQL}) FROM fct_matches m
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {TABLE} r WHERE r.team_id = m.home_team_id AND r.match_id = m.match_id
+        )
+    """).fetchone()[0]
+
+
+def has_audit_column(conn, table=TABLE):
+    """Tables written before _created_at existed get re-rated in full once."""
+    return any(row[1] == '_created_at' for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def first_changed_batch(conn):
+    """
+    Batch key before every batch of the earliest season flagged in
+    changed_partitions since the last run, or None. Keys start with the
+    season, so '2019/20|' sorts before all of 2019/20.
+    """
+    changed = changed_since(conn, TABLE, columns=('season',))
+    return f"{changed[0][0]}|" if changed else None
+
+
+def load_checkpoint(conn, before):
+    """Each team's ratings after its last match in a batch before `before`."""
+    return pd.read_sql_query(f"""
+        WITH teams AS (SELECT DISTINCT team_id FROM {TABLE})
+        SELECT r.team_id, r.season, r.elo_post AS elo, r.attack_post AS attack, r.defence_post AS defence
+        FROM teams t
+        JOIN {TABLE} r
+          ON r.team_id = t.team_id
+         AND r.match_id = (
+             SELECT match_id FROM {TABLE}
+             WHERE team_id = t.team_id AND rating_batch < ?
+             ORDER BY rating_batch DESC, match_id DESC
+             LIMIT 1
+         )
+    """, conn, params=(before,))
+
+
+def update_ratings(conn, full_refresh=False, params=None):
+    """
+    Bring fct_team_ratings up to date with fct_matches. Returns the number of
+    matches rated.
+    """
+    if full_refresh or not table_exists(conn) or not has_audit_column(conn):
+        matches = load_matches(conn)
+        rows, _ = rate(matches, params=params)
+        rows['_created_at'] = utc_now()
+        replace_table(conn, TABLE, rows, INDEXES)
+        bump_data_version(conn, 'team_ratings')
+        return len(matches)
+
+    starts = [batch for batch in (first_unrated_batch(conn), first_changed_batch(conn)) if batch is not None]
+    if not starts:
+        return 0
+    start = min(starts)
+    state = RatingState.from_checkpoint(load_checkpoint(conn, start), params)
+    matches = load_matches(conn, since=start)
+    rows, _ = rate(matches, state)
+    rows['_created_at'] = utc_now()
+    with conn:
+        conn.execute(f"DELETE FROM {TABLE} WHERE rating_batch >= ?", (start,))
+    bulk_insert(conn, TABLE, rows)
+    bump_data_version(conn, 'team_ratings')
+    return len(matches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate teams over fct_matches")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--full-refresh", action="store_true", help="Re-rate every match from scratch")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Team Ratings")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    conn = connect(args.db)
+    try:
+        rated = update_ratings(conn, full_refresh=args.full_refresh)
+        total = conn.execute(f"SELECT count(*) FROM {TABLE}").fetchone()[0]
+    finally:
+        conn.close()
+
+    print(f"  ✓ Rated {rated:,} matches → {TABLE} ({total:,} rows)")
+    print("=" * 60)
+    print(f"✅ Done ({time.perf_counter() - start:.2f}s)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,97 @@
-import ast
-import pandas as pd
-
-#Transofrm csv into a pandas dataframe
-df = pd.read_csv("../data/raw/understat_xg_data.csv")
+"""
+Football Data Warehouse - Understat Cleaner
+============================================
+Turns the raw Understat export into one flat row per match
+(date, teams, goals, xG, xG-based result forecast, league, season).
 
-# Convert stringified dicts into real dicts
-for col in ["h", "a", "goals", "xG", "forecast"]:
-    df[col] = df[col].apply(ast.literal_eval)
+The raw CSV written by older scraper runs stores the h, a, goals, xG and
+forecast columns as stringified Python dicts. Instead of running
+ast.literal_eval row by row, the fields are pulled out with one vectorized
+regex pass per column. Exports written by the current scraper are already
+flat (`h.title`, `goals.h`, ...) and need no parsing at all.
 
-df["home_team"] = df["h"].apply(lambda x: x["title"])
-df["away_team"] = df["a"].apply(lambda x: x["title"])
+Usage:
+    python understat_cleaner.py [--raw-csv ...] [--clean-csv ...]
+"""
 
-df["home_goals"] = df["goals"].apply(lambda x: int(x["h"]))
-df["away_goals"] = df["goals"].apply(lambda x: int(x["a"]))
+import argparse
 
-df["home_xg"] = df["xG"].apply(lambda x: float(x["h"]))
-df["away_xg"] = df["xG"].apply(lambda x: float(x["a"]))
+import pandas as pd
 
-df["date"] = pd.to_datetime(df["datetime"]).dt.date
-df["season"] = df["season"].astype(str)
+RAW_CSV = "../data/raw/understat_xg_data.csv"
+CLEAN_CSV = "../data/raw/understat_xg_data_clean.csv"
 
-df_clean = df[[
+CLEAN_COLUMNS = [
     "date", "home_team", "away_team",
     "home_goals", "away_goals",
     "home_xg", "away_xg",
+    "forecast_home", "forecast_draw", "forecast_away",
     "league", "season"
-]]
+]
+
+# Values inside the stringified dicts are quoted with ' unless they contain
+# an apostrophe, in which case repr() switches to "
+_TITLE = r"""'title':\s*(['"])(.*?)\1"""
+_H_VALUE = r"""'h':\s*['"]?([^'",}]*)"""
+_A_VALUE = r"""'a':\s*['"]?([^'",}]*)"""
+# Understat's forecast: home win, draw, home loss probabilities
+_W_VALUE = r"""'w':\s*['"]?([^'",}]*)"""
+_D_VALUE = r"""'d':\s*['"]?([^'",}]*)"""
+_L_VALUE = r"""'l':\s*['"]?([^'",}]*)"""
+
+
+def _extract(series, pattern, group=0):
+    return series.str.extract(pattern, expand=True)[group]
+
+
+def flat_fields(df):
+    """
+    Return the nested fields as flat columns named like pd.json_normalize
+    output (`h.title`, `goals.h`, `xG.a`, ...).
+    """
+    if "h.title" in df.columns:
+        return df
+
+    return df.assign(**{
+        "h.title": _extract(df["h"], _TITLE, 1),
+        "a.title": _extract(df["a"], _TITLE, 1),
+        "goals.h": _extract(df["goals"], _H_VALUE),
+        "goals.a": _extract(df["goals"], _A_VALUE),
+        "xG.h": _extract(df["xG"], _H_VALUE),
+        "xG.a": _extract(df["xG"], _A_VALUE),
+        "forecast.w": _extract(df["forecast"], _W_VALUE),
+        "forecast.d": _extract(df["forecast"], _D_VALUE),
+        "forecast.l": _extract(df["forecast"], _L_VALUE),
+    })
+
+
+def clean_understat(df):
+    """Vectorized clean of a raw (nested or flat) Understat frame."""
+    flat = flat_fields(df)
+    return pd.DataFrame({
+        "date": pd.to_datetime(flat["datetime"], format="%Y-%m-%d %H:%M:%S").dt.date,
+        "home_team": flat["h.title"],
+        "away_team": flat["a.title"],
+        "home_goals": flat["goals.h"].astype(int),
+        "away_goals": flat["goals.a"].astype(int),
+        "home_xg": flat["xG.h"].astype(float),
+        "away_xg": flat["xG.a"].astype(float),
+        "forecast_home": flat["forecast.w"].astype(float),
+        "forecast_draw": flat["forecast.d"].astype(float),
+        "forecast_away": flat["forecast.l"].astype(float),
+        "league": flat["league"],
+        "season": flat["season"].astype(str),
+    })[CLEAN_COLUMNS]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flatten the raw Understat export")
+    parser.add_argument("--raw-csv", default=RAW_CSV)
+    parser.add_argument("--clean-csv", default=CLEAN_CSV)
+    args = parser.parse_args()
 
-#df_clean.to_csv("../data/raw/understat_xg_data_clean.csv", index=False)
\ No newline at end of file
+    #Transofrm csv into a pandas dataframe
+    df = pd.read_csv(args.raw_csv)
+    df_clean = clean_understat(df)
+    df_clean.to_csv(args.clean_csv, index=False)
+    print(f"💾 Saved {len(df_clean):,} clean Understat matches to {args.clean_csv}")
@@ -1,32 +1,163 @@
+"""
+Football Data Warehouse - Understat xG Scraper
+===============================================
+Fetches league results from Understat for every (league, season) concurrently,
+bounded by a semaphore, and caches each raw JSON payload on disk.
+
+Freshness policy: a finished season is served from cache once its cache
+was written after the season ended (SEASON_END, July 1 of the following
+year). A season cached while it was still live is refetched once after it
+ends, so its last months are not frozen. The live season is refetched when
+its cache is older than LIVE_MAX_AGE_HOURS (or always, with --current-only).
+
+Usage:
+    python understat_scrapper.py                  # full pull, cache-aware
+    python understat_scrapper.py --current-only   # refetch the live season only
+"""
+
 from understat import Understat
 import aiohttp
+import argparse
 import asyncio
+import json
 import nest_asyncio
+import os
+import sys
+import time
+from datetime import date, datetime
 import pandas as pd
 
 nest_asyncio.apply()
 
-async def get_understat_data():
-    async with aiohttp.ClientSession() as session:
-        understat = Understat(session)
-        leagues = ["EPL", "La_Liga", "Bundesliga", "Serie_A", "Ligue_1"]
-        seasons = list(range(2017, 2025))
-        all_data = []
-
-        for league in leagues:
-            for season in seasons:
-                try:
-                    matches = await understat.get_league_results(league, season)
-                    df = pd.DataFrame(matches)
-                    df["league"] = league
-                    df["season"] = season
-                    all_data.append(df)
-                    print(f"✅ {league} {season}: {len(df)} matches")
-                except Exception as e:
-                    print(f"⚠️ {league} {season}: {e}")
-
-        return pd.concat(all_data, ignore_index=True)
-
-data = asyncio.run(get_understat_data())
-data.to_csv("../data/raw/understat_xg_data.csv", index=False)
-print("💾 Saved Understat data!")
\ No newline at end of file
+LEAGUES = ["EPL", "La_Liga", "Bundesliga", "Serie_A", "Ligue_1"]
+FIRST_SEASON = 2017
+CACHE_DIR = "../data/raw/understat_cache"
+OUTPUT_CSV = "../data/raw/understat_xg_data.csv"
+MAX_CONCURRENCY = 8
+LIVE_MAX_AGE_HOURS = 6
+SEASON_END = (7, 1)     # (month, day) of the year after the start year; matches current_season()
+
+
+def current_season(today=None):
+    """Understat labels seasons by start year; a new season starts in July."""
+    today = today or date.today()
+    return today.year if today.month >= 7 else today.year - 1
+
+
+def season_end(season):
+    """Timestamp after which a season's results no longer change."""
+    month, day = SEASON_END
+    return datetime(season + 1, month, day).timestamp()
+
+
+def cache_path(league, season):
+    return os.path.join(CACHE_DIR, f"{league}_{season}.json")
+
+
+def is_fresh(league, season, live_season):
+    """True when the cached payload can be used without a request."""
+    path = cache_path(league, season)
+    if not os.path.exists(path):
+        return False
+    if season < live_season:
+        # Final only if cached after the season ended, not while it was live
+        return os.path.getmtime(path) >= season_end(season)
+    age_hours = (time.time() - os.path.getmtime(path)) / 3600
+    return age_hours < LIVE_MAX_AGE_HOURS
+
+
+def read_cache(league, season):
+    with open(cache_path(league, season), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_cache(league, season, matches):
+    path = cache_path(league, season)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(matches, f)
+    os.replace(tmp_path, path)
+
+
+async def fetch_one(understat, semaphore, league, season):
+    async with semaphore:
+        matches = await understat.get_league_results(league, season)
+    write_cache(league, season, matches)
+    return matches
+
+
+async def get_understat_data(leagues=LEAGUES, seasons=None, current_only=False):
+    """
+    Return one DataFrame with every (league, season) payload.
+
+    By default only stale or missing caches are requested. With
+    `current_only`, the live season is refetched unconditionally and every
+    other season is read from cache (or left out if it was never fetched).
+    """
+    live_season = current_season()
+    seasons = seasons or list(range(FIRST_SEASON, live_season + 1))
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    if current_only:
+        to_fetch = [(league, live_season) for league in leagues if live_season in seasons]
+    else:
+        to_fetch = [
+            (league, season)
+            for league in leagues
+            for season in seasons
+            if not is_fresh(league, season, live_season)
+        ]
+
+    payloads = {}
+    if to_fetch:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+        async with aiohttp.ClientSession() as session:
+            understat = Understat(session)
+            results = await asyncio.gather(
+                *(fetch_one(understat, semaphore, league, season) for league, season in to_fetch),
+                return_exceptions=True
+            )
+        for (league, season), result in zip(to_fetch, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ {league} {season}: {result}")
+            else:
+                payloads[(league, season)] = result
+                print(f"✅ {league} {season}: {len(result)} matches")
+
+    all_data = []
+    for league in leagues:
+        for season in seasons:
+            matches = payloads.get((league, season))
+            if matches is None:
+                if not os.path.exists(cache_path(league, season)):
+                    continue
+                matches = read_cache(league, season)
+            # Flat columns (h.title, goals.h, xG.h, ...) so the cleaner never
+            # has to parse stringified dicts
+            df = pd.json_normalize(matches)
+            df["league"] = league
+            df["season"] = season
+            all_data.append(df)
+
+    print(f"📡 Requested {len(to_fetch)} payloads, {len(all_data) - len(payloads)} served from cache")
+    if not all_data:
+        return pd.DataFrame()
+    return pd.concat(all_data, ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch Understat league results")
+    parser.add_argument("--current-only", action="store_true",
+                        help="refetch only the live season; older seasons come from cache")
+    parser.add_argument("--league", action="append", choices=LEAGUES,
+                        help="restrict to one or more leagues (repeatable)")
+    parser.add_argument("--output-csv", default=OUTPUT_CSV)
+    args = parser.parse_args()
+
+    data = asyncio.run(get_understat_data(leagues=args.league or LEAGUES, current_only=args.current_only))
+    if data.empty:
+        # Keep the previous export rather than overwrite it with nothing
+        print(f"❌ Nothing fetched or cached; {args.output_csv} left unchanged")
+        sys.exit(1)
+    data.to_csv(args.output_csv, index=False)
+    print("💾 Saved Understat data!")
@@ -0,0 +1,236 @@
+"""
+Football Data Warehouse - In-Database xG Merge
+===============================================
+SQL helpers for merge_script.py --in-place: Understat rows are staged in an
+indexed TEMP table and the Understat columns (xG and the xG forecast)
+are updated on `matches` with a join on (date, home_team, away_team). Only
+rows whose values are missing or different are touched, and only those rows
+are copied to a (rotated) backup table.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+
+from db_loader import bulk_insert
+
+STAGE_TABLE = "understat_stage"
+BACKUP_PREFIX = "matches_backup_"
+MAX_BACKUPS = 3
+
+# Columns of `matches` filled from Understat
+XG_COLUMNS = ['home_xg', 'away_xg', 'forecast_home', 'forecast_draw', 'forecast_away']
+
+STAGE_COLUMNS = ['date', 'home_team', 'away_team', *XG_COLUMNS, 'home_goals_us', 'away_goals_us']
+
+_DIFFERS = " OR ".join(f"m.{col} IS NOT s.{col}" for col in XG_COLUMNS)
+
+# Rows of `matches` with an Understat counterpart whose values would change
+_CHANGED_ROWS = f"""
+    FROM matches m
+    JOIN {STAGE_TABLE} s
+      ON s.date = m.date
+     AND s.home_team = m.home_team
+     AND s.away_team = m.away_team
+    WHERE {_DIFFERS}
+"""
+
+
+def _set_from(source):
+    """SET list copying XG_COLUMNS from the `source` alias."""
+    return ",\n                ".join(f"{col} = {source}.{col}" for col in XG_COLUMNS)
+
+
+def ensure_xg_columns(conn):
+    """Add the Understat columns to a freshly ingested (or older) `matches` table."""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(matches)")}
+    with conn:
+        for col in XG_COLUMNS:
+            if col not in existing:
+                conn.execute(f"ALTER TABLE matches ADD COLUMN {col} REAL")
+
+
+def rename_teams(conn, name_map):
+    """
+    Rewrite team names in place. OR REPLACE resolves natural-key collisions
+    (a raw-named row re-ingested next to its already-standardized twin) by
+    keeping the freshly renamed row; its xG is refilled by the update below.
+    Returns the number of rows renamed.
+    """
+    pairs = list(name_map.items())
+    renamed = 0
+    with conn:
+        for col in ("home_team", "away_team"):
+            cursor = conn.executemany(
+                f"UPDATE OR REPLACE matches SET {col} = ? WHERE {col} = ?",
+                [(new, old) for old, new in pairs]
+            )
+            renamed += cursor.rowcount
+    return renamed
+
+
+def stage_understat(conn, understat):
+    """Load Understat rows into an indexed TEMP table. Returns rows staged."""
+    conn.execute(f"DROP TABLE IF EXISTS temp.{STAGE_TABLE}")
+    conn.execute(f"""
+        CREATE TEMP TABLE {STAGE_TABLE} (
+            date TEXT,
+            home_team TEXT,
+            away_team TEXT,
+            home_xg REAL,
+            away_xg REAL,
+            forecast_home REAL,
+            forecast_draw REAL,
+            forecast_away REAL,
+            home_goals_us INTEGER,
+            away_goals_us INTEGER
+        )
+    """)
+    rows = bulk_insert(conn, STAGE_TABLE, understat, columns=STAGE_COLUMNS)
+    conn.execute(f"CREATE INDEX temp.ix_{STAGE_TABLE}_fixture ON {STAGE_TABLE} (date, home_team, away_team)")
+    return rows
+
+
+def backup_changed_rows(conn):
+    """
+    Copy only the rows about to change into matches_backup_<timestamp> and
+    drop all but the newest MAX_BACKUPS backup tables. Returns the backup
+    table name, or None when nothing is about to change.
+    """
+    pending = conn.execute(f"SELECT COUNT(*) {_CHANGED_ROWS}").fetchone()[0]
+    if pending == 0:
+        return None
+
+    backup_name = f"{BACKUP_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    with conn:
+        conn.execute(f"CREATE TABLE {backup_name} AS SELECT m.rowid AS source_rowid, m.* {_CHANGED_ROWS}")
+    rotate_backups(conn)
+    return backup_name
+
+
+def rotate_backups(conn, keep=MAX_BACKUPS):
+    """Drop matches_backup_* tables beyond the newest `keep`. Returns names dropped."""
+    names = [
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? ORDER BY name DESC",
+            (BACKUP_PREFIX + "%",)
+        )
+    ]
+    stale = names[keep:]
+    with conn:
+        for name in stale:
+            conn.execute(f"DROP TABLE {name}")
+    return stale
+
+
+def update_xg_in_place(conn):
+    """Set the Understat columns from the staged rows where missing or changed. Returns rows updated."""
+    with conn:
+        cursor = conn.execute(f"""
+            UPDATE matches AS m
+            SET {_set_from('s')}
+            FROM {STAGE_TABLE} s
+            WHERE s.date = m.date
+              AND s.home_team = m.home_team
+              AND s.away_team = m.away_team
+              AND ({_DIFFERS})
+        """)
+    return cursor.rowcount
+
+
+def merge_summary(conn):
+    """(total, matched) for matches joined against the stage table."""
+    total = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+    matched = conn.execute(f"""
+        SELECT COUNT(*)
+        FROM matches m
+        JOIN {STAGE_TABLE} s
+          ON s.date = m.date
+         AND s.home_team = m.home_team
+         AND s.away_team = m.away_team
+    """).fetchone()[0]
+    return total, matched
+
+
+def matches_with_staged_goals(conn, columns, chunksize=50_000):
+    """
+    `columns` of every match plus the staged Understat goals of the exactly
+    joined fixtures (NULL elsewhere), in chunks, for the data-quality checks.
+    """
+    select = ", ".join(f"m.{col}" for col in columns)
+    return pd.read_sql_query(f"""
+        SELECT {select}, s.home_goals_us, s.away_goals_us
+        FROM matches m
+        LEFT JOIN {STAGE_TABLE} s
+          ON s.date = m.date
+         AND s.home_team = m.home_team
+         AND s.away_team = m.away_team
+    """, conn, chunksize=chunksize)
+
+
+def unmatched_fixtures(conn):
+    """
+    Rows without an exact-date Understat counterpart, with their rowid: the
+    ones still missing xG and the ones an earlier run matched within the date
+    window, so a revision of their Understat values is picked up too.
+    """
+    return pd.read_sql_query(f"""
+        SELECT m.rowid AS row_id, m.league, m.season, m.date, m.home_team, m.away_team,
+               m.home_goals, m.away_goals
+        FROM matches m
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {STAGE_TABLE} s
+            WHERE s.date = m.date AND s.home_team = m.home_team AND s.away_team = m.away_team
+        )
+    """, conn)
+
+
+def exact_matched_keys(conn):
+    """(date, home_team, away_team) of staged Understat rows already joined exactly."""
+    return conn.execute(f"""
+        SELECT s.date, s.home_team, s.away_team
+        FROM {STAGE_TABLE} s
+        JOIN matches m
+          ON m.date = s.date
+         AND m.home_team = s.home_team
+         AND m.away_team = s.away_team
+    """).fetchall()
+
+
+def update_xg_by_rowid(conn, found):
+    """
+    Write the Understat columns for tolerant matches (`found` has row_id and
+    XG_COLUMNS) where missing or different. Returns rows updated.
+    """
+    conn.execute("DROP TABLE IF EXISTS temp.xg_near")
+    conn.execute(f"CREATE TEMP TABLE xg_near (row_id INTEGER PRIMARY KEY, {', '.join(f'{c} REAL' for c in XG_COLUMNS)})")
+    bulk_insert(conn, "xg_near", found, columns=['row_id', *XG_COLUMNS])
+    differs = " OR ".join(f"matches.{col} IS NOT n.{col}" for col in XG_COLUMNS)
+    with conn:
+        cursor = conn.execute(f"""
+            UPDATE matches
+            SET {_set_from('n')}
+            FROM xg_near n
+            WHERE matches.rowid = n.row_id
+              AND ({differs})
+        """)
+    return cursor.rowcount
+
+
+def match_kind_by_league(conn):
+    """[(league, exact, near, unmatched, total)]; near = has xG without an exact-date counterpart."""
+    return conn.execute(f"""
+        SELECT
+            m.league,
+            SUM(CASE WHEN s.date IS NOT NULL THEN 1 ELSE 0 END) AS exact,
+            SUM(CASE WHEN s.date IS NULL AND m.home_xg IS NOT NULL THEN 1 ELSE 0 END) AS near,
+            SUM(CASE WHEN m.home_xg IS NULL THEN 1 ELSE 0 END) AS unmatched,
+            COUNT(*) AS total
+        FROM matches m
+        LEFT JOIN {STAGE_TABLE} s
+          ON s.date = m.date
+         AND s.home_team = m.home_team
+         AND s.away_team = m.away_team
+        GROUP BY m.league
+        ORDER BY m.league
+    """).fetchall()
@@ -0,0 +1,21 @@
+{#
+    Partitions whose raw rows changed since `relation` was last built: late
+    score, odds or xG corrections recorded by etl/change_capture.py. The
+    incremental marts rebuild these on top of the latest season. Each mart
+    compares against its own _created_at, so a mart that failed or was
+    skipped picks the changes up on its next run. Renders an empty set until
+    the ETL has created the table.
+#}
+
+{% macro changed_partitions(relation, columns='competition_id, season, team_id') -%}
+    {%- set changes = source('football_data', 'changed_partitions') -%}
+    {%- if execute and adapter.get_relation(changes.database, changes.schema, changes.identifier) is none -%}
+        select {{ columns }}
+        from (select null as competition_id, null as season, null as team_id) none
+        where 1 = 0
+    {%- else -%}
+        select distinct {{ columns }}
+        from {{ changes }}
+        where changed_at >= (select max(_created_at) from {{ relation }})
+    {%- endif -%}
+{%- endmacro %}
@@ -0,0 +1,38 @@
+{#
+    on-run-end: bump the data_version stamp that the ETL writers keep
+    (etl/db_loader.py bump_data_version), so etl/query_service.py drops
+    results cached from the previous marts. The service only reads the
+    SQLite warehouse, so the DuckDB target skips this. Stamps created before
+    the generation column existed get it added, as in bump_data_version.
+#}
+
+{% macro bump_data_version() %}
+    {% if execute and target.type != 'duckdb' %}
+        {% do run_query("
+            create table if not exists " ~ target.schema ~ ".data_version (
+                id integer primary key check (id = 1),
+                version integer not null,
+                source text,
+                updated_at text,
+                generation text
+            )
+        ") %}
+        {%- set columns = run_query(
+            "select name from pragma_table_info('data_version', '" ~ target.schema ~ "')"
+        ).columns[0].values() -%}
+        {% if 'generation' not in columns %}
+            {% do run_query("alter table " ~ target.schema ~ ".data_version add column generation text") %}
+        {% endif %}
+        {% do run_query("
+            insert into " ~ target.schema ~ ".data_version (id, version, source, updated_at, generation)
+            values (1, 1, 'dbt', datetime('now'), lower(hex(randomblob(8))))
+            on conflict (id) do update set
+                version = version + 1,
+                source = excluded.source,
+                updated_at = excluded.updated_at,
+                generation = coalesce(generation, excluded.generation)
+        ") %}
+        {#- dbt-sqlite leaves hook statements in an open transaction -#}
+        {% do run_query("commit") %}
+    {% endif %}
+{% endmacro %}
@@ -0,0 +1,28 @@
+{#
+    Index helpers used by model post-hooks and on-run-start.
+    SQLite wants the schema on the index name, not on the indexed table.
+    DuckDB scans columns with min/max zone maps and gains nothing from these
+    indexes, so on that target the hooks render to nothing.
+#}
+
+{% macro create_index(relation, name, columns, unique=false) -%}
+    {{ return(adapter.dispatch('create_index')(relation, name, columns, unique)) }}
+{%- endmacro %}
+
+{% macro default__create_index(relation, name, columns, unique=false) -%}
+    create {% if unique %}unique {% endif %}index if not exists {{ relation.schema }}.{{ name }}
+    on {{ relation.identifier }} ({{ columns }})
+{%- endmacro %}
+
+{% macro duckdb__create_index(relation, name, columns, unique=false) -%}
+{%- endmacro %}
+
+
+{% macro index_source_matches() %}
+    {#- Raw table is (re)created by the ETL scripts, so indexes are ensured on every run -#}
+    {% if execute and target.type != 'duckdb' %}
+        {% set matches = source('football_data', 'matches') %}
+        {% do run_query(create_index(matches, 'ix_matches_league_season', 'league, season')) %}
+        {% do run_query(create_index(matches, 'ix_matches_season_date', 'season, date')) %}
+    {% endif %}
+{% endmacro %}
@@ -0,0 +1,49 @@
+{#
+    SQL that differs between the SQLite and DuckDB targets. Models call these
+    macros; adapter.dispatch picks duckdb__* on DuckDB and default__* (the
+    original SQLite SQL) everywhere else.
+#}
+
+{% macro matchday(row_number, matches_per_round) -%}
+    {{ return(adapter.dispatch('matchday')(row_number, matches_per_round)) }}
+{%- endmacro %}
+
+{#- SQLite CAST truncates, so adding 0.999999 rounds up -#}
+{% macro default__matchday(row_number, matches_per_round) -%}
+    CAST(({{ row_number }} / {{ matches_per_round }}.0 + 0.999999) AS INTEGER)
+{%- endmacro %}
+
+{#- DuckDB CAST rounds to nearest, so the SQLite trick would be off by one -#}
+{% macro duckdb__matchday(row_number, matches_per_round) -%}
+    CAST(CEIL({{ row_number }} / {{ matches_per_round }}) AS INTEGER)
+{%- endmacro %}
+
+
+{% macro audit_timestamp() -%}
+    {{ return(adapter.dispatch('audit_timestamp')()) }}
+{%- endmacro %}
+
+{#- SQLite: UTC text, 'YYYY-MM-DD HH:MM:SS' -#}
+{% macro default__audit_timestamp() -%}
+    current_timestamp
+{%- endmacro %}
+
+{#- Same text format as SQLite, so incremental _created_at comparisons behave alike -#}
+{% macro duckdb__audit_timestamp() -%}
+    strftime(current_timestamp at time zone 'UTC', '%Y-%m-%d %H:%M:%S')
+{%- endmacro %}
+
+
+{% macro floor_int(value) -%}
+    {{ return(adapter.dispatch('floor_int')(value)) }}
+{%- endmacro %}
+
+{#- SQLite CAST truncates, which is floor for the non-negative values passed here -#}
+{% macro default__floor_int(value) -%}
+    CAST({{ value }} AS INTEGER)
+{%- endmacro %}
+
+{#- DuckDB CAST rounds to nearest -#}
+{% macro duckdb__floor_int(value) -%}
+    CAST(FLOOR({{ value }}) AS INTEGER)
+{%- endmacro %}
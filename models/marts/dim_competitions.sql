@@ -24,7 +24,7 @@ final as (
             when competition_name = 'Ligue 1' then 'France'
             else null
         end as country,
-        current_timestamp as _created_at
+        {{ audit_timestamp() }} as _created_at
     from competitions_from_matches
 )
 
@@ -36,17 +36,29 @@ team_aggregated as (
     group by team_name
 ),
 
+team_aliases as (
+    -- Raw spellings resolved to each team by the ETL alias table
+    select
+        team_id,
+        count(*) as alias_count
+    from {{ source('football_data', 'team_aliases') }}
+    group by team_id
+),
+
 final as (
     select
         -- Generate stable team_id
-        lower(replace(team_name, ' ', '_')) as team_id,
-        team_name,
-        primary_league as league,
-        last_season,
-        seasons_played,
+        lower(replace(t.team_name, ' ', '_')) as team_id,
+        t.team_name,
+        t.primary_league as league,
+        t.last_season,
+        t.seasons_played,
+        coalesce(a.alias_count, 0) as alias_count,
         -- Metadata
-        current_timestamp as _created_at
-    from team_aggregated
+        {{ audit_timestamp() }} as _created_at
+    from team_aggregated t
+    left join team_aliases a
+        on a.team_id = lower(replace(t.team_name, ' ', '_'))
 )
 
 select * from final
\ No newline at end of file
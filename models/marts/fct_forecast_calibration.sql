@@ -0,0 +1,104 @@
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key="competition_id || '|' || season",
+        post_hook=[
+            "{{ create_index(this, 'ux_fct_forecast_calibration', 'competition_id, season, source, outcome, bucket', unique=true) }}",
+            "{{ create_index(this, 'ix_fct_forecast_calibration_source', 'source, outcome, bucket') }}"
+        ]
+    )
+}}
+
+-- Calibration buckets: every predicted probability in fct_match_probabilities
+-- (market and Understat, home / draw / away) grouped into 5% buckets per
+-- competition and season, with how often the outcome happened.
+--
+-- Keeps sums, not just rates, so dashboards can roll buckets up across
+-- leagues or seasons exactly:
+--   select source, outcome, bucket,
+--          sum(sum_probability) / sum(predictions) as mean_probability,
+--          sum(hits) * 1.0 / sum(predictions) as observed_rate
+--   from fct_forecast_calibration group by 1, 2, 3
+--
+-- Incremental runs rebuild the latest season and every competition season
+-- with corrected rows (changed_partitions). The unique_key is the whole
+-- (competition, season) partition, so its old rows are all deleted before
+-- the rebuilt ones are inserted: a bucket a correction empties disappears
+-- instead of keeping its old counts.
+
+with matches as (
+    select * from {{ ref('fct_match_probabilities') }}
+
+    {% if is_incremental() %}
+    where season >= (select max(season) from {{ this }})
+       or (competition_id, season) in ({{ changed_partitions(this, 'competition_id, season') }})
+    {% endif %}
+),
+
+predictions as (
+    select competition_id, season, 'market' as source, 'home' as outcome,
+           market_home as probability, case when result = 'H' then 1 else 0 end as hit
+    from matches
+    union all
+    select competition_id, season, 'market', 'draw',
+           market_draw, case when result = 'D' then 1 else 0 end
+    from matches
+    union all
+    select competition_id, season, 'market', 'away',
+           market_away, case when result = 'A' then 1 else 0 end
+    from matches
+    union all
+    select competition_id, season, 'understat', 'home',
+           forecast_home, case when result = 'H' then 1 else 0 end
+    from matches
+    union all
+    select competition_id, season, 'understat', 'draw',
+           forecast_draw, case when result = 'D' then 1 else 0 end
+    from matches
+    union all
+    select competition_id, season, 'understat', 'away',
+           forecast_away, case when result = 'A' then 1 else 0 end
+    from matches
+),
+
+bucketed as (
+    select
+        *,
+        -- 0 = [0, 0.05), ..., 19 = [0.95, 1]
+        case
+            when probability >= 1 then 19
+            else {{ floor_int('probability * 20') }}
+        end as bucket
+    from predictions
+    where probability is not null
+),
+
+final as (
+    select
+        -- Keys
+        competition_id,
+        season,
+        source,
+        outcome,
+        bucket,
+        bucket / 20.0 as bucket_lower,
+        (bucket + 1) / 20.0 as bucket_upper,
+
+        -- Counts and sums
+        count(*) as predictions,
+        sum(hit) as hits,
+        sum(probability) as sum_probability,
+
+        -- Rates
+        avg(probability) as mean_probability,
+        avg(hit * 1.0) as observed_rate,
+
+        -- Metadata
+        {{ audit_timestamp() }} as _created_at
+
+    from bucketed
+    group by competition_id, season, source, outcome, bucket
+)
+
+select * from final
@@ -0,0 +1,89 @@
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key="competition_id || '|' || season",
+        post_hook=[
+            "{{ create_index(this, 'ux_fct_forecast_scores', 'competition_id, season, source', unique=true) }}"
+        ]
+    )
+}}
+
+-- Forecast quality per competition, season and source (market or
+-- Understat): mean Brier score, mean log-loss, and how often the favourite
+-- won. Only matches with all three probabilities are scored.
+--
+-- Incremental runs rebuild the latest season and every competition season
+-- with corrected rows (changed_partitions). The unique_key is the whole
+-- (competition, season) partition, so its old rows are all deleted before
+-- the rebuilt ones are inserted, and no stale row survives a correction.
+
+with matches as (
+    select * from {{ ref('fct_match_probabilities') }}
+
+    {% if is_incremental() %}
+    where season >= (select max(season) from {{ this }})
+       or (competition_id, season) in ({{ changed_partitions(this, 'competition_id, season') }})
+    {% endif %}
+),
+
+scored as (
+    select
+        competition_id,
+        season,
+        'market' as source,
+        market_brier as brier,
+        market_log_loss as log_loss,
+        case
+            when market_home >= market_draw and market_home >= market_away then 'H'
+            when market_away >= market_draw then 'A'
+            else 'D'
+        end as favourite,
+        result,
+        overround
+    from matches
+    where market_brier is not null
+
+    union all
+
+    select
+        competition_id,
+        season,
+        'understat' as source,
+        forecast_brier,
+        forecast_log_loss,
+        case
+            when forecast_home >= forecast_draw and forecast_home >= forecast_away then 'H'
+            when forecast_away >= forecast_draw then 'A'
+            else 'D'
+        end,
+        result,
+        null
+    from matches
+    where forecast_brier is not null
+),
+
+final as (
+    select
+        -- Keys
+        competition_id,
+        season,
+        source,
+
+        -- Scores
+        count(*) as matches_scored,
+        avg(brier) as brier_score,
+        avg(log_loss) as log_loss,
+        avg(case when favourite = result then 1.0 else 0.0 end) as favourite_hit_rate,
+
+        -- Market margin (null for Understat)
+        avg(overround) as mean_overround,
+
+        -- Metadata
+        {{ audit_timestamp() }} as _created_at
+
+    from scored
+    group by competition_id, season, source
+)
+
+select * from final
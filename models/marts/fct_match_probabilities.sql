@@ -0,0 +1,128 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key='match_id',
+        post_hook=[
+            "{{ create_index(this, 'ux_fct_match_probabilities', 'match_id', unique=true) }}",
+            "{{ create_index(this, 'ix_fct_match_probabilities_season', 'season, competition_id') }}"
+        ]
+    )
+}}
+
+-- One row per match with the bookmaker's (B365) margin-free probabilities,
+-- Understat's forecast, and per-match Brier score and log-loss for both.
+-- Understat derives its forecast from the shots of the match itself, so it
+-- is an xG view of the result, not a pre-match price: the edge columns show
+-- where the chances created disagreed with the market.
+--
+-- Margin-free probabilities divide each implied probability (1 / odds) by
+-- their sum, which removes the overround in proportion to each outcome.
+-- The Brier score sums over the three outcomes (0 = perfect, 2 = worst).
+-- Log-loss is -ln(probability given to the actual result), with the
+-- probability floored at 1e-6. ln() needs SQLite built with math functions
+-- (3.35+, the default in conda and most distributions).
+--
+-- Incremental runs rebuild the latest season and the matches of teams with
+-- corrected rows (changed_partitions), merged on match_id.
+
+with matches as (
+    select * from {{ ref('fct_matches') }}
+
+    {% if is_incremental() %}
+    where season >= (select max(season) from {{ this }})
+       or (competition_id, season, home_team_id) in ({{ changed_partitions(this) }})
+       or (competition_id, season, away_team_id) in ({{ changed_partitions(this) }})
+    {% endif %}
+),
+
+implied as (
+    select
+        *,
+        1.0 / nullif(odds_home, 0) as implied_home,
+        1.0 / nullif(odds_draw, 0) as implied_draw,
+        1.0 / nullif(odds_away, 0) as implied_away
+    from matches
+),
+
+probabilities as (
+    select
+        match_id,
+        match_date,
+        season,
+        competition_id,
+        result,
+        odds_home,
+        odds_draw,
+        odds_away,
+        implied_home + implied_draw + implied_away - 1 as overround,
+        implied_home / (implied_home + implied_draw + implied_away) as market_home,
+        implied_draw / (implied_home + implied_draw + implied_away) as market_draw,
+        implied_away / (implied_home + implied_draw + implied_away) as market_away,
+        forecast_home,
+        forecast_draw,
+        forecast_away,
+        case when result = 'H' then 1 else 0 end as is_home,
+        case when result = 'D' then 1 else 0 end as is_draw,
+        case when result = 'A' then 1 else 0 end as is_away
+    from implied
+),
+
+scored as (
+    select
+        *,
+        case result
+            when 'H' then market_home when 'D' then market_draw else market_away
+        end as market_result_probability,
+        case result
+            when 'H' then forecast_home when 'D' then forecast_draw else forecast_away
+        end as forecast_result_probability
+    from probabilities
+),
+
+final as (
+    select
+        -- Keys
+        match_id,
+        match_date,
+        season,
+        competition_id,
+        result,
+
+        -- Market (B365)
+        odds_home,
+        odds_draw,
+        odds_away,
+        overround,
+        market_home,
+        market_draw,
+        market_away,
+
+        -- Understat forecast
+        forecast_home,
+        forecast_draw,
+        forecast_away,
+
+        -- Understat forecast minus market (positive = Understat rates the outcome higher)
+        forecast_home - market_home as edge_home,
+        forecast_draw - market_draw as edge_draw,
+        forecast_away - market_away as edge_away,
+
+        -- Scores
+        (market_home - is_home) * (market_home - is_home)
+            + (market_draw - is_draw) * (market_draw - is_draw)
+            + (market_away - is_away) * (market_away - is_away) as market_brier,
+        -ln(case when market_result_probability < 1e-6 then 1e-6 else market_result_probability end)
+            as market_log_loss,
+        (forecast_home - is_home) * (forecast_home - is_home)
+            + (forecast_draw - is_draw) * (forecast_draw - is_draw)
+            + (forecast_away - is_away) * (forecast_away - is_away) as forecast_brier,
+        -ln(case when forecast_result_probability < 1e-6 then 1e-6 else forecast_result_probability end)
+            as forecast_log_loss,
+
+        -- Metadata
+        {{ audit_timestamp() }} as _created_at
+
+    from scored
+)
+
+select * from final
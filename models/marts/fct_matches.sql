@@ -1,11 +1,33 @@
 {{
     config(
-        materialized='table'
+        materialized='incremental',
+        unique_key='match_id',
+        post_hook=[
+            "{{ create_index(this, 'ux_fct_matches_match_id', 'match_id', unique=true) }}",
+            "{{ create_index(this, 'ix_fct_matches_season_competition', 'season, competition_id') }}",
+            "{{ create_index(this, 'ix_fct_matches_home_team', 'home_team_id, season') }}",
+            "{{ create_index(this, 'ix_fct_matches_away_team', 'away_team_id, season') }}"
+        ]
     )
 }}
 
+-- Incremental runs only rebuild the latest season plus anything dated after
+-- the newest match already in the table; rows are merged on match_id.
+-- Matches of teams whose rows were corrected or backfilled since the last
+-- build (changed_partitions) are rebuilt as well. Team renames and removed
+-- fixtures still need `dbt run --full-refresh`.
+
 with matches as (
     select * from {{ ref('stg_matches') }}
+
+    {% if is_incremental() %}
+    where season >= (select max(season) from {{ this }})
+       or date > (select max(match_date) from {{ this }})
+       or (lower(replace(league, ' ', '_')), season, lower(replace(home_team, ' ', '_')))
+          in ({{ changed_partitions(this) }})
+       or (lower(replace(league, ' ', '_')), season, lower(replace(away_team, ' ', '_')))
+          in ({{ changed_partitions(this) }})
+    {% endif %}
 ),
 
 final as (
@@ -33,6 +55,11 @@ final as (
         -- Expected goals facts
         home_xg,
         away_xg,
+
+        -- Understat result probabilities from the match xG (home win / draw / away win)
+        forecast_home,
+        forecast_draw,
+        forecast_away,
         
         -- Shot facts
         home_shots,
@@ -46,7 +73,7 @@ final as (
         odds_away,
         
         -- Metadata
-        current_timestamp as _created_at
+        {{ audit_timestamp() }} as _created_at
         
     from matches
 )
@@ -0,0 +1,251 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key="team_id || '|' || match_id",
+        post_hook=[
+            "{{ create_index(this, 'ux_fct_team_form', 'team_id, match_id', unique=true) }}",
+            "{{ create_index(this, 'ix_fct_team_form_team_date', 'team_id, match_date') }}"
+        ]
+    )
+}}
+
+-- One row per team per match with rolling form up to and including that
+-- match. Form as of a date is a single indexed read:
+--   select * from fct_team_form
+--   where team_id = 'arsenal' and match_date < '2024-03-01'
+--   order by match_date desc limit 1
+--
+-- The last-5 / last-10 windows run across season boundaries. Season-to-date
+-- totals restart every season. Matches are ordered by season, matchday, date,
+-- then match_id. 2017/18 has no dates for four leagues, and there the
+-- matchday order is used.
+--
+-- Incremental runs rebuild the latest season. A team with corrected rows
+-- (changed_partitions) is rebuilt from its earliest corrected season on,
+-- because the rolling windows carry a correction into the next season. Each
+-- team's last 9 matches before its rebuilt seasons are read back from this
+-- table to seed the rolling windows, so other past seasons are never
+-- recomputed.
+
+with
+{% if is_incremental() %}
+rebuild_from as (
+    select team_id, min(season) as season
+    from ({{ changed_partitions(this, 'team_id, season') }}) changed
+    group by team_id
+),
+{% endif %}
+
+matches as (
+    select * from {{ ref('fct_matches') }}
+
+    {% if is_incremental() %}
+    where season >= (select max(season) from {{ this }})
+       or season >= (select min(season) from rebuild_from)
+    {% endif %}
+),
+
+team_matches as (
+    -- Unpivot: the home side and the away side of every match
+    select
+        match_id,
+        home_team_id as team_id,
+        away_team_id as opponent_id,
+        competition_id,
+        season,
+        matchday,
+        match_date,
+        'home' as venue,
+        case result when 'H' then 'W' when 'D' then 'D' else 'L' end as result,
+        case result when 'H' then 3 when 'D' then 1 else 0 end as points,
+        home_goals as goals_for,
+        away_goals as goals_against,
+        home_xg as xg_for,
+        away_xg as xg_against,
+        home_shots as shots_for,
+        away_shots as shots_against,
+        home_shots_on_target as shots_on_target_for,
+        away_shots_on_target as shots_on_target_against
+    from matches
+
+    union all
+
+    select
+        match_id,
+        away_team_id as team_id,
+        home_team_id as opponent_id,
+        competition_id,
+        season,
+        matchday,
+        match_date,
+        'away' as venue,
+        case result when 'A' then 'W' when 'D' then 'D' else 'L' end as result,
+        case result when 'A' then 3 when 'D' then 1 else 0 end as points,
+        away_goals as goals_for,
+        home_goals as goals_against,
+        away_xg as xg_for,
+        home_xg as xg_against,
+        away_shots as shots_for,
+        home_shots as shots_against,
+        away_shots_on_target as shots_on_target_for,
+        home_shots_on_target as shots_on_target_against
+    from matches
+),
+
+{% if is_incremental() %}
+rebuilt as (
+    -- Each team's rows from its first rebuilt season: the latest season, or
+    -- its earliest corrected one
+    select t.*, 1 as rebuilt
+    from team_matches t
+    left join rebuild_from r
+        on r.team_id = t.team_id
+    where t.season >= coalesce(r.season, (select max(season) from {{ this }}))
+),
+
+history as (
+    -- Last 9 matches per team before its first rebuilt season: enough to
+    -- fill a 10-match window, never written back
+    select
+        match_id, team_id, opponent_id, competition_id, season, matchday, match_date,
+        venue, result, points, goals_for, goals_against, xg_for, xg_against,
+        shots_for, shots_against, shots_on_target_for, shots_on_target_against,
+        0 as rebuilt
+    from (
+        select
+            p.*,
+            row_number() over (
+                partition by p.team_id
+                order by p.season desc, p.matchday desc, p.match_date desc, p.match_id desc
+            ) as recent
+        from {{ this }} p
+        left join rebuild_from r
+            on r.team_id = p.team_id
+        where p.season < coalesce(r.season, (select max(season) from {{ this }}))
+    ) previous
+    where recent <= 9
+),
+
+all_matches as (
+    select * from rebuilt
+    union all
+    select * from history
+),
+{% else %}
+all_matches as (
+    select * from team_matches
+),
+{% endif %}
+
+rolling as (
+    select
+        *,
+        -- Last 5 matches
+        count(*) over last_5 as last5_matches,
+        sum(points) over last_5 as last5_points,
+        sum(goals_for) over last_5 as last5_goals_for,
+        sum(goals_against) over last_5 as last5_goals_against,
+        sum(xg_for) over last_5 as last5_xg_for,
+        sum(xg_against) over last_5 as last5_xg_against,
+        sum(shots_for) over last_5 as last5_shots_for,
+        sum(shots_against) over last_5 as last5_shots_against,
+
+        -- Last 10 matches
+        count(*) over last_10 as last10_matches,
+        sum(points) over last_10 as last10_points,
+        sum(goals_for) over last_10 as last10_goals_for,
+        sum(goals_against) over last_10 as last10_goals_against,
+        sum(xg_for) over last_10 as last10_xg_for,
+        sum(xg_against) over last_10 as last10_xg_against,
+        sum(shots_for) over last_10 as last10_shots_for,
+        sum(shots_against) over last_10 as last10_shots_against,
+
+        -- Season to date
+        count(*) over season_to_date as std_matches,
+        sum(points) over season_to_date as std_points,
+        sum(goals_for) over season_to_date as std_goals_for,
+        sum(goals_against) over season_to_date as std_goals_against,
+        sum(xg_for) over season_to_date as std_xg_for,
+        sum(xg_against) over season_to_date as std_xg_against,
+        sum(shots_for) over season_to_date as std_shots_for,
+        sum(shots_against) over season_to_date as std_shots_against
+    from all_matches
+    window
+        last_5 as (
+            partition by team_id
+            order by season, matchday, match_date, match_id
+            rows between 4 preceding and current row
+        ),
+        last_10 as (
+            partition by team_id
+            order by season, matchday, match_date, match_id
+            rows between 9 preceding and current row
+        ),
+        season_to_date as (
+            partition by team_id, season
+            order by matchday, match_date, match_id
+            rows between unbounded preceding and current row
+        )
+),
+
+final as (
+    select
+        -- Keys
+        team_id,
+        match_id,
+        opponent_id,
+        competition_id,
+        season,
+        matchday,
+        match_date,
+        venue,
+
+        -- This match
+        result,
+        points,
+        goals_for,
+        goals_against,
+        xg_for,
+        xg_against,
+        shots_for,
+        shots_against,
+        shots_on_target_for,
+        shots_on_target_against,
+
+        -- Rolling form
+        last5_matches,
+        last5_points,
+        last5_goals_for,
+        last5_goals_against,
+        last5_xg_for,
+        last5_xg_against,
+        last5_shots_for,
+        last5_shots_against,
+        last10_matches,
+        last10_points,
+        last10_goals_for,
+        last10_goals_against,
+        last10_xg_for,
+        last10_xg_against,
+        last10_shots_for,
+        last10_shots_against,
+        std_matches,
+        std_points,
+        std_goals_for,
+        std_goals_against,
+        std_xg_for,
+        std_xg_against,
+        std_shots_for,
+        std_shots_against,
+
+        -- Metadata
+        {{ audit_timestamp() }} as _created_at
+
+    from rolling
+
+    {% if is_incremental() %}
+    where rebuilt = 1
+    {% endif %}
+)
+
+select * from final
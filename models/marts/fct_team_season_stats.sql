@@ -1,10 +1,41 @@
 {{
     config(
-        materialized='table'
+        materialized='incremental',
+        unique_key="team_id || '|' || season || '|' || competition_id",
+        post_hook=[
+            "{{ create_index(this, 'ux_fct_team_season_stats', 'team_id, season, competition_id', unique=true) }}",
+            "{{ create_index(this, 'ix_fct_team_season_stats_season', 'season, competition_id') }}"
+        ]
     )
 }}
 
-with home_stats as (
+-- Incremental runs only recompute the (team, season) partitions that appear
+-- in fct_matches rows (re)built for the latest season since this table was
+-- last refreshed, plus the partitions with corrected rows
+-- (changed_partitions), always aggregating over every match of those
+-- partitions.
+
+with matches as (
+    select * from {{ ref('fct_matches') }}
+),
+
+{% if is_incremental() %}
+touched as (
+    select home_team_id as team_id, season
+    from matches
+    where _created_at >= (select max(_created_at) from {{ this }})
+      and season >= (select max(season) from {{ this }})
+    union
+    select away_team_id as team_id, season
+    from matches
+    where _created_at >= (select max(_created_at) from {{ this }})
+      and season >= (select max(season) from {{ this }})
+    union
+    {{ changed_partitions(this, 'team_id, season') }}
+),
+{% endif %}
+
+home_stats as (
     select
         home_team_id as team_id,
         season,
@@ -32,7 +63,10 @@ with home_stats as (
         sum(away_shots) as home_shots_against,
         sum(home_shots_on_target) as home_shots_on_target_for,
         sum(away_shots_on_target) as home_shots_on_target_against
-    from {{ ref('fct_matches') }}
+    from matches
+    {% if is_incremental() %}
+    where (home_team_id, season) in (select team_id, season from touched)
+    {% endif %}
     group by home_team_id, season, competition_id
 ),
 
@@ -64,7 +98,10 @@ away_stats as (
         sum(home_shots) as away_shots_against,
         sum(away_shots_on_target) as away_shots_on_target_for,
         sum(home_shots_on_target) as away_shots_on_target_against
-    from {{ ref('fct_matches') }}
+    from matches
+    {% if is_incremental() %}
+    where (away_team_id, season) in (select team_id, season from touched)
+    {% endif %}
     group by away_team_id, season, competition_id
 ),
 
@@ -154,35 +191,38 @@ final as (
         home_goals_for,
         away_goals_for,
         
-        -- Averages
-        round(cast(goals_for as float) / matches_played, 2) as goals_for_per_match,
-        round(cast(goals_against as float) / matches_played, 2) as goals_against_per_match,
-        round(cast(total_points as float) / matches_played, 2) as points_per_match,
+        -- Averages (double, not float: DuckDB's FLOAT is 32-bit; nullif keeps
+        -- x / 0 NULL on DuckDB, which would otherwise return inf)
+        round(cast(goals_for as double) / matches_played, 2) as goals_for_per_match,
+        round(cast(goals_against as double) / matches_played, 2) as goals_against_per_match,
+        round(cast(total_points as double) / matches_played, 2) as points_per_match,
         
         -- xG metrics
         xg_for,
         xg_against,
         round(xg_for - xg_against, 2) as xg_difference,
-        round(cast(xg_for as float) / matches_played, 2) as xg_for_per_match,
-        round(cast(xg_against as float) / matches_played, 2) as xg_against_per_match,
+        round(cast(xg_for as double) / matches_played, 2) as xg_for_per_match,
+        round(cast(xg_against as double) / matches_played, 2) as xg_against_per_match,
         
-        -- xG performance (actual vs expected)
+        -- xG performance (actual vs expected). xg_for is the integer 0 for a
+        -- season without xG, which SQLite would otherwise divide as integers
         round(goals_for - xg_for, 2) as xg_overperformance,
-        round((goals_for - xg_for) / matches_played, 2) as xg_overperformance_per_match,
+        round(cast(goals_for - xg_for as double) / matches_played, 2) as xg_overperformance_per_match,
         
-        -- Shot metrics
+        -- Shot metrics (scaled by 100 before dividing, so halves like 50.75
+        -- are exact and both targets round them the same way)
         shots_for,
         shots_against,
         shots_on_target_for,
         shots_on_target_against,
-        round(cast(shots_on_target_for as float) / shots_for * 100, 1) as shot_accuracy_pct,
-        round(cast(goals_for as float) / shots_on_target_for * 100, 1) as conversion_rate_pct,
+        round(cast(shots_on_target_for as double) * 100 / nullif(shots_for, 0), 1) as shot_accuracy_pct,
+        round(cast(goals_for as double) * 100 / nullif(shots_on_target_for, 0), 1) as conversion_rate_pct,
         
         -- Home advantage
-        round(cast(home_points as float) / home_matches - cast(away_points as float) / away_matches, 2) as home_advantage_ppg,
+        round(cast(home_points as double) / nullif(home_matches, 0) - cast(away_points as double) / nullif(away_matches, 0), 2) as home_advantage_ppg,
         
         -- Metadata
-        current_timestamp as _created_at
+        {{ audit_timestamp() }} as _created_at
         
     from combined_stats
     where matches_played > 0  -- Filter out teams with no matches
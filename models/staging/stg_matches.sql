@@ -13,9 +13,10 @@ WITH ordered AS (
 with_matchday AS (
     SELECT
         *,
+        -- 9 matches per round in the 18-team Bundesliga, 10 elsewhere
         CASE 
-            WHEN league = 'Bundesliga' THEN CAST((rn / 9.0 + 0.999999) AS INTEGER)
-            ELSE CAST((rn / 10.0 + 0.999999) AS INTEGER)
+            WHEN league = 'Bundesliga' THEN {{ matchday('rn', 9) }}
+            ELSE {{ matchday('rn', 10) }}
         END AS matchday
     FROM ordered
 ),
@@ -39,17 +40,14 @@ final AS (
         odds_away,
         home_xg,
         away_xg,
+        forecast_home,
+        forecast_draw,
+        forecast_away,
         date,
-        CURRENT_TIMESTAMP AS _created_at,
-        -- Build match_id
-        lower(
-            replace(season, '/', '') || '_' ||
-            replace(league, ' ', '') || '_' ||
-            matchday || '_' ||
-            replace(home_team, ' ', '') || '_' ||
-            replace(away_team, ' ', '') || '_' ||
-            rn
-        ) AS match_id
+        {{ audit_timestamp() }} AS _created_at,
+        -- Integer surrogate of (league, season, date, home_team, away_team),
+        -- assigned by the ETL (etl/manifest.py), independent of row order
+        match_key AS match_id
     FROM with_matchday
 )
 
@@ -1,41 +1,11 @@
 -- SQLite
-SELECT
-    league,
-    season,
-    home_team,
-    away_team,
-    home_goals,
-    away_goals,
-    result
-FROM matches
-WHERE season = '2017/18'
-  AND (date IS NULL OR date = '')
-
-SELECT
-    home_team,
-    away_team,
-    home_goals,
-    away_goals
-FROM matches
-WHERE season = '2017/18'
-  AND league = 'La Liga'
-  AND date IS NULL
-LIMIT 20;
-
-SELECT COUNT(*) 
-FROM matches
-WHERE season = '2017/18'
-  AND league = 'Series A'
-  AND date IS NOT NULL;
-
-SELECT 
-    league,
-    COUNT(*) AS total_rows,
-    SUM(CASE WHEN home_xg IS NULL OR home_xg = '' THEN 1 ELSE 0 END) AS missing_home_xg,
-    SUM(CASE WHEN away_xg IS NULL OR away_xg = '' THEN 1 ELSE 0 END) AS missing_away_xg
-FROM matches
-GROUP BY league
-ORDER BY league;
+-- Data-quality results of the latest run per check (etl/data_quality.py);
+-- replaces the ad-hoc NULL-date and missing-xG counts
+SELECT check_name, league, season, failed, checked, status
+FROM data_quality d
+WHERE checked_at = (SELECT MAX(checked_at) FROM data_quality WHERE check_name = d.check_name)
+  AND status != 'pass'
+ORDER BY check_name, league, season;
 
 -- Check how many matchdays per league and season
 SELECT season, league, MAX(matchday) AS total_matchdays
@@ -43,4 +13,31 @@ FROM stg_matches
 GROUP BY season, league
 ORDER BY season, league;
 
+-- Dashboard: one team's fixtures in a season
+SELECT match_date, home_team_id, away_team_id, home_goals, away_goals, home_xg, away_xg
+FROM fct_matches
+WHERE season = '2023/24'
+  AND (home_team_id = 'arsenal' OR away_team_id = 'arsenal')
+ORDER BY match_date;
+
+-- Dashboard: one competition season
+SELECT matchday, home_team_id, away_team_id, result
+FROM fct_matches
+WHERE season = '2023/24'
+  AND competition_id = 'la_liga';
+
+-- Dashboard: single match lookup
+SELECT *
+FROM fct_matches
+WHERE match_id = (SELECT match_key FROM matches WHERE league = 'Serie A' AND season = '2022/23' LIMIT 1);
 
+-- Dashboard: season table with home record from the fact table
+SELECT s.team_id, s.total_points, COUNT(m.match_id) AS home_matches, AVG(m.home_xg) AS avg_home_xg
+FROM fct_team_season_stats s
+JOIN fct_matches m
+  ON m.home_team_id = s.team_id
+ AND m.season = s.season
+WHERE s.season = '2024/25'
+  AND s.competition_id = 'bundesliga'
+GROUP BY s.team_id, s.total_points
+ORDER BY s.total_points DESC;
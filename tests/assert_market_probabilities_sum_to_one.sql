@@ -0,0 +1,13 @@
+-- Margin-free market probabilities must sum to 1 and the overround must be
+-- non-negative wherever all three odds are present
+
+select
+    match_id,
+    market_home + market_draw + market_away as total_probability,
+    overround
+from {{ ref('fct_match_probabilities') }}
+where market_home is not null
+  and (
+      abs(market_home + market_draw + market_away - 1) > 1e-9
+      or overround < 0
+  )
@@ -0,0 +1,36 @@
+-- Season-to-date totals on each team's last match of a season must equal
+-- the season aggregates in fct_team_season_stats
+
+with season_end as (
+    select
+        team_id,
+        season,
+        competition_id,
+        std_matches,
+        std_points,
+        std_goals_for,
+        std_goals_against,
+        row_number() over (
+            partition by team_id, season
+            order by std_matches desc
+        ) as is_last
+    from {{ ref('fct_team_form') }}
+)
+
+select
+    e.team_id,
+    e.season,
+    e.std_points,
+    s.total_points
+from season_end e
+join {{ ref('fct_team_season_stats') }} s
+    on s.team_id = e.team_id
+   and s.season = e.season
+   and s.competition_id = e.competition_id
+where e.is_last = 1
+  and (
+      e.std_matches != s.matches_played
+      or e.std_points != s.total_points
+      or e.std_goals_for != s.goals_for
+      or e.std_goals_against != s.goals_against
+  )
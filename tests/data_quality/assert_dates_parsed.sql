@@ -0,0 +1,9 @@
+-- Generated from the `dates_parsed` check in etl/data_quality.py; edit CHECKS
+-- and run `python data_quality.py --write-dbt-tests` instead of this file.
+-- Every match has a date that parsed to YYYY-MM-DD
+
+{{ config(severity='warn') }}
+
+select league, season, date, home_team, away_team
+from {{ source('football_data', 'matches') }}
+where date is null or date = 'NaT'
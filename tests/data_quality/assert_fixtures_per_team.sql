@@ -0,0 +1,30 @@
+-- Generated from the `fixtures_per_team` check in etl/data_quality.py; edit CHECKS
+-- and run `python data_quality.py --write-dbt-tests` instead of this file.
+-- Every team plays each other team home and away
+
+{{ config(severity='warn') }}
+
+with appearances as (
+    select league, season, home_team as team from {{ source('football_data', 'matches') }}
+    union all
+    select league, season, away_team as team from {{ source('football_data', 'matches') }}
+),
+
+per_team as (
+    select league, season, team, count(*) as fixtures
+    from appearances
+    group by league, season, team
+),
+
+per_season as (
+    select league, season, count(*) as teams
+    from per_team
+    group by league, season
+)
+
+select t.league, t.season, t.team, t.fixtures, 2 * (s.teams - 1) as expected
+from per_team t
+join per_season s
+    on s.league = t.league
+   and s.season = t.season
+where t.fixtures != 2 * (s.teams - 1)
@@ -0,0 +1,7 @@
+-- Generated from the `odds_in_range` check in etl/data_quality.py; edit CHECKS
+-- and run `python data_quality.py --write-dbt-tests` instead of this file.
+-- Decimal odds lie between 1.01 and 1000
+
+select league, season, date, home_team, away_team, odds_home, odds_draw, odds_away
+from {{ source('football_data', 'matches') }}
+where odds_home < 1.01 or odds_home > 1000 or odds_draw < 1.01 or odds_draw > 1000 or odds_away < 1.01 or odds_away > 1000
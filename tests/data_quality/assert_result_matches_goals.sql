@@ -0,0 +1,7 @@
+-- Generated from the `result_matches_goals` check in etl/data_quality.py; edit CHECKS
+-- and run `python data_quality.py --write-dbt-tests` instead of this file.
+-- The full-time result agrees with the goals
+
+select league, season, date, home_team, away_team, home_goals, away_goals, result
+from {{ source('football_data', 'matches') }}
+where home_goals is not null and away_goals is not null and (result is null or result != case when home_goals > away_goals then 'H' when home_goals = away_goals then 'D' else 'A' end)
@@ -0,0 +1,8 @@
+-- Generated from the `unique_fixture` check in etl/data_quality.py; edit CHECKS
+-- and run `python data_quality.py --write-dbt-tests` instead of this file.
+-- Each home/away pairing is played once per league season
+
+select league, season, home_team, away_team, count(*) as rows
+from {{ source('football_data', 'matches') }}
+group by league, season, home_team, away_team
+having count(*) > 1
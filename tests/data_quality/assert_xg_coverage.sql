@@ -0,0 +1,14 @@
+-- Generated from the `xg_coverage` check in etl/data_quality.py; edit CHECKS
+-- and run `python data_quality.py --write-dbt-tests` instead of this file.
+-- At least 95% of a league season's matches have xG
+
+{{ config(severity='warn') }}
+
+select
+    league,
+    season,
+    count(*) as matches,
+    sum(case when home_xg is null then 1 else 0 end) as missing_xg
+from {{ source('football_data', 'matches') }}
+group by league, season
+having sum(case when home_xg is null then 1 else 0 end) > 0.05 * count(*)
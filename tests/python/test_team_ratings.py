@@ -0,0 +1,98 @@
+"""
+Checks the batched engine in etl/team_ratings.py (rate) against
+rate_reference, a match-by-match loop in plain Python, on a few synthetic
+seasons. benchmarks/bench_team_ratings.py runs the same comparison over the
+full fct_matches history.
+
+Usage:
+    python -m pytest tests/python
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+
+from team_ratings import OUTPUTS, PARAMS, rate, sort_matches, team_rows
+
+
+def rate_reference(matches, params=None):
+    """
+    Match-by-match reference for rate(): plain Python over dicts, in the same
+    order.
+    """
+    p = {**PARAMS, **(params or {})}
+    m = sort_matches(matches)
+    ratings, out = {}, {side: {name: [] for name in OUTPUTS} for side in ('home', 'away')}
+
+    def current(team, year):
+        if team not in ratings:
+            ratings[team] = [p['elo_initial'], 0.0, 0.0, year]
+        r = ratings[team]
+        if r[3] != year:
+            keep = 1 - p['season_reversion']
+            r[:] = [p['elo_initial'] + (r[0] - p['elo_initial']) * keep, r[1] * keep, r[2] * keep, year]
+        return r
+
+    for row in m.itertuples(index=False):
+        year = int(row.season[:4])
+        h, a = current(row.home_team_id, year), current(row.away_team_id, year)
+        hg, ag = float(row.home_goals), float(row.away_goals)
+        pre_h, pre_a = list(h), list(a)
+
+        expected = 1 / (1 + 10 ** ((a[0] - h[0] - p['elo_home_advantage']) / 400))
+        score = 1.0 if hg > ag else 0.5 if hg == ag else 0.0
+        margin = abs(hg - ag)
+        multiplier = 1.0 if margin <= 1 else 1.5 if margin == 2 else (11 + margin) / 8
+        delta = p['elo_k'] * multiplier * (score - expected)
+        h[0] += delta
+        a[0] -= delta
+
+        rate_h = np.exp(p['goals_base'] + p['goals_home_advantage'] + pre_h[1] - pre_a[2])
+        rate_a = np.exp(p['goals_base'] + pre_a[1] - pre_h[2])
+        h[1] += p['goals_learning_rate'] * (hg - rate_h)
+        a[1] += p['goals_learning_rate'] * (ag - rate_a)
+        h[2] -= p['goals_learning_rate'] * (ag - rate_a)
+        a[2] -= p['goals_learning_rate'] * (hg - rate_h)
+
+        for side, pre, post, exp_score, goals in (
+            ('home', pre_h, h, expected, rate_h),
+            ('away', pre_a, a, 1 - expected, rate_a),
+        ):
+            values = (pre[0], post[0], exp_score, pre[1], post[1], pre[2], post[2], goals)
+            for name, value in zip(OUTPUTS, values):
+                out[side][name].append(value)
+
+    out = {side: {name: np.array(v, dtype=float) for name, v in cols.items()} for side, cols in out.items()}
+    return team_rows(m, out)
+
+
+def synthetic_matches(teams=8, seasons=3, seed=7):
+    """
+    Double round robins in random order, teams // 2 matches per date (a team
+    can play twice on one date), with random scores. Columns as load_matches.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for s in range(seasons):
+        season = f"{2020 + s}/{21 + s}"
+        fixtures = [(h, a) for h in range(teams) for a in range(teams) if h != a]
+        rng.shuffle(fixtures)
+        for n, (h, a) in enumerate(fixtures):
+            match_date = f"{2020 + s}-08-{1 + n // (teams // 2):02d}"
+            rows.append((len(rows) + 1, season, 'test', match_date, 1 + n // (teams // 2),
+                         f"team_{h}", f"team_{a}", int(rng.poisson(1.5)), int(rng.poisson(1.1)),
+                         f"{season}|{match_date}"))
+    return pd.DataFrame(rows, columns=['match_id', 'season', 'competition_id', 'match_date', 'matchday',
+                                       'home_team_id', 'away_team_id', 'home_goals', 'away_goals',
+                                       'rating_batch'])
+
+
+def test_batched_matches_reference():
+    matches = synthetic_matches()
+    batched, _ = rate(matches)
+    pd.testing.assert_frame_equal(rate_reference(matches), batched, check_exact=False, rtol=1e-9)
@@ -0,0 +1,75 @@
+"""
+Checks etl/understat_cleaner.py against the original ast.literal_eval
+cleaner it replaced, on SAMPLE: a few fixed rows covering the quoting cases.
+benchmarks/bench_understat_cleaner.py runs check_equivalence on the whole
+export.
+
+Usage:
+    python -m pytest tests/python
+"""
+
+import ast
+import io
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+
+from understat_cleaner import CLEAN_COLUMNS, clean_understat, flat_fields
+
+NESTED_COLUMNS = ["h", "a", "goals", "xG", "forecast"]
+
+# A typical row, titles repr() quotes with " because of an apostrophe,
+# unquoted numbers, and a forecast in scientific notation
+SAMPLE = """id,isResult,h,a,goals,xG,datetime,forecast,league,season
+7119,True,"{'id': '83', 'title': 'Arsenal', 'short_title': 'ARS'}","{'id': '75', 'title': 'Leicester', 'short_title': 'LEI'}","{'h': '4', 'a': '3'}","{'h': '2.54329', 'a': '1.46495'}",2017-08-11 19:45:00,"{'w': '0.628', 'd': '0.2154', 'l': '0.1566'}",EPL,2017
+9001,True,"{'id': '1', 'title': ""Nott'm Forest"", 'short_title': 'NFO'}","{'id': '2', 'title': ""Borussia M'gladbach"", 'short_title': 'BMG'}","{'h': '0', 'a': '2'}","{'h': '0.31', 'a': '1.9'}",2022-08-06 14:00:00,"{'w': '0.0412', 'd': '0.1845', 'l': '0.7743'}",EPL,2022
+9002,True,"{'id': '3', 'title': 'Paris Saint Germain', 'short_title': 'PSG'}","{'id': '4', 'title': 'Lille', 'short_title': 'LIL'}","{'h': 1, 'a': 1}","{'h': 1.02, 'a': 0.97}",2023-03-01 20:45:00,"{'w': 0.41, 'd': 0.33, 'l': 0.26}",Ligue_1,2022
+9003,True,"{'id': '5', 'title': 'Real Madrid', 'short_title': 'RMA'}","{'id': '6', 'title': 'Almeria', 'short_title': 'ALM'}","{'h': '5', 'a': '0'}","{'h': '4.87', 'a': '0.05'}",2024-01-21 16:15:00,"{'w': '0.9999', 'd': '9e-05', 'l': '1e-05'}",La_liga,2023
+"""
+
+
+def clean_understat_literal_eval(df):
+    """The original row-by-row cleaner, the reference for clean_understat."""
+    df = df.copy()
+
+    # Convert stringified dicts into real dicts
+    for col in NESTED_COLUMNS:
+        df[col] = df[col].apply(ast.literal_eval)
+
+    df["home_team"] = df["h"].apply(lambda x: x["title"])
+    df["away_team"] = df["a"].apply(lambda x: x["title"])
+
+    df["home_goals"] = df["goals"].apply(lambda x: int(x["h"]))
+    df["away_goals"] = df["goals"].apply(lambda x: int(x["a"]))
+
+    df["home_xg"] = df["xG"].apply(lambda x: float(x["h"]))
+    df["away_xg"] = df["xG"].apply(lambda x: float(x["a"]))
+
+    df["forecast_home"] = df["forecast"].apply(lambda x: float(x["w"]))
+    df["forecast_draw"] = df["forecast"].apply(lambda x: float(x["d"]))
+    df["forecast_away"] = df["forecast"].apply(lambda x: float(x["l"]))
+
+    df["date"] = pd.to_datetime(df["datetime"]).dt.date
+    df["season"] = df["season"].astype(str)
+
+    return df[CLEAN_COLUMNS]
+
+
+def check_equivalence(raw):
+    """
+    Assert that clean_understat matches clean_understat_literal_eval on
+    `raw`, both as exported (nested) and in the flat layout the scraper
+    writes now. Raises AssertionError on the first difference.
+    """
+    expected = clean_understat_literal_eval(raw)
+    pd.testing.assert_frame_equal(clean_understat(raw), expected)
+    flat = flat_fields(raw).drop(columns=NESTED_COLUMNS)
+    pd.testing.assert_frame_equal(clean_understat(flat), expected)
+
+
+def test_sample_matches_literal_eval():
+    check_equivalence(pd.read_csv(io.StringIO(SAMPLE)))